@@ -7,7 +7,8 @@ export interface ThreadInboxRecord {
   agent_id: string | null;
   event_type: string;
   payload: Record<string, unknown>;
-  status: 'pending' | 'processed';
+  status: 'pending' | 'processing' | 'processed';
+  seq: number;
   created_at: string;
 }
 
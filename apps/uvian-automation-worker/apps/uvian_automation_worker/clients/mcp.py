@@ -1,16 +1,28 @@
-from typing import List, Dict, Any, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from langchain_mcp_adapters.tools import load_mcp_tools
-from langchain_mcp_adapters.sessions import create_session
 from langchain_core.tools import BaseTool
 from mcp import ClientSession
 import time
 import jwt as pyjwt
 import asyncio
-from contextlib import AsyncExitStack
+from clients.mcp_breaker import mcp_circuit_breakers
+from clients.mcp_catalog import mcp_tool_catalog
+from clients.mcp_pool import PooledSession, is_session_error, mcp_session_pool, pool_key
+from core.config import (
+    MCP_CATALOG_PREFETCH_DEADLINE_SECONDS,
+    MCP_CONNECT_TIMEOUT_SECONDS,
+    MCP_JWT_TTL_SECONDS,
+    MCP_METADATA_TIMEOUT_SECONDS,
+)
 from core.logging import log
 
 
+# Tool metadata keys identifying the MCP server a tool belongs to
+MCP_SERVER_KEY = "mcp_server"
+MCP_SERVER_NAME = "mcp_server_name"
+
+
 def _build_headers(auth_method: str, auth_secret: str | None, jwt_secret: str | None = None) -> dict:
     if auth_method == "none" or not auth_secret:
         return {}
@@ -21,7 +33,7 @@ def _build_headers(auth_method: str, auth_secret: str | None, jwt_secret: str |
     if auth_method == "jwt":
         if not jwt_secret:
             return {}
-        payload = {"sub": "agent", "exp": int(time.time()) + 3600}
+        payload = {"sub": "agent", "exp": int(time.time()) + MCP_JWT_TTL_SECONDS}
         token = pyjwt.encode(payload, jwt_secret, algorithm="HS256")
         return {"Authorization": f"Bearer {token}"}
     return {}
@@ -35,23 +47,64 @@ def _build_connection_config(url: str, auth_method: str, auth_secret: str | None
     }
 
 
+async def _acquire(auth: tuple, name: str) -> PooledSession:
+    return await mcp_session_pool.acquire(
+        pool_key(*auth),
+        # Fresh headers (a newly minted JWT) for every session opened
+        lambda: _build_connection_config(*auth),
+        name=name,
+        expires_in=MCP_JWT_TTL_SECONDS if auth[1] == "jwt" else None,
+    )
+
+
+def _to_metadata(result) -> List[Dict[str, Any]]:
+    return [
+        {
+            "name": tool.name,
+            "description": tool.description or "",
+            "inputSchema": tool.inputSchema,
+        }
+        for tool in result.tools
+    ]
+
+
+async def _relist(auth: tuple, name: str) -> List[Dict[str, Any]]:
+    """List a server's tools afresh (catalog revalidation; outlives the job)."""
+    lease = await _acquire(auth, name)
+    try:
+        return _to_metadata(await lease.session.list_tools())
+    except Exception as e:
+        if is_session_error(e):
+            mcp_session_pool.invalidate(lease)
+        raise
+    finally:
+        mcp_session_pool.release(lease)
+
+
 class PersistentMCPClient:
-    """Manages persistent connections to multiple MCP servers.
+    """Manages persistent connections to multiple MCP servers for one job.
 
-    Opens long-lived sessions that persist across tool invocations, enabling
-    stateful MCP servers (conversation context, auth sessions, subscriptions).
-    Safely manages background async tasks using AsyncExitStack.
+    Sessions are leased from the process-wide ``mcp_session_pool``, so they
+    stay open (and initialized) across tool invocations and across jobs,
+    enabling stateful MCP servers (conversation context, auth sessions,
+    subscriptions). ``close`` returns the leases to the pool.
     """
 
     def __init__(self):
         self._connections: Dict[str, dict] = {}
+        self._auth: Dict[str, tuple] = {}
         self._names: Dict[str, str] = {}
         self._name_to_id: Dict[str, str] = {}
         self._sessions: Dict[str, ClientSession] = {}
+        self._leases: Dict[str, PooledSession] = {}
+        self._connecting: Dict[str, asyncio.Future] = {}
         self._tool_cache: Dict[str, List[BaseTool]] = {}
         self._metadata_cache: Dict[str, List[Dict[str, Any]]] = {}
+        # Cross-job catalog entries (name, description, schema hash) for
+        # servers this job has not listed itself
+        self._catalog: Dict[str, List[Dict[str, str]]] = {}
         self._usage_guidance: Dict[str, str] = {}
-        self.exit_stack = AsyncExitStack()
+        self._prefetch: Optional[asyncio.Task] = None
 
     async def __aenter__(self):
         return self
@@ -91,36 +144,36 @@ class PersistentMCPClient:
         Args:
             mcp_ids_or_names: List of MCP IDs or friendly names to connect
         """
-        for mcp_id_or_name in mcp_ids_or_names:
-            try:
-                async with asyncio.timeout(15):
-                    await self.connect(mcp_id_or_name)
-            except asyncio.TimeoutError:
-                log.warning("mcp_connection_timeout", mcp_id=mcp_id_or_name)
-            except asyncio.CancelledError:
-                log.warning("mcp_connection_cancelled", mcp_id=mcp_id_or_name)
-                raise
-            except Exception as e:
-                log.warning("mcp_connect_failed", mcp_id=mcp_id_or_name, error=str(e))
+        await self._for_each(
+            mcp_ids_or_names, self.connect, MCP_CONNECT_TIMEOUT_SECONDS,
+            "mcp_connection_timeout", "mcp_connection_cancelled", "mcp_connect_failed",
+        )
 
-        await self.fetch_all_metadata()
+        await self.fetch_all_metadata(mcp_ids_or_names)
 
     def add_server(self, mcp_id: str, url: str, auth_method: str, auth_secret: str | None, jwt_secret: str | None = None, name: str | None = None, usage_guidance: str | None = None):
         """Register an MCP server configuration. Does NOT connect yet."""
         self._connections[mcp_id] = _build_connection_config(url, auth_method, auth_secret, jwt_secret)
+        self._auth[mcp_id] = (url, auth_method, auth_secret, jwt_secret)
         self._names[mcp_id] = name or mcp_id
+        cached = mcp_tool_catalog.peek(pool_key(*self._auth[mcp_id]))
+        if cached is not None:
+            self._catalog[mcp_id] = cached.tools
         if name:
             self._name_to_id[name] = mcp_id
         if usage_guidance:
             self._usage_guidance[mcp_id] = usage_guidance
 
+    def _resolve(self, mcp_id: str) -> str:
+        if mcp_id not in self._connections and mcp_id in self._name_to_id:
+            return self._name_to_id[mcp_id]
+        return mcp_id
+
     async def connect(self, mcp_id: str) -> ClientSession:
         """Dynamically open a persistent connection to a single registered server.
         
         Accepts either the server's UUID (mcp_id) or its friendly name."""
-        resolved_id = mcp_id
-        if mcp_id not in self._connections and mcp_id in self._name_to_id:
-            resolved_id = self._name_to_id[mcp_id]
+        resolved_id = self._resolve(mcp_id)
         
         if resolved_id in self._sessions:
             return self._sessions[resolved_id]
@@ -128,28 +181,50 @@ class PersistentMCPClient:
         if resolved_id not in self._connections:
             raise ValueError(f"MCP server '{mcp_id}' is not registered.")
 
-        connection = self._connections[resolved_id]
-        gen = create_session(connection)
-        session = await self.exit_stack.enter_async_context(gen)
-
-        self._sessions[resolved_id] = session
-        return session
+        # Concurrent callers for the same server share one lease
+        pending = self._connecting.get(resolved_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._lease(resolved_id))
+            self._connecting[resolved_id] = pending
+            pending.add_done_callback(lambda _: self._connecting.pop(resolved_id, None))
+        return await asyncio.shield(pending)
+
+    async def _lease(self, resolved_id: str) -> ClientSession:
+        lease = await _acquire(self._auth[resolved_id], self._names.get(resolved_id, resolved_id))
+        self._leases[resolved_id] = lease
+        self._sessions[resolved_id] = lease.session
+        return lease.session
+
+    def invalidate(self, key: tuple) -> None:
+        """Give up this job's leases on a server's session after it failed.
+
+        The pool stops handing the session out; the next ``connect`` or
+        ``load_tools`` for the server leases (and lists) a new one.
+        """
+        for resolved_id, lease in list(self._leases.items()):
+            if lease.key != key:
+                continue
+            del self._leases[resolved_id]
+            self._sessions.pop(resolved_id, None)
+            mcp_session_pool.invalidate(lease)
+            mcp_session_pool.release(lease)
+
+    async def _on_lease(self, resolved_id: str, operation: Callable[[PooledSession], Awaitable[Any]]) -> Any:
+        """Run ``operation`` on the server's lease, invalidating it on session errors."""
+        lease = self._leases[resolved_id]
+        try:
+            return await operation(lease)
+        except Exception as e:
+            if is_session_error(e):
+                self.invalidate(lease.key)
+            raise
 
     async def connect_all(self):
-        """Connect to all servers sequentially. Must be sequential because
-        AsyncExitStack requires enter_async_context() and aclose() to run
-        in the same task context."""
-        for mcp_id in self._connections:
-            try:
-                async with asyncio.timeout(15):
-                    await self.connect(mcp_id)
-            except asyncio.TimeoutError:
-                log.warning("mcp_connection_timeout", mcp_id=mcp_id)
-            except asyncio.CancelledError:
-                log.warning("mcp_connection_cancelled", mcp_id=mcp_id)
-                raise
-            except Exception as e:
-                log.warning("mcp_connect_failed", mcp_id=mcp_id, error=str(e))
+        """Connect to all servers concurrently."""
+        await self._for_each(
+            list(self._connections), self.connect, MCP_CONNECT_TIMEOUT_SECONDS,
+            "mcp_connection_timeout", "mcp_connection_cancelled", "mcp_connect_failed",
+        )
 
     async def load_tools(self, mcp_id: str) -> List[BaseTool]:
         """Load tools from a specific server. Will lazily connect if not already connected."""
@@ -157,14 +232,30 @@ class PersistentMCPClient:
         if mcp_id not in self._connections and mcp_id in self._name_to_id:
             resolved_id = self._name_to_id[mcp_id]
         
-        if resolved_id in self._tool_cache:
-            return self._tool_cache[resolved_id]
-
-        session = await self.connect(resolved_id)
-
-        tools = await load_mcp_tools(session)
-        self._tool_cache[resolved_id] = tools
-        return tools
+        # Tools of an invalidated lease are relisted on a new session, but
+        # not while the server's breaker is open: the stale tools are
+        # rejected by the breaker without reconnecting
+        cached = self._tool_cache.get(resolved_id)
+        if cached is not None and (
+            resolved_id in self._leases
+            or mcp_circuit_breakers.retry_after(pool_key(*self._auth[resolved_id])) > 0
+        ):
+            return cached
+
+        await self.connect(resolved_id)
+        self._tool_cache[resolved_id] = await self._on_lease(resolved_id, self._list_tools)
+        return self._tool_cache[resolved_id]
+
+    @staticmethod
+    async def _list_tools(lease: PooledSession) -> List[BaseTool]:
+        # Tools are bound to the session, so a warm lease keeps its listing
+        if lease.tools is None:
+            tools = await load_mcp_tools(lease.session)
+            for tool in tools:
+                # Calls are routed through the server's circuit breaker
+                tool.metadata = {**(tool.metadata or {}), MCP_SERVER_KEY: lease.key, MCP_SERVER_NAME: lease.name}
+            lease.tools = tools
+        return lease.tools
 
     async def get_tool_metadata(self, mcp_id: str) -> List[Dict[str, Any]]:
         """Fetch tool metadata from a specific server. Lazily connects if needed."""
@@ -175,40 +266,140 @@ class PersistentMCPClient:
         if resolved_id in self._metadata_cache:
             return self._metadata_cache[resolved_id]
 
-        session = await self.connect(resolved_id)
-
-        result = await session.list_tools()
-        metadata = [
-            {
-                "name": tool.name,
-                "description": tool.description or "",
-                "inputSchema": tool.inputSchema,
-            }
-            for tool in result.tools
-        ]
-        self._metadata_cache[resolved_id] = metadata
-        return metadata
-
-    async def fetch_all_metadata(self):
-        """Fetch metadata sequentially. Must be sequential because
-        AsyncExitStack requires all session operations in the same task."""
-        for mcp_id in self._connections:
+        await self.connect(resolved_id)
+        self._metadata_cache[resolved_id] = await self._on_lease(resolved_id, self._list_metadata)
+        return self._metadata_cache[resolved_id]
+
+    @staticmethod
+    async def _list_metadata(lease: PooledSession) -> List[Dict[str, Any]]:
+        if lease.metadata is None:
+            lease.metadata = _to_metadata(await lease.session.list_tools())
+            if mcp_tool_catalog.put(lease.key, lease.metadata):
+                # Tools listed earlier on this session are out of date
+                lease.tools = None
+        return lease.metadata
+
+    async def fetch_all_metadata(self, mcp_ids_or_names: Optional[List[str]] = None):
+        """Fetch metadata concurrently for the given servers, or for the
+        connected ones by default.
+
+        Never connects servers nobody asked for; the rest of the catalog is
+        filled in by ``start_catalog_prefetch``.
+        """
+        if mcp_ids_or_names is None:
+            mcp_ids_or_names = list(self._sessions)
+        await self._for_each(
+            list(dict.fromkeys(self._resolve(mcp_id) for mcp_id in mcp_ids_or_names)),
+            self.get_tool_metadata, MCP_METADATA_TIMEOUT_SECONDS,
+            "mcp_metadata_timeout", "mcp_metadata_cancelled", "mcp_fetch_metadata_failed",
+        )
+
+    def start_catalog_prefetch(self, deadline: float = MCP_CATALOG_PREFETCH_DEADLINE_SECONDS) -> None:
+        """Fetch catalog metadata for every registered server in the background.
+
+        The turn does not wait for it: until it finishes (or hits ``deadline``)
+        the catalog is partial. Servers found in the cross-job
+        ``mcp_tool_catalog`` are not contacted at all; the others are only
+        leased for the listing, so they are not kept open for the job.
+        """
+        if self._prefetch is not None or not self._connections:
+            return
+        self._prefetch = asyncio.create_task(self._prefetch_catalog(deadline), name="mcp-catalog-prefetch")
+
+    async def _prefetch_catalog(self, deadline: float) -> None:
+        missing = [mcp_id for mcp_id in self._connections if mcp_id not in self._metadata_cache]
+        self._catalog.update(await self._cached_catalog(missing))
+        missing = [mcp_id for mcp_id in missing if mcp_id not in self._catalog]
+        await self._for_each(
+            missing, self._prefetch_metadata, deadline,
+            "mcp_catalog_prefetch_timeout", "mcp_catalog_prefetch_cancelled", "mcp_catalog_prefetch_failed",
+        )
+        log.info(
+            "mcp_catalog_prefetched",
+            servers=len(missing),
+            pending=[mcp_id for mcp_id in self._connections if self._pending(mcp_id)],
+        )
+
+    async def _cached_catalog(self, mcp_ids: List[str]) -> Dict[str, List[Dict[str, str]]]:
+        """Cross-job catalog entries; stale ones are served and revalidated."""
+        async def lookup(mcp_id: str):
+            key = pool_key(*self._auth[mcp_id])
+            entry = await mcp_tool_catalog.get(key)
+            if entry is not None and mcp_tool_catalog.is_stale(entry):
+                mcp_tool_catalog.revalidate(
+                    key,
+                    lambda: _relist(self._auth[mcp_id], self._names.get(mcp_id, mcp_id)),
+                    on_change=lambda: mcp_session_pool.drop_listings(key),
+                )
+            return entry
+
+        entries = await asyncio.gather(*(lookup(mcp_id) for mcp_id in mcp_ids))
+        return {mcp_id: entry.tools for mcp_id, entry in zip(mcp_ids, entries) if entry is not None}
+
+    async def _prefetch_metadata(self, mcp_id: str) -> None:
+        if mcp_id in self._metadata_cache:
+            return
+        if mcp_id in self._sessions or mcp_id in self._connecting:
+            await self.get_tool_metadata(mcp_id)
+            return
+        lease = await _acquire(self._auth[mcp_id], self._names.get(mcp_id, mcp_id))
+        try:
+            self._metadata_cache[mcp_id] = await self._list_metadata(lease)
+        except Exception as e:
+            if is_session_error(e):
+                mcp_session_pool.invalidate(lease)
+            raise
+        finally:
+            mcp_session_pool.release(lease)
+
+    def _pending(self, mcp_id: str) -> bool:
+        return mcp_id not in self._metadata_cache and mcp_id not in self._catalog
+
+    @property
+    def catalog_partial(self) -> bool:
+        """True while some registered server's metadata is still unknown."""
+        return any(self._pending(mcp_id) for mcp_id in self._connections)
+
+    @staticmethod
+    async def _for_each(
+        mcp_ids: List[str],
+        operation: Callable[[str], Awaitable[Any]],
+        timeout: float,
+        timeout_event: str,
+        cancelled_event: str,
+        failed_event: str,
+    ) -> None:
+        """Run a per-server operation for every server at once.
+
+        Sessions are owned by the pool's per-session tasks, so requests can
+        come from any task; failures are logged per server and do not cancel
+        the others.
+        """
+        async def run(mcp_id: str):
             try:
-                async with asyncio.timeout(10):
-                    await self.get_tool_metadata(mcp_id)
+                async with asyncio.timeout(timeout):
+                    await operation(mcp_id)
             except asyncio.TimeoutError:
-                log.warning("mcp_metadata_timeout", mcp_id=mcp_id)
+                log.warning(timeout_event, mcp_id=mcp_id)
             except asyncio.CancelledError:
-                log.warning("mcp_metadata_cancelled", mcp_id=mcp_id)
+                log.warning(cancelled_event, mcp_id=mcp_id)
                 raise
             except Exception as e:
-                log.warning("mcp_fetch_metadata_failed", mcp_id=mcp_id, error=str(e))
+                log.warning(failed_event, mcp_id=mcp_id, error=str(e))
+
+        async with asyncio.TaskGroup() as group:
+            for mcp_id in mcp_ids:
+                group.create_task(run(mcp_id))
 
     def get_rich_catalog(self) -> List[Dict[str, Any]]:
-        """Get catalog of all servers with tool info and usage guidance."""
+        """Get catalog of all servers with tool info and usage guidance.
+
+        Never blocks: servers whose metadata has not been fetched yet are
+        listed with ``pending`` set and no tools.
+        """
         result = []
         for mcp_id in self._connections:
-            metadata = self._metadata_cache.get(mcp_id, [])
+            metadata = self._metadata_cache.get(mcp_id) or self._catalog.get(mcp_id, [])
             tool_descriptions = [
                 f"{t['name']}: {t['description']}" if t.get('description') else t['name']
                 for t in metadata
@@ -218,8 +409,10 @@ class PersistentMCPClient:
                 "id": mcp_id,
                 "name": self._names.get(mcp_id, mcp_id),
                 "tool_count": len(metadata),
+                "tool_names": [t["name"] for t in metadata],
                 "tool_descriptions": tool_descriptions,
                 "usage_guidance": usage,
+                "pending": self._pending(mcp_id),
             })
         return result
 
@@ -230,18 +423,20 @@ class PersistentMCPClient:
         return dict(self._tool_cache)
 
     async def get_all_metadata(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Fetch and return metadata from all MCPs.
+        """Fetch and return metadata from connected MCPs, plus whatever the
+        catalog prefetch has gathered for the others.
         
         Returns a dict mapping mcp_id to list of tool metadata for each server."""
-        result = {}
-        for mcp_id in self._connections:
+        async def fetch(mcp_id: str) -> List[Dict[str, Any]]:
             try:
-                metadata = await self.get_tool_metadata(mcp_id)
-                result[mcp_id] = metadata
+                return await self.get_tool_metadata(mcp_id)
             except Exception as e:
                 log.warning("mcp_get_metadata_failed", mcp_id=mcp_id, error=str(e))
-                result[mcp_id] = []
-        return result
+                return []
+
+        mcp_ids = list(self._sessions)
+        results = await asyncio.gather(*(fetch(mcp_id) for mcp_id in mcp_ids))
+        return {**self._metadata_cache, **dict(zip(mcp_ids, results))}
 
     async def get_tools_by_name(self, mcp_name: str) -> List[BaseTool]:
         """Load tools from an MCP server by its friendly name.
@@ -268,11 +463,23 @@ class PersistentMCPClient:
         return await self.get_tool_metadata(mcp_id)
 
     async def close(self):
-        """Safely close all persistent sessions and anyio background tasks."""
-        await self.exit_stack.aclose()
+        """Return this job's session leases to the pool (safe to call twice)."""
+        if self._prefetch is not None:
+            self._prefetch.cancel()
+            await asyncio.gather(self._prefetch, return_exceptions=True)
+            self._prefetch = None
+        pending = list(self._connecting.values())
+        for future in pending:
+            future.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        for lease in self._leases.values():
+            mcp_session_pool.release(lease)
+        self._leases.clear()
         self._sessions.clear()
         self._tool_cache.clear()
         self._metadata_cache.clear()
+        self._catalog.clear()
 
 
 class MCPRegistry:
@@ -286,10 +493,20 @@ class MCPRegistry:
         if self._client:
             await self._client.connect(mcp_id)
 
-    async def fetch_all_metadata(self):
-        """Fetch metadata for all connected MCP servers."""
+    async def fetch_all_metadata(self, mcp_ids: Optional[List[str]] = None):
+        """Fetch metadata for the given (default: connected) MCP servers."""
+        if self._client:
+            await self._client.fetch_all_metadata(mcp_ids)
+
+    def start_catalog_prefetch(self) -> None:
         if self._client:
-            await self._client.fetch_all_metadata()
+            self._client.start_catalog_prefetch()
+
+    def get_catalog(self) -> Dict[str, Dict[str, Any]]:
+        """Current (possibly partial) catalog keyed by mcp_id."""
+        if not self._client:
+            return {}
+        return {entry["id"]: entry for entry in self._client.get_rich_catalog()}
 
     async def get_tools_for_mcp(self, mcp_id: str) -> List[BaseTool]:
         if not self._client:
@@ -300,6 +517,11 @@ class MCPRegistry:
         if not self._client:
             return {}
         return await self._client.get_all_tools()
+
+    def invalidate(self, key: tuple) -> None:
+        """Drop the job's session to the server ``key`` after it failed."""
+        if self._client:
+            self._client.invalidate(key)
     
     async def close(self):
         if self._client:
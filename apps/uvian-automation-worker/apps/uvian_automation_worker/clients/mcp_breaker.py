@@ -0,0 +1,226 @@
+"""
+Per-MCP-server isolation of tool calls.
+
+Every call to an MCP tool goes through the breaker of the server it came
+from, keyed like the session pool by (url, auth identity):
+
+- at most MCP_SERVER_CONCURRENCY calls run per server (and, if set,
+  MCP_TOOL_CONCURRENCY per tool); the wait counts against the call's deadline
+- the call is cancelled when its deadline passes instead of holding up the
+  rest of the tool step
+- MCP_BREAKER_FAILURE_THRESHOLD consecutive failures or timeouts open the
+  breaker: calls fail fast for MCP_BREAKER_RESET_SECONDS, then one probe call
+  is let through (half-open) and its outcome closes or re-opens the breaker
+- opening the breaker invalidates the server's pooled session, so the probe
+  runs on a newly opened session rather than the one that kept failing
+
+Errors the tool itself reports (``ToolException``) and argument validation
+errors mean the server answered, so they do not count as failures.
+"""
+import asyncio
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from langchain_core.tools import ToolException
+from pydantic import ValidationError
+
+from clients.mcp_pool import mcp_session_pool
+from core.config import (
+    MCP_BREAKER_FAILURE_THRESHOLD,
+    MCP_BREAKER_RESET_SECONDS,
+    MCP_SERVER_CONCURRENCY,
+    MCP_TOOL_CONCURRENCY,
+)
+from core.logging import log
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """The server's breaker is open; the call was not attempted."""
+
+    def __init__(self, server: str, retry_after: float):
+        super().__init__(f"MCP server '{server}' is unavailable after repeated failures")
+        self.server = server
+        self.retry_after = retry_after
+
+
+class ToolDeadlineError(Exception):
+    """The call (including its wait for a concurrency slot) ran out of time."""
+
+    def __init__(self, server: str, tool_name: str):
+        super().__init__(f"Tool '{tool_name}' on MCP server '{server}' did not finish before its deadline")
+        self.server = server
+        self.tool_name = tool_name
+
+
+@dataclass
+class CircuitBreaker:
+    key: Tuple[str, str]
+    name: str
+    semaphore: asyncio.Semaphore
+    state: str = CLOSED
+    failures: int = 0
+    opened_at: float = 0.0
+    probing: bool = False
+    tool_semaphores: Dict[str, asyncio.Semaphore] = field(default_factory=dict)
+    in_flight: int = 0
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    rejected: int = 0
+    trips: int = 0
+
+
+class MCPCircuitBreakers:
+    """Process-wide breakers, concurrency budgets and deadlines per MCP server."""
+
+    def __init__(
+        self,
+        failure_threshold: int = MCP_BREAKER_FAILURE_THRESHOLD,
+        reset_seconds: float = MCP_BREAKER_RESET_SECONDS,
+        server_concurrency: int = MCP_SERVER_CONCURRENCY,
+        tool_concurrency: int = MCP_TOOL_CONCURRENCY,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.server_concurrency = server_concurrency
+        self.tool_concurrency = tool_concurrency
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def breaker(self, key: Tuple[str, str], name: str = "") -> CircuitBreaker:
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(key=key, name=name or key[0], semaphore=asyncio.Semaphore(self.server_concurrency))
+            self._breakers[key] = breaker
+        return breaker
+
+    def is_open(self, key: Tuple[str, str]) -> bool:
+        """True while the server's breaker is open (not yet half-open)."""
+        breaker = self._breakers.get(key)
+        return breaker is not None and breaker.state == OPEN
+
+    def retry_after(self, key: Tuple[str, str]) -> float:
+        """Seconds until the server's breaker lets a call through (0 if it would now)."""
+        breaker = self._breakers.get(key)
+        if breaker is None or breaker.state != OPEN:
+            return 0.0
+        return max(breaker.opened_at + self.reset_seconds - time.monotonic(), 0.0)
+
+    async def call(
+        self,
+        key: Tuple[str, str],
+        name: str,
+        tool_name: str,
+        invoke: Callable[[], Awaitable[Any]],
+        deadline: float,
+    ) -> Any:
+        """Run ``invoke`` under the server's breaker, budgets and ``deadline``
+        (an event-loop time).
+
+        Raises ``CircuitOpenError`` without calling when the breaker is open
+        and ``ToolDeadlineError`` when the deadline passes.
+        """
+        breaker = self.breaker(key, name)
+        probe = self._admit(breaker)
+        try:
+            async with asyncio.timeout_at(deadline):
+                async with breaker.semaphore, self._tool_semaphore(breaker, tool_name):
+                    breaker.calls += 1
+                    breaker.in_flight += 1
+                    try:
+                        result = await invoke()
+                    finally:
+                        breaker.in_flight -= 1
+        except TimeoutError:
+            breaker.timeouts += 1
+            self._failed(breaker, probe)
+            raise ToolDeadlineError(breaker.name, tool_name) from None
+        except (ToolException, ValidationError):
+            self._succeeded(breaker, probe)
+            raise
+        except asyncio.CancelledError:
+            if probe:
+                breaker.probing = False
+            raise
+        except Exception:
+            breaker.errors += 1
+            self._failed(breaker, probe)
+            raise
+        self._succeeded(breaker, probe)
+        return result
+
+    def _tool_semaphore(self, breaker: CircuitBreaker, tool_name: str):
+        if self.tool_concurrency <= 0:
+            return nullcontext()
+        semaphore = breaker.tool_semaphores.get(tool_name)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.tool_concurrency)
+            breaker.tool_semaphores[tool_name] = semaphore
+        return semaphore
+
+    def _admit(self, breaker: CircuitBreaker) -> bool:
+        """Let a call through, returning whether it is the half-open probe."""
+        if breaker.state == CLOSED:
+            return False
+        retry_after = breaker.opened_at + self.reset_seconds - time.monotonic()
+        if breaker.state == OPEN and retry_after <= 0:
+            self._transition(breaker, HALF_OPEN)
+        if breaker.state == HALF_OPEN and not breaker.probing:
+            breaker.probing = True
+            return True
+        breaker.rejected += 1
+        raise CircuitOpenError(breaker.name, max(retry_after, 0.0))
+
+    def _succeeded(self, breaker: CircuitBreaker, probe: bool) -> None:
+        breaker.failures = 0
+        if probe:
+            breaker.probing = False
+            self._transition(breaker, CLOSED)
+
+    def _failed(self, breaker: CircuitBreaker, probe: bool) -> None:
+        breaker.failures += 1
+        if probe:
+            breaker.probing = False
+        if probe or (breaker.state == CLOSED and breaker.failures >= self.failure_threshold):
+            breaker.opened_at = time.monotonic()
+            breaker.trips += 1
+            self._transition(breaker, OPEN)
+            mcp_session_pool.invalidate_key(breaker.key)
+
+    @staticmethod
+    def _transition(breaker: CircuitBreaker, state: str) -> None:
+        if breaker.state == state:
+            return
+        log.info(
+            "mcp_breaker_state_changed",
+            mcp=breaker.name,
+            previous=breaker.state,
+            state=state,
+            consecutive_failures=breaker.failures,
+        )
+        breaker.state = state
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-server breaker state and counters, for metrics export."""
+        return {
+            breaker.name: {
+                "state": breaker.state,
+                "consecutive_failures": breaker.failures,
+                "in_flight": breaker.in_flight,
+                "calls": breaker.calls,
+                "errors": breaker.errors,
+                "timeouts": breaker.timeouts,
+                "rejected": breaker.rejected,
+                "trips": breaker.trips,
+            }
+            for breaker in self._breakers.values()
+        }
+
+
+# Singleton instance
+mcp_circuit_breakers = MCPCircuitBreakers()
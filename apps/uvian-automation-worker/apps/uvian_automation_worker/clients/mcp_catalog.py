@@ -0,0 +1,209 @@
+"""
+Cross-job cache of MCP tool catalogs.
+
+Lets a job describe the tools of a server it has not connected (the "MCP
+Servers you can load" prompt section) without a handshake. Entries are keyed
+like the session pool, by (url, auth identity), and hold each tool's name,
+description and schema hash plus a digest of the whole list:
+
+- In-process LRU, optionally backed by Redis so other replicas start warm.
+- Entries older than MCP_CATALOG_TTL_SECONDS are still served, and a
+  background task lists the server again (stale-while-revalidate).
+- When a listing's digest differs from the cached one, the server's tools
+  changed: the entry is replaced and the pooled session's listings are
+  dropped so the next ``load_tools`` picks up the new schemas.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from core.config import (
+    MCP_CATALOG_CACHE_SIZE,
+    MCP_CATALOG_REDIS,
+    MCP_CATALOG_REDIS_TTL_SECONDS,
+    MCP_CATALOG_TTL_SECONDS,
+)
+from core.logging import log
+
+
+def schema_hash(schema: Any) -> str:
+    return hashlib.sha256(json.dumps(schema, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def catalog_tools(metadata: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Catalog form of ``list_tools`` metadata: the schema is only hashed."""
+    return [
+        {
+            "name": tool["name"],
+            "description": tool.get("description") or "",
+            "schema_hash": tool.get("schema_hash") or schema_hash(tool.get("inputSchema")),
+        }
+        for tool in metadata
+    ]
+
+
+def tool_list_digest(tools: List[Dict[str, str]]) -> str:
+    rows = sorted((t["name"], t["description"], t["schema_hash"]) for t in tools)
+    return hashlib.sha256(json.dumps(rows).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CatalogEntry:
+    tools: List[Dict[str, str]]
+    digest: str
+    # Wall clock, so entries read back from Redis age correctly
+    fetched_at: float
+
+
+class ToolCatalogCache:
+    """Tiered (process LRU + optional Redis) cache of MCP tool catalogs."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = MCP_CATALOG_TTL_SECONDS,
+        max_entries: int = MCP_CATALOG_CACHE_SIZE,
+        use_redis: bool = MCP_CATALOG_REDIS,
+        redis_ttl_seconds: int = MCP_CATALOG_REDIS_TTL_SECONDS,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.use_redis = use_redis
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], CatalogEntry]" = OrderedDict()
+        self._revalidating: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._writes: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.changes = 0
+
+    @staticmethod
+    def _redis_key(key: Tuple[str, str]) -> str:
+        url, identity = key
+        return f"mcp_catalog:{hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]}:{identity}"
+
+    def is_stale(self, entry: CatalogEntry) -> bool:
+        return time.time() - entry.fetched_at > self.ttl_seconds
+
+    def peek(self, key: Tuple[str, str]) -> Optional[CatalogEntry]:
+        """Process-tier entry without touching Redis (safe on sync paths)."""
+        return self._entries.get(key)
+
+    async def get(self, key: Tuple[str, str]) -> Optional[CatalogEntry]:
+        """Cached catalog for a server, stale or not; None if never listed."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        entry = await self._get_remote(key)
+        if entry is not None:
+            self.redis_hits += 1
+            self._store(key, entry)
+            return entry
+        self.misses += 1
+        return None
+
+    def put(self, key: Tuple[str, str], metadata: List[Dict[str, Any]]) -> bool:
+        """Record a fresh listing; returns True if it changed the tool list."""
+        tools = catalog_tools(metadata)
+        entry = CatalogEntry(tools=tools, digest=tool_list_digest(tools), fetched_at=time.time())
+        previous = self._entries.get(key)
+        changed = previous is not None and previous.digest != entry.digest
+        if changed:
+            self.changes += 1
+            log.info("mcp_catalog_changed", url=key[0], tools=len(tools), previous_tools=len(previous.tools))
+        self._store(key, entry)
+        if self.use_redis:
+            task = asyncio.create_task(self._put_remote(key, entry))
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+        return changed
+
+    def revalidate(
+        self,
+        key: Tuple[str, str],
+        list_metadata: Callable[[], Awaitable[List[Dict[str, Any]]]],
+        on_change: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """List the server again in the background (once at a time per key);
+        ``on_change`` runs if the tool list changed."""
+        if key in self._revalidating:
+            return
+        self.revalidations += 1
+        task = asyncio.create_task(self._revalidate(key, list_metadata, on_change), name=f"mcp-catalog:{key[0]}")
+        self._revalidating[key] = task
+        task.add_done_callback(lambda _: self._revalidating.pop(key, None))
+
+    async def _revalidate(
+        self,
+        key: Tuple[str, str],
+        list_metadata: Callable[[], Awaitable[List[Dict[str, Any]]]],
+        on_change: Optional[Callable[[], None]],
+    ) -> None:
+        try:
+            if self.put(key, await list_metadata()) and on_change:
+                on_change()
+        except Exception as e:
+            log.warning("mcp_catalog_revalidation_failed", url=key[0], error=str(e) or type(e).__name__)
+
+    def _store(self, key: Tuple[str, str], entry: CatalogEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _get_remote(self, key: Tuple[str, str]) -> Optional[CatalogEntry]:
+        if not self.use_redis:
+            return None
+        from core.events import events
+
+        try:
+            if not events.redis:
+                await events.connect()
+            payload = await events.redis.get(self._redis_key(key))
+        except Exception as e:
+            log.warning("mcp_catalog_redis_unavailable", url=key[0], error=str(e))
+            return None
+        if not payload:
+            return None
+        data = json.loads(payload)
+        return CatalogEntry(tools=data["tools"], digest=data["digest"], fetched_at=data["fetched_at"])
+
+    async def _put_remote(self, key: Tuple[str, str], entry: CatalogEntry) -> None:
+        from core.events import events
+
+        try:
+            if not events.redis:
+                await events.connect()
+            payload = json.dumps({"tools": entry.tools, "digest": entry.digest, "fetched_at": entry.fetched_at})
+            await events.redis.set(self._redis_key(key), payload, ex=self.redis_ttl_seconds)
+        except Exception as e:
+            log.warning("mcp_catalog_redis_unavailable", url=key[0], error=str(e))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "changes": self.changes,
+        }
+
+    async def close(self) -> None:
+        """Cancel in-flight revalidations and Redis writes on worker shutdown."""
+        tasks = list(self._revalidating.values()) + list(self._writes)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Singleton instance
+mcp_tool_catalog = ToolCatalogCache()
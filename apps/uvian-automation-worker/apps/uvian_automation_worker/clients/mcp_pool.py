@@ -0,0 +1,257 @@
+"""
+Process-wide pool of initialized MCP sessions shared across jobs.
+
+Opening a streamable-HTTP session costs a handshake, ``initialize`` and
+``list_tools``; pooled sessions make repeat wakeups skip all three. Sessions
+are keyed by (url, auth identity) and leased to jobs with a refcount:
+
+- each session is opened and closed by its own owner task, because anyio
+  cancel scopes must be entered and exited in the same task (jobs only send
+  requests on it, which any task may do)
+- a session idle for longer than MCP_POOL_PING_INTERVAL_SECONDS is pinged
+  before it is leased again, and rebuilt if the ping fails
+- minted JWTs expire, so sessions using them are rebuilt shortly before
+- unleased sessions idle for MCP_POOL_IDLE_TTL_SECONDS are closed
+- a session whose request fails with a session error (see
+  ``is_session_error``) is invalidated by the caller, so the next acquire
+  opens a new one instead of reusing it while it is busy
+"""
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import anyio
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.sessions import create_session
+from mcp import ClientSession
+from mcp.shared.exceptions import McpError
+
+from core.config import (
+    MCP_AUTH_REFRESH_MARGIN_SECONDS,
+    MCP_CONNECT_TIMEOUT_SECONDS,
+    MCP_POOL_IDLE_TTL_SECONDS,
+    MCP_POOL_PING_INTERVAL_SECONDS,
+)
+from core.logging import log
+
+
+class MCPSessionError(Exception):
+    """A pooled MCP session could not be opened."""
+
+
+# Errors meaning the session itself is broken rather than the request
+_SESSION_ERRORS = (
+    McpError,
+    ConnectionError,
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+)
+
+
+def is_session_error(error: BaseException) -> bool:
+    """True if ``error`` means the session should not be used again."""
+    return isinstance(error, _SESSION_ERRORS)
+
+
+def pool_key(url: str, auth_method: str, auth_secret: Optional[str], jwt_secret: Optional[str]) -> Tuple[str, str]:
+    """(url, auth identity); secrets are hashed, and the identity is the secret
+    rather than the minted header so JWT re-minting maps to the same key."""
+    identity = f"{auth_method}|{auth_secret or ''}|{jwt_secret or ''}"
+    return url, hashlib.sha256(identity.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class PooledSession:
+    key: Tuple[str, str]
+    name: str
+    expires_at: Optional[float] = None
+    session: Optional[ClientSession] = None
+    refs: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    retired: bool = False
+    closed: bool = False
+    error: Optional[BaseException] = None
+    # Listed once per session: tools are bound to the session that listed them
+    tools: Optional[List[BaseTool]] = None
+    metadata: Optional[List[Dict[str, Any]]] = None
+    ready: asyncio.Event = field(default_factory=asyncio.Event)
+    stop: asyncio.Event = field(default_factory=asyncio.Event)
+    task: Optional[asyncio.Task] = None
+
+    def usable(self, now: float) -> bool:
+        if self.closed or self.retired:
+            return False
+        return self.expires_at is None or now < self.expires_at - MCP_AUTH_REFRESH_MARGIN_SECONDS
+
+
+class MCPSessionPool:
+    """Refcounted, health-checked pool of MCP sessions."""
+
+    def __init__(
+        self,
+        idle_ttl_seconds: float = MCP_POOL_IDLE_TTL_SECONDS,
+        ping_interval_seconds: float = MCP_POOL_PING_INTERVAL_SECONDS,
+        connect_timeout_seconds: float = MCP_CONNECT_TIMEOUT_SECONDS,
+    ):
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.ping_interval_seconds = ping_interval_seconds
+        self.connect_timeout_seconds = connect_timeout_seconds
+        self._entries: Dict[Tuple[str, str], PooledSession] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self.opened = 0
+        self.reused = 0
+        self.evicted = 0
+
+    async def acquire(
+        self,
+        key: Tuple[str, str],
+        connection_factory: Callable[[], dict],
+        name: str = "",
+        expires_in: Optional[float] = None,
+    ) -> PooledSession:
+        """Lease a warm session for ``key``, opening one if needed.
+
+        ``connection_factory`` builds the connection config (fresh auth
+        headers) only when a session has to be opened; ``expires_in`` is the
+        lifetime of those credentials.
+        """
+        now = time.monotonic()
+        self._evict_idle(now)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.usable(now) and await self._healthy(entry, now):
+                self.reused += 1
+            else:
+                if entry is not None:
+                    self._retire(entry)
+                entry = await self._open(key, connection_factory(), name, expires_in)
+            entry.refs += 1
+            entry.last_used = time.monotonic()
+            return entry
+
+    def release(self, entry: PooledSession) -> None:
+        entry.refs = max(0, entry.refs - 1)
+        entry.last_used = time.monotonic()
+        if entry.retired and entry.refs == 0:
+            entry.stop.set()
+
+    def invalidate(self, entry: PooledSession) -> None:
+        """Stop handing out a session that failed; it closes once unleased."""
+        if not entry.retired:
+            log.warning("mcp_session_invalidated", mcp=entry.name, refs=entry.refs)
+        self._retire(entry)
+
+    def invalidate_key(self, key: Tuple[str, str]) -> None:
+        """Invalidate the session currently pooled for ``key``, if any."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.invalidate(entry)
+
+    def drop_listings(self, key: Tuple[str, str]) -> None:
+        """Forget a session's tool listings after the server's tools changed."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.tools = None
+            entry.metadata = None
+
+    async def _healthy(self, entry: PooledSession, now: float) -> bool:
+        if entry.refs > 0 or now - entry.last_used < self.ping_interval_seconds:
+            return True
+        try:
+            await asyncio.wait_for(entry.session.send_ping(), timeout=self.connect_timeout_seconds)
+            return True
+        except Exception as e:
+            log.warning("mcp_session_ping_failed", mcp=entry.name, error=str(e) or type(e).__name__)
+            return False
+
+    async def _open(
+        self,
+        key: Tuple[str, str],
+        connection: dict,
+        name: str,
+        expires_in: Optional[float],
+    ) -> PooledSession:
+        entry = PooledSession(
+            key=key,
+            name=name or key[0],
+            expires_at=time.monotonic() + expires_in if expires_in else None,
+        )
+        entry.task = asyncio.create_task(self._own(entry, connection), name=f"mcp-session:{entry.name}")
+        try:
+            await asyncio.wait_for(entry.ready.wait(), timeout=self.connect_timeout_seconds)
+        except asyncio.TimeoutError:
+            entry.task.cancel()
+            raise MCPSessionError(f"MCP server '{entry.name}' did not initialize in time")
+        except asyncio.CancelledError:
+            # Nobody will lease this session; don't leave its owner running
+            entry.task.cancel()
+            raise
+        if entry.error is not None or entry.session is None:
+            raise MCPSessionError(f"MCP server '{entry.name}' failed to connect: {entry.error}")
+        self._entries[key] = entry
+        self.opened += 1
+        log.info("mcp_session_opened", mcp=entry.name, pool_size=len(self._entries))
+        return entry
+
+    async def _own(self, entry: PooledSession, connection: dict) -> None:
+        """Owner task: enter, initialize, hold and exit the session."""
+        try:
+            async with create_session(connection) as session:
+                await session.initialize()
+                entry.session = session
+                entry.ready.set()
+                await entry.stop.wait()
+        except Exception as e:
+            entry.error = e
+            log.warning("mcp_session_failed", mcp=entry.name, error=str(e) or type(e).__name__)
+        finally:
+            entry.closed = True
+            entry.ready.set()
+            if self._entries.get(entry.key) is entry:
+                del self._entries[entry.key]
+
+    def _retire(self, entry: PooledSession) -> None:
+        entry.retired = True
+        if self._entries.get(entry.key) is entry:
+            del self._entries[entry.key]
+        if entry.refs == 0:
+            entry.stop.set()
+
+    def _evict_idle(self, now: float) -> None:
+        expired = [
+            entry for entry in self._entries.values()
+            if entry.refs == 0 and now - entry.last_used > self.idle_ttl_seconds
+        ]
+        for entry in expired:
+            self._retire(entry)
+        if expired:
+            self.evicted += len(expired)
+            log.info("mcp_pool_evicted", count=len(expired), remaining=len(self._entries))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self._entries),
+            "leased": sum(1 for entry in self._entries.values() if entry.refs),
+            "opened": self.opened,
+            "reused": self.reused,
+            "evicted": self.evicted,
+        }
+
+    async def close(self) -> None:
+        """Close every session on worker shutdown."""
+        entries = list(self._entries.values())
+        for entry in entries:
+            entry.retired = True
+            entry.stop.set()
+        self._entries.clear()
+        tasks = [entry.task for entry in entries if entry.task]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Singleton instance
+mcp_session_pool = MCPSessionPool()
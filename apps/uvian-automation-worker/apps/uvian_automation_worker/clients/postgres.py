@@ -0,0 +1,69 @@
+import asyncio
+import json
+from typing import Optional
+
+from core.config import (
+    DATABASE_URL,
+    DATABASE_POOL_MIN_SIZE,
+    DATABASE_POOL_MAX_SIZE,
+    DATABASE_STATEMENT_CACHE_SIZE,
+)
+from core.logging import log
+
+try:
+    import asyncpg
+except ImportError:  # pragma: no cover - only needed with CHECKPOINT_BACKEND=postgres
+    asyncpg = None
+
+
+class PostgresClient:
+    """Direct asyncpg connection pool for hot-path binary I/O.
+
+    PostgREST sends everything as JSON, which turns ``bytea`` into hex text.
+    Paths that move large binary payloads (checkpoints) use this pool
+    instead: asyncpg speaks the binary protocol and caches prepared
+    statements per connection.
+    """
+
+    def __init__(self, dsn: Optional[str] = DATABASE_URL):
+        self.dsn = dsn
+        self._pool = None
+        # Concurrent first callers must not each create a pool
+        self._pool_lock = asyncio.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.dsn)
+
+    async def _init_connection(self, conn) -> None:
+        await conn.set_type_codec(
+            "jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog"
+        )
+
+    async def pool(self):
+        """Shared pool, created lazily on the running loop."""
+        if self._pool is not None:
+            return self._pool
+        async with self._pool_lock:
+            if self._pool is None:
+                if asyncpg is None:
+                    raise RuntimeError("asyncpg is required for direct Postgres access")
+                if not self.dsn:
+                    raise RuntimeError("DATABASE_URL must be set for direct Postgres access")
+                self._pool = await asyncpg.create_pool(
+                    self.dsn,
+                    min_size=DATABASE_POOL_MIN_SIZE,
+                    max_size=DATABASE_POOL_MAX_SIZE,
+                    statement_cache_size=DATABASE_STATEMENT_CACHE_SIZE,
+                    init=self._init_connection,
+                )
+                log.info("postgres_pool_created", max_size=DATABASE_POOL_MAX_SIZE)
+        return self._pool
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+postgres_client = PostgresClient()
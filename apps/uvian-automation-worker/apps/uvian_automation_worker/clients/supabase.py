@@ -1,30 +1,101 @@
+import asyncio
 import os
 from typing import Optional, Dict, Any
 
-from supabase import create_client
+import httpx
+from postgrest import AsyncPostgrestClient
+from core.config import (
+    SUPABASE_MAX_CONNECTIONS,
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+    SUPABASE_TIMEOUT_SECONDS,
+)
 from core.logging import log
 
 
 class SupabaseClient:
-    """Base Supabase client for database operations."""
-    
+    """Base Supabase client for database operations.
+
+    Talks to PostgREST through a single pooled ``httpx.AsyncClient`` so that
+    repository calls never block the event loop. The pool is bounded by
+    SUPABASE_MAX_CONNECTIONS; callers beyond that wait for a free connection
+    instead of opening new sockets.
+    """
+
     def __init__(self):
         supabase_url = os.getenv("SUPABASE_URL")
         supabase_key = os.getenv("SUPABASE_SECRET_KEY")
-        
+
         if not supabase_url or not supabase_key:
             raise ValueError("SUPABASE_URL and SUPABASE_SECRET_KEY must be set")
-            
-        self.client = create_client(supabase_url, supabase_key)
+
+        self.rest_url = f"{supabase_url.rstrip('/')}/rest/v1"
+        self._headers = {
+            "apiKey": supabase_key,
+            "Authorization": f"Bearer {supabase_key}",
+        }
+        self._http: Optional[httpx.AsyncClient] = None
+        self._schemas: Dict[str, AsyncPostgrestClient] = {}
         log.info("supabase_client_initialized")
-    
-    def health_check(self) -> bool:
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Shared HTTP connection pool, created lazily on the running loop."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                headers=self._headers,
+                timeout=httpx.Timeout(SUPABASE_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=SUPABASE_MAX_CONNECTIONS,
+                    max_keepalive_connections=SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+                follow_redirects=True,
+            )
+            self._schemas.clear()
+        return self._http
+
+    def schema(self, schema: str) -> AsyncPostgrestClient:
+        """Get a PostgREST client bound to ``schema`` that shares the pool.
+
+        ``AsyncPostgrestClient.schema()`` opens a brand-new HTTP session on
+        every call, so clients are built once per schema and cached here.
+        """
+        http = self.http
+        client = self._schemas.get(schema)
+        if client is None:
+            client = AsyncPostgrestClient(
+                self.rest_url,
+                schema=schema,
+                headers=self._headers,
+                http_client=http,
+            )
+            self._schemas[schema] = client
+        return client
+
+    async def execute(self, query: Any, timeout: Optional[float] = None) -> Any:
+        """Execute a PostgREST query with a per-call deadline.
+
+        Args:
+            query: Any awaitable request builder exposing ``execute()``.
+            timeout: Seconds before the call is abandoned. Defaults to
+                SUPABASE_TIMEOUT_SECONDS.
+        """
+        async with asyncio.timeout(timeout or SUPABASE_TIMEOUT_SECONDS):
+            return await query.execute()
+
+    async def health_check(self) -> bool:
         """Verify the connection to Supabase."""
         try:
-            result = self.client.schema('core_automation').table('jobs').select('id').limit(1).execute()
+            await self.execute(self.schema('core_automation').table('jobs').select('id').limit(1))
             return True
         except Exception as e:
             log.error("supabase_health_check_failed", error=str(e))
             return False
 
+    async def close(self) -> None:
+        """Close the shared connection pool."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        self._schemas.clear()
+
 supabase_client = SupabaseClient()
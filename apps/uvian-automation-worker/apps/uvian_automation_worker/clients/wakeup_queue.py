@@ -0,0 +1,49 @@
+from typing import Optional
+
+from bullmq import Queue
+
+from core.config import QUEUE_NAME, REDIS_HOST, REDIS_PASSWORD, REDIS_PORT
+from core.logging import log
+
+
+class WakeupQueue:
+    """Puts thread-wakeup jobs back on the worker queue.
+
+    Used for wakeups left pending when a run failed, and for the check that
+    runs a coalesced wakeup's events if the lease holder dies before it gets
+    to them (``check``, see ``ThreadLease.take_orphaned``). The job row is
+    reused.
+    """
+
+    def __init__(self, name: str = QUEUE_NAME):
+        self.name = name
+        self._queue: Optional[Queue] = None
+
+    @property
+    def queue(self) -> Queue:
+        if self._queue is None:
+            self._queue = Queue(self.name, {
+                "connection": {
+                    "host": REDIS_HOST,
+                    "port": REDIS_PORT,
+                    "password": REDIS_PASSWORD,
+                    "db": 0,
+                },
+                "prefix": "bull",
+            })
+        return self._queue
+
+    async def enqueue(self, job_id: str, delay_seconds: float, check: Optional[str] = None) -> None:
+        data = {"jobId": job_id}
+        if check:
+            data["leaseCheck"] = check
+        await self.queue.add("thread-wakeup", data, {"delay": int(delay_seconds * 1000)})
+        log.info("thread_wakeup_requeued", job_id=job_id, delay_seconds=round(delay_seconds, 2), check=bool(check))
+
+    async def close(self) -> None:
+        if self._queue is not None:
+            await self._queue.close()
+            self._queue = None
+
+
+wakeup_queue = WakeupQueue()
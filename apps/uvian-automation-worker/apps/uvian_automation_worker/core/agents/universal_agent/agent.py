@@ -1,33 +1,65 @@
+import hashlib
+import json
+from collections import OrderedDict
 from typing import List, Any, Optional, Dict
 from langgraph.types import Command, RetryPolicy
+from langgraph.graph.state import CompiledStateGraph
 from core.agents.utils.state import MessagesState
 from langgraph.graph import StateGraph, START, END
 from core.agents.utils.tools.base_tools import tools as base_tools
-from core.agents.utils.models import create_llm
 from core.agents.utils.nodes.model_node import create_model_node
-from core.agents.utils.nodes.sync_node import create_sync_node
+from core.agents.utils.nodes.sync_node import create_sync_node, route_after_sync
 from core.agents.utils.nodes.cleanup_node import create_cleanup_node
-from core.agents.utils.tokens import check_context
 from core.agents.utils.nodes.compaction_node import create_compaction_node
-from core.agents.utils.memory.base_memory import PostgresAsyncCheckpointer
 from core.agents.utils.nodes.tool_node import ToolNode, tools_condition
 from core.agents.utils.tool_approval import create_tool_approval_wrapper
-from clients.mcp import MCPRegistry
 from clients.config import create_tool_approval_ticket
+from core.config import AGENT_GRAPH_CACHE_SIZE
+from core.logging import log
+
+_graph_cache: "OrderedDict[str, CompiledStateGraph]" = OrderedDict()
+
+
+def graph_fingerprint(llm_config: Optional[Dict[str, Any]], hooks: Optional[List[Dict[str, Any]]]) -> str:
+    """Fingerprint the inputs that shape the compiled graph.
+
+    The API key is left out: credentials only affect the model, which is
+    injected per job through ``config["configurable"]["model"]``.
+    """
+    llm = {k: v for k, v in (llm_config or {}).items() if k != "api_key"}
+    payload = json.dumps({"llm": llm, "hooks": hooks or []}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
 
 async def build_agent(
     llm_config,
-    mcp_registry=None,
-    checkpointer=None,
     hooks=None,
-):
+) -> CompiledStateGraph:
+    """Get the compiled agent graph, building it on first use.
+
+    The graph holds no per-job state. Callers supply the job's dependencies
+    through ``config["configurable"]``:
+
+    - ``model``: chat model used by the model and compaction nodes
+    - ``mcp_registry``: the job's MCPRegistry
+    - ``CONFIG_KEY_CHECKPOINTER``: the job's checkpointer
+    """
+    key = graph_fingerprint(llm_config, hooks)
+    graph = _graph_cache.get(key)
+    if graph is not None:
+        _graph_cache.move_to_end(key)
+        return graph
+
+    graph = await _compile_agent(hooks)
+    _graph_cache[key] = graph
+    while len(_graph_cache) > AGENT_GRAPH_CACHE_SIZE:
+        _graph_cache.popitem(last=False)
+    log.info("agent_graph_compiled", fingerprint=key[:12], cache_size=len(_graph_cache))
+    return graph
+
+
+async def _compile_agent(hooks=None) -> CompiledStateGraph:
     default_tools = base_tools.copy()
-    llm_cfg = llm_config or {}
-    llm = create_llm(llm_cfg)
-
-    if checkpointer is None:
-        checkpointer = PostgresAsyncCheckpointer()
     agent_builder = StateGraph(MessagesState)
 
     llm_retry_policy = RetryPolicy(
@@ -62,8 +94,8 @@ async def build_agent(
         jitter=True,
     )
 
-    model_node = create_model_node(llm, default_tools, mcp_registry=mcp_registry)
-    compaction_node = create_compaction_node(llm)
+    model_node = create_model_node(default_tools)
+    compaction_node = create_compaction_node()
 
     tool_approval_wrapper = None
     if hooks:
@@ -72,11 +104,10 @@ async def build_agent(
     tool_node = ToolNode(
         default_tools,
         handle_tool_errors=True,
-        mcp_registry=mcp_registry,
         awrap_tool_call=tool_approval_wrapper,
     )
-    sync = create_sync_node(mcp_registry)
-    cleanup = create_cleanup_node(mcp_registry)
+    sync = create_sync_node()
+    cleanup = create_cleanup_node()
 
     def approval_routing_node(state):
         pending_tool_approval = state.get("pending_tool_approval")
@@ -94,10 +125,11 @@ async def build_agent(
     agent_builder.add_edge(START, "sync_node")
     agent_builder.add_conditional_edges(
         "sync_node",
-        check_context,
+        route_after_sync,
         {
             "compaction_node": "compaction_node",
             "model_node": "model_node",
+            "cleanup_node": "cleanup_node",
         },
     )
 
@@ -114,4 +146,6 @@ async def build_agent(
     agent_builder.add_edge("tool_node", "approval_routing_node")
     agent_builder.add_edge("approval_routing_node", END)
 
-    return agent_builder.compile(checkpointer=checkpointer)
+    # Compiled without a checkpointer; each job passes its own through
+    # config["configurable"][CONFIG_KEY_CHECKPOINTER].
+    return agent_builder.compile()
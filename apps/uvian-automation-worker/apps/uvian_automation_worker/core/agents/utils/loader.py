@@ -6,6 +6,7 @@ Provides unified functions for:
 
 Used by both the executor (initial event processing) and the subscription node (inbox processing).
 """
+import asyncio
 from typing import List, Dict, Any, Tuple, Optional
 from langchain_core.messages import HumanMessage, ToolMessage
 from langchain_core.tools import BaseTool
@@ -109,24 +110,25 @@ async def load_mcps(
     if not mcp_configs:
         return [], []
     
-    info_messages = []
-    loaded_tools = []
-    
-    for cfg in mcp_configs:
+    async def load(cfg):
         mcp_id = cfg.get("id", cfg.get("mcp_id", "unknown"))
-        
         try:
             tools = await persistent_client.load_tools(mcp_id)
-            loaded_tools.extend(tools)
-            info_messages.append(ToolMessage(
+            return tools, ToolMessage(
                 content=f"Auto-loaded MCP server. This server provides tools for handling events.",
                 tool_call_id=f"preload-mcp-{mcp_id}",
-            ))
+            )
         except Exception as e:
-            info_messages.append(ToolMessage(
+            return [], ToolMessage(
                 content=f"Failed to load MCP server: {mcp_id}. Error: {str(e)}",
                 tool_call_id=f"preload-mcp-{mcp_id}",
-            ))
+            )
+
+    info_messages = []
+    loaded_tools = []
+    for tools, message in await asyncio.gather(*(load(cfg) for cfg in mcp_configs)):
+        loaded_tools.extend(tools)
+        info_messages.append(message)
     
     return info_messages, loaded_tools
 
@@ -1,5 +1,9 @@
+import asyncio
 import json
-from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
 from langchain_core.runnables import RunnableConfig
 from langgraph.checkpoint.base import (
     BaseCheckpointSaver,
@@ -7,11 +11,69 @@ from langgraph.checkpoint.base import (
     CheckpointMetadata,
     CheckpointTuple,
     ChannelVersions,
+    WRITES_IDX_MAP,
+    copy_checkpoint,
+)
+from repositories.checkpoints import checkpoint_repository as postgrest_checkpoint_repository
+from repositories.checkpoints_pg import postgres_checkpoint_repository
+from core.agents.utils.memory.checkpoint_cache import CachedCheckpoint, CheckpointCache, checkpoint_cache
+from core.agents.utils.memory.codec import CheckpointCodec
+from core.agents.utils.memory.serde import CheckpointSerializer
+from core.config import (
+    CHECKPOINT_BACKEND,
+    CHECKPOINT_DURABILITY,
+    CHECKPOINT_FULL_SNAPSHOT_EVERY,
+    CHECKPOINT_SERDE_OFFLOAD_BYTES,
+    CHECKPOINT_SERDE_WORKERS,
+    CHECKPOINT_WRITE_QUEUE_SIZE,
 )
-from repositories.checkpoints import checkpoint_repository
-from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
 from core.logging import log
 
+checkpoint_repository = (
+    postgres_checkpoint_repository
+    if CHECKPOINT_BACKEND == "postgres"
+    else postgrest_checkpoint_repository
+)
+
+# Channels whose reducer only ever appends (operator.add in MessagesState).
+# Their blobs hold just the newly appended tail on top of a full snapshot.
+APPEND_CHANNELS = frozenset({"messages", "loaded_skills", "loaded_mcps"})
+
+
+DURABILITY_MODES = ("sync", "async", "turn")
+
+# Serialization and (de)compression of large values runs here instead of on
+# the event loop shared by every job. zstd releases the GIL; a process pool
+# would have to pickle the very message objects being encoded.
+_serde_executor = ThreadPoolExecutor(
+    max_workers=CHECKPOINT_SERDE_WORKERS, thread_name_prefix="checkpoint-serde"
+)
+
+
+async def run_off_loop(fn: Callable[..., Any], *args: Any) -> Any:
+    return await asyncio.get_running_loop().run_in_executor(_serde_executor, fn, *args)
+
+
+class CheckpointWriteError(Exception):
+    """A checkpoint that must be stored before the graph moves on was not."""
+
+
+class CheckpointReadError(Exception):
+    """A stored checkpoint cannot be restored in full (a channel blob is missing)."""
+
+
+# Checkpointers with possibly unflushed writes, flushed on shutdown
+_live_checkpointers: "weakref.WeakSet[PostgresAsyncCheckpointer]" = weakref.WeakSet()
+
+
+async def flush_checkpointers() -> None:
+    """Flush every live checkpointer; called on worker shutdown."""
+    for checkpointer in list(_live_checkpointers):
+        try:
+            await checkpointer.aclose()
+        except Exception as e:
+            log.error("checkpoint_flush_failed", error=str(e))
+
 
 def decode_supabase_bytea(value: Any) -> bytes:
     """Converts Supabase PostgREST bytea value back to bytes."""
@@ -24,24 +86,106 @@ def decode_supabase_bytea(value: Any) -> bytes:
     return b""
 
 
+@dataclass
+class _ChannelTail:
+    """Latest blob written or restored for an append-only channel."""
+
+    checkpoint_id: str
+    chain: str
+    length: int
+    # the list value stored, to detect in-place rewrites of earlier items
+    items: List[Any]
+    depth: int
+
+
 class PostgresAsyncCheckpointer(BaseCheckpointSaver):
     """
     A LangGraph Checkpointer implementation for PostgreSQL (Supabase) 
     that respects the BaseCheckpointSaver contract.
+
+    Checkpoints are stored incrementally: only channels listed in
+    ``new_versions`` get a new blob, and append-only channels store just the
+    items appended since the previous blob. Every ``full_snapshot_every``
+    appends a full snapshot starts a new chain, which bounds restore work.
+    Each checkpoint row records, per channel, which blob (and chain) holds
+    its value, so a restore is one query for the row and one for the blobs.
+
+    Payloads are framed (and zstd-compressed above a size threshold) by
+    CheckpointCodec before they reach the repository.
+
+    ``durability`` trades crash safety for turn latency:
+    - "sync": every checkpoint is stored before the next step starts.
+    - "async": checkpoints are queued and stored in order by a background
+      task; aput only waits when ``write_queue_size`` writes are in flight.
+    - "turn": only the checkpoint before ``turn_start_node`` runs, and the
+      final one, are stored; a crash loses at most the current turn.
+    Call ``aflush`` (or ``aclose``) before the job completes.
+
+    The latest checkpoint of each thread is kept in ``cache`` (see
+    checkpoint_cache) when the run carries a ``lease_fence``, so a hot
+    thread's next wakeup restores without touching the database.
     """
-    def __init__(self):
+    def __init__(
+        self,
+        full_snapshot_every: int = CHECKPOINT_FULL_SNAPSHOT_EVERY,
+        repository=None,
+        codec: Optional[CheckpointCodec] = None,
+        durability: str = CHECKPOINT_DURABILITY,
+        turn_start_node: str = "sync_node",
+        write_queue_size: int = CHECKPOINT_WRITE_QUEUE_SIZE,
+        cache: Optional[CheckpointCache] = checkpoint_cache,
+        offload_bytes: int = CHECKPOINT_SERDE_OFFLOAD_BYTES,
+    ):
         super().__init__()
         # 1. Serializer: Converts LangChain objects (Messages, etc.) -> JSON Compatible Bytes
-        self.serde = JsonPlusSerializer()
+        self.serde = CheckpointSerializer()
+        self.repository = repository or checkpoint_repository
+        self.codec = codec or CheckpointCodec()
+        self.offload_bytes = offload_bytes
+        self.full_snapshot_every = full_snapshot_every
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown checkpoint durability {durability!r}")
+        self.durability = durability
+        self.turn_start_node = turn_start_node
+        # thread_id -> id of the newest checkpoint written (or queued)
+        self._heads: Dict[str, str] = {}
+        # thread_id -> bumped when a write fails, invalidating queued writes
+        self._generations: Dict[str, int] = {}
+        # "turn": thread_id -> (checkpoint, metadata, accumulated new_versions)
+        self._deferred: Dict[str, Tuple[Checkpoint, CheckpointMetadata, ChannelVersions]] = {}
+        # "async": ordered write-behind queue drained by a single task
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=write_queue_size)
+        self._writer: Optional[asyncio.Task] = None
+        self.cache = cache
+        # thread_id -> lease fence of the execution using this checkpointer
+        self._fences: Dict[str, int] = {}
+        # thread_id -> {channel: uncompressed serialized bytes of its current value}
+        self._sizes: Dict[str, Dict[str, int]] = {}
+        _live_checkpointers.add(self)
+        # thread_id -> {channel: [blob checkpoint_id, chain]} of the latest checkpoint
+        self._refs: Dict[str, Dict[str, List[str]]] = {}
+        # (thread_id, channel) -> tail of the latest append-only blob
+        self._tails: Dict[Tuple[str, str], _ChannelTail] = {}
 
 
     async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
         thread_id = config["configurable"]["thread_id"]
         checkpoint_id = config["configurable"].get("checkpoint_id")
+        fence = config["configurable"].get("lease_fence")
+
+        # 1. Flush writes still held back, then try the hot cache
+        await self.aflush()
+        if fence is not None:
+            self._fences[thread_id] = fence
+        if self.cache is not None and fence is not None:
+            cached = await self._get_cached(thread_id, fence)
+            if cached is not None and checkpoint_id in (None, cached.checkpoint_id):
+                return self._restore_cached(cached)
+            self.cache.record_miss()
 
-        # 1. Fetch from DB
+        # 2. Fetch from DB
         try:
-            row = await checkpoint_repository.get_checkpoint(thread_id, checkpoint_id)
+            row = await self.repository.get_checkpoint(thread_id, checkpoint_id)
         except Exception as e:
             log.error("checkpointer_get_tuple_failed", thread_id=thread_id, checkpoint_id=checkpoint_id, error=str(e))
             return None
@@ -49,21 +193,59 @@ class PostgresAsyncCheckpointer(BaseCheckpointSaver):
         if not row:
             return None
 
-        # 2. Decode the hex string back into bytes
-        checkpoint_bytes = decode_supabase_bytea(row["checkpoint_data"])
-        metadata_bytes = decode_supabase_bytea(row["metadata"])
+        # The graph resumes from this checkpoint, so later writes build on it
+        checkpoint_tuple = await self._load_tuple(thread_id, row, track=True)
+        entry = self._cache_entry(
+            thread_id, checkpoint_tuple.checkpoint, checkpoint_tuple.metadata, row.get("parent_id")
+        )
+        if entry is not None and not checkpoint_tuple.pending_writes:
+            self.cache.put(entry)
+        return checkpoint_tuple
+
+    async def _load_tuple(self, thread_id: str, row: Dict[str, Any], track: bool = False) -> CheckpointTuple:
+        # 1. Decode the stored payloads back into serialized bytes
+        checkpoint_bytes = self._decode(row["checkpoint_data"])
+        metadata_bytes = self._decode(row["metadata"])
 
-        # 3. Deserialize using loads_typed
+        # 2. Deserialize using loads_typed
         checkpoint = self.serde.loads_typed(("msgpack", checkpoint_bytes))
         metadata = self.serde.loads_typed(("msgpack", metadata_bytes))
-        
-        # 4. Determine Parent Config
+
+        # 3. Rebuild channel values (legacy rows without blob_refs hold them
+        #    inline) and fetch writes left by an unfinished super-step
+        refs = row.get("blob_refs")
+        writes_query = self.repository.get_writes(thread_id, row["checkpoint_id"])
+        if refs is not None:
+            channel_values, writes = await asyncio.gather(
+                self._load_channel_values(thread_id, refs, track), writes_query
+            )
+            checkpoint["channel_values"] = channel_values
+            if track:
+                self._refs[thread_id] = dict(refs)
+        else:
+            writes = await writes_query
+        if track:
+            self._heads[thread_id] = row["checkpoint_id"]
+        pending_writes = [
+            (w["task_id"], w["channel"], await self._load_blob(w)) for w in writes
+        ]
+
+        return self._make_tuple(thread_id, checkpoint, metadata, row.get("parent_id"), pending_writes)
+
+    @staticmethod
+    def _make_tuple(
+        thread_id: str,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        parent_id: Optional[str],
+        pending_writes: Optional[List[Tuple[str, str, Any]]] = None,
+    ) -> CheckpointTuple:
         parent_config = None
-        if row.get("parent_id"):
+        if parent_id:
             parent_config = {
                 "configurable": {
                     "thread_id": thread_id,
-                    "checkpoint_id": row["parent_id"],
+                    "checkpoint_id": parent_id,
                 }
             }
 
@@ -71,13 +253,207 @@ class PostgresAsyncCheckpointer(BaseCheckpointSaver):
             config={
                 "configurable": {
                     "thread_id": thread_id,
-                    "checkpoint_id": row["checkpoint_id"],
+                    "checkpoint_id": checkpoint["id"],
                 }
             },
             checkpoint=checkpoint,
             metadata=metadata,
             parent_config=parent_config,
+            pending_writes=pending_writes or [],
+        )
+
+    async def _get_cached(self, thread_id: str, fence: int) -> Optional[CachedCheckpoint]:
+        cached = self.cache.get(thread_id, fence)
+        if cached is not None:
+            return cached
+        payload = await self.cache.get_remote(thread_id, fence)
+        if payload is None:
+            return None
+        try:
+            if len(payload) >= self.offload_bytes:
+                data = await run_off_loop(self._loads, "msgpack", payload)
+            else:
+                data = self._loads("msgpack", payload)
+            cached = CachedCheckpoint(**data)
+        except Exception as e:
+            log.warning("checkpoint_cache_decode_failed", thread_id=thread_id, error=str(e))
+            return None
+        if not self.cache._is_current(cached.fence, fence):
+            return None
+        self.cache.record_redis_hit()
+        self.cache.put(cached)
+        return cached
+
+    def _restore_cached(self, cached: CachedCheckpoint) -> CheckpointTuple:
+        """Resume from a cache entry as if it had been loaded from the DB."""
+        thread_id = cached.thread_id
+        checkpoint = copy_checkpoint(cached.checkpoint)
+        values = checkpoint["channel_values"]
+        self._refs[thread_id] = dict(cached.refs)
+        self._heads[thread_id] = cached.checkpoint_id
+        for channel, (blob_id, chain, length, depth) in cached.tails.items():
+            value = values.get(channel)
+            if isinstance(value, list) and len(value) == length:
+                self._tails[(thread_id, channel)] = _ChannelTail(
+                    checkpoint_id=blob_id,
+                    chain=chain,
+                    length=length,
+                    items=value,
+                    depth=depth,
+                )
+        log.debug("checkpoint_cache_hit", thread_id=thread_id, checkpoint_id=cached.checkpoint_id)
+        return self._make_tuple(thread_id, checkpoint, cached.metadata, cached.parent_id)
+
+    def _cache_entry(
+        self,
+        thread_id: str,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        parent_id: Optional[str],
+    ) -> Optional[CachedCheckpoint]:
+        """Snapshot the bookkeeping for the checkpoint just loaded or written."""
+        fence = self._fences.get(thread_id)
+        if self.cache is None or fence is None:
+            return None
+        tails = {
+            channel: [tail.checkpoint_id, tail.chain, tail.length, tail.depth]
+            for (tail_thread, channel), tail in self._tails.items()
+            if tail_thread == thread_id
+        }
+        sizes = self._sizes.get(thread_id, {})
+        return CachedCheckpoint(
+            thread_id=thread_id,
+            checkpoint_id=checkpoint["id"],
+            fence=fence,
+            checkpoint=checkpoint,
+            metadata=metadata,
+            parent_id=parent_id,
+            refs=dict(self._refs.get(thread_id, {})),
+            tails=tails,
+            size=sum(sizes.get(channel, 0) for channel in checkpoint["channel_values"]),
+        )
+
+    async def _load_channel_values(
+        self,
+        thread_id: str,
+        refs: Dict[str, List[str]],
+        track: bool,
+    ) -> Dict[str, Any]:
+        rows = await self.repository.get_blobs(
+            thread_id, sorted({chain for _, chain in refs.values()})
         )
+        blobs = {(r["channel"], r["checkpoint_id"]): r for r in rows}
+
+        values: Dict[str, Any] = {}
+        for channel, (blob_id, chain) in refs.items():
+            # Walk the chain back to its full snapshot
+            links = []
+            key = blob_id
+            while key:
+                blob = blobs.get((channel, key))
+                if blob is None:
+                    break
+                links.append(blob)
+                key = blob["base_checkpoint_id"] if blob["kind"] == "append" else None
+            if not links or links[-1]["kind"] != "full":
+                # Resuming without the channel would silently drop state
+                log.error("checkpoint_blob_missing", thread_id=thread_id, channel=channel, checkpoint_id=key)
+                raise CheckpointReadError(
+                    f"Checkpoint blob {channel}@{key or blob_id} of thread {thread_id} is missing"
+                )
+
+            value = await self._load_blob(links[-1])
+            if len(links) > 1:
+                value = list(value)
+                for blob in reversed(links[:-1]):
+                    value.extend(await self._load_blob(blob))
+            values[channel] = value
+            if track:
+                self._sizes.setdefault(thread_id, {})[channel] = sum(
+                    self.codec.decoded_size(decode_supabase_bytea(b["blob"])) for b in links
+                )
+
+            if track and channel in APPEND_CHANNELS and isinstance(value, list):
+                self._tails[(thread_id, channel)] = _ChannelTail(
+                    checkpoint_id=blob_id,
+                    chain=chain,
+                    length=len(value),
+                    items=value,
+                    depth=len(links) - 1,
+                )
+        return values
+
+    def _decode(self, value: Any) -> bytes:
+        return self.codec.decode(decode_supabase_bytea(value))
+
+    def _loads(self, type_: str, stored: bytes) -> Any:
+        return self.serde.loads_typed((type_, self.codec.decode(stored)))
+
+    def _dumps(self, value: Any) -> Tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(value)
+        return type_, self.codec.encode(data)
+
+    async def _load_blob(self, blob: Dict[str, Any]) -> Any:
+        stored = decode_supabase_bytea(blob["blob"])
+        if len(stored) >= self.offload_bytes:
+            return await run_off_loop(self._loads, blob["type"], stored)
+        return self._loads(blob["type"], stored)
+
+    async def _dump_value(self, value: Any, size_hint: int = 0) -> Tuple[str, bytes]:
+        """Serialize and frame a value, off the event loop when it is large."""
+        if size_hint >= self.offload_bytes:
+            return await run_off_loop(self._dumps, value)
+        return self._dumps(value)
+
+    async def _dump_channel(
+        self,
+        thread_id: str,
+        checkpoint_id: str,
+        channel: str,
+        value: Any,
+    ) -> Tuple[Dict[str, Any], Optional[_ChannelTail]]:
+        """Serialize one channel, as an append delta when possible."""
+        tail = self._tails.get((thread_id, channel)) if channel in APPEND_CHANNELS else None
+        if (
+            tail is not None
+            and isinstance(value, list)
+            and tail.depth < self.full_snapshot_every
+            and tail.length <= len(value)
+            # Reducers copy the list and keep existing items, so every stored
+            # item is still in place unless the list was rewritten (e.g. a
+            # message replaced by id, or removed with RemoveMessage)
+            and all(new is old for new, old in zip(value, tail.items))
+        ):
+            kind, payload, base = "append", value[tail.length:], tail.checkpoint_id
+            chain, depth = tail.chain, tail.depth + 1
+        else:
+            kind, payload, base, chain, depth = "full", value, None, f"{channel}:{checkpoint_id}", 0
+
+        # Append deltas are small; a full snapshot is about as large as the
+        # channel's current serialized size
+        size_hint = 0 if kind == "append" else self._sizes.get(thread_id, {}).get(channel, 0)
+        type_, data = await self._dump_value(payload, size_hint)
+        blob = {
+            "thread_id": thread_id,
+            "channel": channel,
+            "checkpoint_id": checkpoint_id,
+            "chain": chain,
+            "base_checkpoint_id": base,
+            "kind": kind,
+            "type": type_,
+            "blob": data,
+        }
+
+        new_tail = None
+        if channel in APPEND_CHANNELS and isinstance(value, list):
+            new_tail = _ChannelTail(
+                checkpoint_id=checkpoint_id,
+                chain=chain,
+                length=len(value),
+                items=value,
+                depth=depth,
+            )
+        return blob, new_tail
 
     async def aput(
         self,
@@ -87,34 +463,193 @@ class PostgresAsyncCheckpointer(BaseCheckpointSaver):
         new_versions: ChannelVersions,
     ) -> RunnableConfig:
         thread_id = config["configurable"]["thread_id"]
+        checkpoint_id = checkpoint["id"]
+        next_config = {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_id": checkpoint_id,
+            }
+        }
+
+        if self.durability == "turn":
+            # Hold the newest checkpoint (and every channel changed since the
+            # last stored one) until the graph reaches a turn boundary.
+            deferred = self._deferred.get(thread_id)
+            if deferred is not None:
+                new_versions = {**deferred[2], **new_versions}
+            self._deferred[thread_id] = (checkpoint, metadata, new_versions)
+            if not self._is_turn_boundary(checkpoint):
+                return next_config
+            del self._deferred[thread_id]
+
         parent_id = config["configurable"].get("checkpoint_id")
-        
-        # 1. Serialize using dumps_typed (returns type_, bytes)
-        type_, checkpoint_bytes = self.serde.dumps_typed(checkpoint)
-        _, metadata_bytes = self.serde.dumps_typed(metadata)
+        if self.durability == "turn":
+            # Skipped checkpoints are never stored; link to the last one that was
+            parent_id = self._heads.get(thread_id, parent_id)
+        row, blobs, entry = await self._prepare(thread_id, parent_id, checkpoint, metadata, new_versions)
 
-        # 2. Convert raw Python bytes to PostgREST hex string format
-        checkpoint_hex = f"\\x{checkpoint_bytes.hex()}"
-        metadata_hex = f"\\x{metadata_bytes.hex()}"
+        generation = self._generations.get(thread_id, 0)
+        # The next claim acknowledges every inbox row up to a new cursor, so
+        # the checkpoint carrying it is stored before the graph moves on,
+        # even in "async" mode; if it cannot be, the run fails and the
+        # claimed rows are redelivered.
+        carries_cursor = "inbox_cursor" in new_versions
+        if self.durability == "async" and not carries_cursor:
+            await self._enqueue(thread_id, lambda: self._persist(row, blobs, entry, generation))
+            return next_config
+        if self.durability == "async":
+            # Keep write order: everything queued before it goes first
+            await self.aflush()
+        if not await self._persist(row, blobs, entry, generation) and carries_cursor:
+            raise CheckpointWriteError(f"Checkpoint {checkpoint_id} carrying the inbox cursor was not stored")
+        return next_config
 
-        # 3. Save to Repo
-        try:
-            await checkpoint_repository.insert_checkpoint({
-                "thread_id": thread_id,
-                "checkpoint_id": checkpoint["id"],
-                "checkpoint_data": checkpoint_hex,  # Pass the hex string directly
-                "metadata": metadata_hex,           # Pass the hex string directly
-                "parent_id": parent_id
-            })
-        except Exception as e:
-            log.error("checkpointer_aput_failed", thread_id=thread_id, error=str(e))
+    def _is_turn_boundary(self, checkpoint: Checkpoint) -> bool:
+        """True when the next step starts a turn, or when nothing runs next."""
+        pending = [
+            c for c in checkpoint["channel_values"]
+            if c.startswith("branch:to:") or c == "__start__"
+        ]
+        return not pending or f"branch:to:{self.turn_start_node}" in pending
 
-        return {
-            "configurable": {
-                "thread_id": thread_id,
-                "checkpoint_id": checkpoint["id"],
-            }
+    async def _prepare(
+        self,
+        thread_id: str,
+        parent_id: Optional[str],
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]], Optional[CachedCheckpoint]]:
+        """Serialize a checkpoint row, the blobs of its changed channels and its cache entry.
+
+        Refs and tails advance immediately so the next checkpoint can build
+        on this one before it is stored; a failed write resets them.
+        """
+        checkpoint_id = checkpoint["id"]
+        values = checkpoint["channel_values"]
+
+        # Serialize only channels that changed. Channels we have no blob
+        # for (e.g. resuming a legacy checkpoint) are written in full once.
+        refs = {c: ref for c, ref in self._refs.get(thread_id, {}).items() if c in values}
+        changed = [c for c in values if c in new_versions or c not in refs]
+        blobs = []
+        sizes = self._sizes.setdefault(thread_id, {})
+        for channel in changed:
+            blob, tail = await self._dump_channel(thread_id, checkpoint_id, channel, values[channel])
+            blobs.append(blob)
+            refs[channel] = [checkpoint_id, blob["chain"]]
+            base_size = sizes.get(channel, 0) if blob["kind"] == "append" else 0
+            sizes[channel] = base_size + self.codec.decoded_size(blob["blob"])
+            if tail is not None:
+                self._tails[(thread_id, channel)] = tail
+        self._refs[thread_id] = refs
+        self._heads[thread_id] = checkpoint_id
+
+        skeleton = {**checkpoint, "channel_values": {}}
+        _, checkpoint_bytes = self.serde.dumps_typed(skeleton)
+        _, metadata_bytes = self.serde.dumps_typed(metadata)
+        row = {
+            "thread_id": thread_id,
+            "checkpoint_id": checkpoint_id,
+            "checkpoint_data": self.codec.encode(checkpoint_bytes),
+            "metadata": self.codec.encode(metadata_bytes),
+            "parent_id": parent_id,
+            "blob_refs": refs,
         }
+        return row, blobs, self._cache_entry(thread_id, checkpoint, metadata, parent_id)
+
+    async def _persist(
+        self,
+        row: Dict[str, Any],
+        blobs: List[Dict[str, Any]],
+        entry: Optional[CachedCheckpoint],
+        generation: int,
+    ) -> bool:
+        """Store a prepared checkpoint; returns whether it was stored."""
+        thread_id = row["thread_id"]
+        if generation != self._generations.get(thread_id, 0):
+            # Built on a checkpoint whose write failed; its blob refs may
+            # point at blobs that were never stored.
+            log.warning("checkpoint_write_skipped", thread_id=thread_id, checkpoint_id=row["checkpoint_id"])
+            return False
+        if await self.repository.put_checkpoint(row, blobs):
+            # Write-through so the next wakeup restores without a query
+            if entry is not None:
+                self.cache.put(entry)
+            elif self.cache is not None:
+                # Written without a lease fence: the next fenced run would
+                # otherwise trust an older cached checkpoint of the thread
+                self.cache.invalidate(thread_id)
+                await self.cache.invalidate_remote(thread_id)
+            log.debug(
+                "checkpoint_written",
+                thread_id=thread_id,
+                checkpoint_id=row["checkpoint_id"],
+                durability=self.durability,
+                channels_written=len(blobs),
+                append_blobs=sum(1 for b in blobs if b["kind"] == "append"),
+                bytes_written=len(row["checkpoint_data"]) + sum(len(b["blob"]) for b in blobs),
+            )
+            return True
+        log.error("checkpointer_aput_failed", thread_id=thread_id, checkpoint_id=row["checkpoint_id"])
+        # Start over from full snapshots so the next write is self-contained
+        self._generations[thread_id] = generation + 1
+        if self.cache is not None:
+            self.cache.invalidate(thread_id)
+        self._refs.pop(thread_id, None)
+        self._sizes.pop(thread_id, None)
+        for key in [k for k in self._tails if k[0] == thread_id]:
+            del self._tails[key]
+        return False
+
+    async def _enqueue(self, thread_id: str, write: Callable[[], Awaitable[None]]) -> None:
+        """Queue a write behind earlier ones; blocks while the queue is full."""
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._drain())
+        await self._queue.put(write)
+
+    async def _drain(self) -> None:
+        while True:
+            write = await self._queue.get()
+            try:
+                await write()
+            except Exception as e:
+                log.error("checkpoint_write_behind_failed", error=str(e))
+            finally:
+                self._queue.task_done()
+
+    async def aflush(self) -> None:
+        """Store everything held back by the "async" and "turn" modes."""
+        for thread_id in list(self._deferred):
+            checkpoint, metadata, new_versions = self._deferred.pop(thread_id)
+            row, blobs, entry = await self._prepare(
+                thread_id, self._heads.get(thread_id), checkpoint, metadata, new_versions
+            )
+            await self._persist(row, blobs, entry, self._generations.get(thread_id, 0))
+        if self._writer is not None:
+            await self._queue.join()
+
+    @property
+    def has_deferred(self) -> bool:
+        return bool(self._deferred)
+
+    def discard_deferred(self) -> None:
+        self._deferred.clear()
+
+    async def aclose(self) -> None:
+        """Flush pending writes, publish to the Redis cache tier and stop the write-behind task."""
+        await self.aflush()
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+        if self.cache is not None and self.cache.use_redis:
+            for thread_id, fence in self._fences.items():
+                entry = self.cache.get(thread_id, fence)
+                if entry is None or entry.checkpoint_id != self._heads.get(thread_id):
+                    continue
+                type_, data = await self._dump_value(vars(entry), entry.size)
+                if type_ == "msgpack":
+                    await self.cache.put_remote(thread_id, data)
 
     async def alist(
         self,
@@ -127,9 +662,10 @@ class PostgresAsyncCheckpointer(BaseCheckpointSaver):
         
         thread_id = config["configurable"]["thread_id"]
         before_id = before["configurable"].get("checkpoint_id") if before else None
+        await self.aflush()
 
         try:
-            rows = await checkpoint_repository.list_checkpoints(
+            rows = await self.repository.list_checkpoints(
                 thread_id, 
                 limit=limit or 10,
                 before_checkpoint_id=before_id 
@@ -139,36 +675,59 @@ class PostgresAsyncCheckpointer(BaseCheckpointSaver):
             rows = []
 
         for row in rows:
-            # Decode the hex strings
-            checkpoint_bytes = decode_supabase_bytea(row["checkpoint_data"])
-            metadata_bytes = decode_supabase_bytea(row["metadata"])
-            
-            yield CheckpointTuple(
-                config={
-                    "configurable": {
-                        "thread_id": thread_id,
-                        "checkpoint_id": row["checkpoint_id"],
-                    }
-                },
-                checkpoint=self.serde.loads_typed(("msgpack", checkpoint_bytes)),
-                metadata=self.serde.loads_typed(("msgpack", metadata_bytes)),
-                parent_config={
-                    "configurable": {
-                        "thread_id": thread_id,
-                        "checkpoint_id": row["parent_id"],
-                    }
-                } if row.get("parent_id") else None,
-            )
+            yield await self._load_tuple(thread_id, row)
 
     async def aput_writes(
         self,
         config: RunnableConfig,
         writes: Sequence[Tuple[str, Any]],
         task_id: str,
+        task_path: str = "",
     ) -> None:
         """
-        Required stub for storing pending writes (intermediate states in parallel nodes).
-        If you are not using map-reduce/parallelism, this can be a pass.
-        If you do use parallelism, you need a separate table 'agent_checkpoint_writes'.
+        Store the writes of a finished task before its super-step completes.
+
+        If a sibling task fails or the worker dies, the next run restores
+        these as pending writes and LangGraph skips the tasks that produced
+        them instead of calling the model or tools again.
         """
-        pass
\ No newline at end of file
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        if self.cache is not None:
+            # The cached tuple would not carry these pending writes
+            self.cache.invalidate(thread_id, checkpoint_id)
+        deferred = self._deferred.get(thread_id)
+        if deferred is not None and deferred[0]["id"] == checkpoint_id:
+            # "turn" mode: the checkpoint these writes belong to is not stored
+            return
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, data = await self._dump_value(value)
+            rows.append({
+                "thread_id": thread_id,
+                "checkpoint_id": checkpoint_id,
+                "task_id": task_id,
+                "idx": WRITES_IDX_MAP.get(channel, idx),
+                "channel": channel,
+                "type": type_,
+                "blob": data,
+                "task_path": task_path,
+            })
+
+        # Special writes (errors, interrupts) replace earlier ones; regular
+        # writes of a retried task keep the first successful result.
+        overwrite = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+
+        async def store() -> None:
+            if not await self.repository.put_writes(rows, overwrite=overwrite):
+                log.error(
+                    "checkpointer_aput_writes_failed",
+                    thread_id=thread_id,
+                    checkpoint_id=checkpoint_id,
+                    task_id=task_id,
+                )
+
+        if self.durability == "async":
+            await self._enqueue(thread_id, store)
+        else:
+            await store()
@@ -0,0 +1,169 @@
+"""
+Hot cache of each thread's latest restored checkpoint.
+
+Two tiers sit in front of the checkpoint repository:
+- In-process LRU of decoded checkpoints, bounded by their uncompressed
+  serialized size (compression would understate the decoded values).
+- Optional Redis tier holding the materialized (fully rebuilt) checkpoint,
+  so a thread waking up on another replica skips the chain replay.
+
+Entries are only trusted by the execution holding the thread lease whose
+fence directly follows the fence they were written under: fences are
+incremented once per acquisition, so no other execution can have written
+the thread in between. Without a fence (lease degraded) the cache is
+bypassed, and every checkpoint written drops the thread's entry from both
+tiers, since such a write does not advance the fence.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from core.config import (
+    CHECKPOINT_CACHE_MAX_BYTES,
+    CHECKPOINT_CACHE_REDIS,
+    CHECKPOINT_CACHE_REDIS_TTL_SECONDS,
+)
+from core.logging import log
+
+
+@dataclass
+class CachedCheckpoint:
+    """A restored checkpoint plus the bookkeeping needed to keep writing it."""
+
+    thread_id: str
+    checkpoint_id: str
+    fence: int
+    checkpoint: Dict[str, Any]
+    metadata: Dict[str, Any]
+    parent_id: Optional[str]
+    # channel -> [blob checkpoint_id, chain]
+    refs: Dict[str, List[str]]
+    # channel -> [blob checkpoint_id, chain, length, depth] of append tails
+    tails: Dict[str, List[Any]] = field(default_factory=dict)
+    size: int = 0
+
+
+class CheckpointCache:
+    """Tiered (process LRU + optional Redis) cache of latest checkpoints."""
+
+    def __init__(
+        self,
+        max_bytes: int = CHECKPOINT_CACHE_MAX_BYTES,
+        use_redis: bool = CHECKPOINT_CACHE_REDIS,
+        redis_ttl_seconds: int = CHECKPOINT_CACHE_REDIS_TTL_SECONDS,
+    ):
+        self.max_bytes = max_bytes
+        self.use_redis = use_redis
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self._entries: "OrderedDict[str, CachedCheckpoint]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _redis_key(thread_id: str) -> str:
+        return f"checkpoint_cache:{thread_id}"
+
+    @staticmethod
+    def _is_current(entry_fence: int, fence: Optional[int]) -> bool:
+        return fence is not None and fence in (entry_fence, entry_fence + 1)
+
+    def get(self, thread_id: str, fence: Optional[int]) -> Optional[CachedCheckpoint]:
+        """Return the process-tier entry if it is still the thread's latest."""
+        entry = self._entries.get(thread_id)
+        if entry is None or not self._is_current(entry.fence, fence):
+            return None
+        self._entries.move_to_end(thread_id)
+        self.hits += 1
+        return entry
+
+    async def get_remote(self, thread_id: str, fence: Optional[int]) -> Optional[bytes]:
+        """Fetch the Redis-tier payload; the caller decodes and checks its fence."""
+        if not self.use_redis or fence is None:
+            return None
+        from core.events import events
+
+        try:
+            if not events.redis:
+                await events.connect()
+            # events decodes responses, so the payload is stored as hex
+            payload = await events.redis.get(self._redis_key(thread_id))
+        except Exception as e:
+            log.warning("checkpoint_cache_redis_unavailable", thread_id=thread_id, error=str(e))
+            return None
+        return bytes.fromhex(payload) if payload else None
+
+    def record_redis_hit(self) -> None:
+        self.redis_hits += 1
+
+    def record_miss(self) -> None:
+        self.misses += 1
+
+    def put(self, entry: CachedCheckpoint) -> None:
+        """Store a thread's latest checkpoint, evicting least recently used."""
+        if entry.size > self.max_bytes:
+            self.invalidate(entry.thread_id)
+            return
+        previous = self._entries.pop(entry.thread_id, None)
+        if previous is not None:
+            self._bytes -= previous.size
+        self._entries[entry.thread_id] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    async def put_remote(self, thread_id: str, payload: bytes) -> None:
+        if not self.use_redis:
+            return
+        from core.events import events
+
+        try:
+            if not events.redis:
+                await events.connect()
+            await events.redis.set(
+                self._redis_key(thread_id), payload.hex(), ex=self.redis_ttl_seconds
+            )
+        except Exception as e:
+            log.warning("checkpoint_cache_redis_unavailable", thread_id=thread_id, error=str(e))
+
+    def invalidate(self, thread_id: str, checkpoint_id: Optional[str] = None) -> None:
+        """Drop a thread's entry, or only if it holds the given checkpoint."""
+        entry = self._entries.get(thread_id)
+        if entry is None or (checkpoint_id and entry.checkpoint_id != checkpoint_id):
+            return
+        del self._entries[thread_id]
+        self._bytes -= entry.size
+        self.invalidations += 1
+
+    async def invalidate_remote(self, thread_id: str) -> None:
+        """Drop a thread's Redis-tier entry."""
+        if not self.use_redis:
+            return
+        from core.events import events
+
+        try:
+            if not events.redis:
+                await events.connect()
+            await events.redis.delete(self._redis_key(thread_id))
+        except Exception as e:
+            log.warning("checkpoint_cache_redis_unavailable", thread_id=thread_id, error=str(e))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# Singleton instance
+checkpoint_cache = CheckpointCache()
@@ -0,0 +1,84 @@
+"""
+Storage framing for serialized checkpoint payloads.
+
+Every payload written by the checkpointer is prefixed with a small header so
+the storage format can evolve without a data migration:
+
+    b"UVCK" | format version (1 byte) | compression (1 byte) | payload
+
+Payloads without the header are legacy raw msgpack and are returned as is.
+"""
+from core.config import (
+    CHECKPOINT_COMPRESSION,
+    CHECKPOINT_COMPRESSION_LEVEL,
+    CHECKPOINT_COMPRESSION_MIN_BYTES,
+)
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard ships with the worker image
+    zstandard = None
+
+MAGIC = b"UVCK"
+FORMAT_VERSION = 1
+HEADER_SIZE = len(MAGIC) + 2
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZSTD = 1
+
+
+class CheckpointCodecError(ValueError):
+    """Raised when a stored payload cannot be decoded."""
+
+
+class CheckpointCodec:
+    """Frames and optionally zstd-compresses checkpoint payloads.
+
+    Small payloads are stored uncompressed since the zstd frame overhead
+    outweighs the savings.
+    """
+
+    def __init__(
+        self,
+        compression: str = CHECKPOINT_COMPRESSION,
+        min_bytes: int = CHECKPOINT_COMPRESSION_MIN_BYTES,
+        level: int = CHECKPOINT_COMPRESSION_LEVEL,
+    ):
+        self.compress = compression == "zstd" and zstandard is not None
+        self.min_bytes = min_bytes
+        self.level = level
+
+    def encode(self, data: bytes) -> bytes:
+        if self.compress and len(data) >= self.min_bytes:
+            # Compressor objects are not thread safe; creating one is cheap
+            compressed = zstandard.ZstdCompressor(level=self.level).compress(data)
+            if len(compressed) < len(data):
+                return MAGIC + bytes((FORMAT_VERSION, COMPRESSION_ZSTD)) + compressed
+        return MAGIC + bytes((FORMAT_VERSION, COMPRESSION_NONE)) + data
+
+    @staticmethod
+    def decoded_size(data: bytes) -> int:
+        """Size of the payload ``decode`` returns, read from the frame header."""
+        if not data.startswith(MAGIC):
+            return len(data)
+        payload = data[HEADER_SIZE:]
+        if data[len(MAGIC) + 1] == COMPRESSION_ZSTD and zstandard is not None:
+            size = zstandard.frame_content_size(payload)
+            if size >= 0:
+                return size
+        return len(payload)
+
+    def decode(self, data: bytes) -> bytes:
+        if not data.startswith(MAGIC):
+            return data
+        version, compression = data[len(MAGIC)], data[len(MAGIC) + 1]
+        if version != FORMAT_VERSION:
+            raise CheckpointCodecError(f"Unsupported checkpoint format version {version}")
+        payload = data[HEADER_SIZE:]
+        if compression == COMPRESSION_NONE:
+            return payload
+        if compression == COMPRESSION_ZSTD:
+            if zstandard is None:
+                raise CheckpointCodecError("zstandard is required to read compressed checkpoints")
+            return zstandard.ZstdDecompressor().decompress(payload)
+        raise CheckpointCodecError(f"Unknown checkpoint compression {compression}")
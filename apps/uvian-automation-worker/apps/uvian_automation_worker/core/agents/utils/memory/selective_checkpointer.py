@@ -8,6 +8,7 @@ from langgraph.checkpoint.base import (
     ChannelVersions,
 )
 from core.logging import log
+from core.thread_lease import LeaseLostError, ThreadLease
 
 
 class SelectiveCheckpointer(BaseCheckpointSaver):
@@ -15,11 +16,20 @@ class SelectiveCheckpointer(BaseCheckpointSaver):
 
     This allows certain state fields to be re-initialized fresh on each
     wakeup instead of being restored from the previous run's checkpoint.
+
+    When a ``lease`` is given, writes are fenced: they fail with
+    LeaseLostError once another execution has taken over the thread.
     """
 
-    def __init__(self, base_checkpointer: BaseCheckpointSaver, exclude_keys: list[str]):
+    def __init__(
+        self,
+        base_checkpointer: BaseCheckpointSaver,
+        exclude_keys: list[str],
+        lease: Optional[ThreadLease] = None,
+    ):
         self.base = base_checkpointer
         self.exclude_keys = set(exclude_keys)
+        self.lease = lease
         self.serde = base_checkpointer.serde
 
     async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
@@ -33,7 +43,10 @@ class SelectiveCheckpointer(BaseCheckpointSaver):
             config=checkpoint_tuple.config,
             checkpoint=filtered_checkpoint,
             metadata=checkpoint_tuple.metadata,
-            parent_config=checkpoint_tuple.parent_config
+            parent_config=checkpoint_tuple.parent_config,
+            # Writes of an unfinished super-step are replayed as-is so
+            # completed tasks are not run again
+            pending_writes=checkpoint_tuple.pending_writes,
         )
 
     def _filter_excluded_keys(self, checkpoint: Checkpoint) -> Checkpoint:
@@ -59,6 +72,8 @@ class SelectiveCheckpointer(BaseCheckpointSaver):
         metadata: CheckpointMetadata,
         new_versions: ChannelVersions,
     ) -> RunnableConfig:
+        if self.lease:
+            await self.lease.ensure_held()
         return await self.base.aput(config, checkpoint, metadata, new_versions)
 
     async def alist(
@@ -75,7 +90,8 @@ class SelectiveCheckpointer(BaseCheckpointSaver):
                 config=checkpoint_tuple.config,
                 checkpoint=filtered_checkpoint,
                 metadata=checkpoint_tuple.metadata,
-                parent_config=checkpoint_tuple.parent_config
+                parent_config=checkpoint_tuple.parent_config,
+                pending_writes=checkpoint_tuple.pending_writes,
             )
 
     async def aput_writes(
@@ -83,8 +99,27 @@ class SelectiveCheckpointer(BaseCheckpointSaver):
         config: RunnableConfig,
         writes: Sequence[Tuple[str, Any]],
         task_id: str,
+        task_path: str = "",
     ) -> None:
-        await self.base.aput_writes(config, writes, task_id)
+        if self.lease:
+            await self.lease.ensure_held()
+        await self.base.aput_writes(config, writes, task_id, task_path)
+
+    async def aflush(self) -> None:
+        if self.lease and self.base.has_deferred:
+            await self.lease.ensure_held()
+        await self.base.aflush()
+
+    async def aclose(self) -> None:
+        # Queued writes were fenced when they were put; held-back ("turn")
+        # checkpoints still need the lease before they are stored.
+        if self.lease and self.base.has_deferred:
+            try:
+                await self.lease.ensure_held()
+            except LeaseLostError:
+                log.warning("checkpoint_flush_dropped", reason="lease_lost")
+                self.base.discard_deferred()
+        await self.base.aclose()
 
     async def aget_next_version(
         self,
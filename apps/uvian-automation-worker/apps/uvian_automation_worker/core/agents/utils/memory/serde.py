@@ -0,0 +1,116 @@
+"""
+Checkpoint serializer with a compact fast path for message lists.
+
+The ``messages`` channel (and its append deltas and pending writes) is by far
+the largest and most frequently written value in MessagesState. JsonPlus
+encodes every message with its module path, class name and a keyword map of
+all fields; here a message list is packed as positional tuples instead:
+
+    [class code, content, id, field code, value, field code, value, ...]
+
+Only fields that differ from their defaults are written, and field names are
+interned as small integers.
+
+The payload type carries the schema version (``messages.v1``); every other
+value, and any message list the fast path cannot represent, is delegated to
+JsonPlusSerializer, so existing checkpoints keep loading unchanged.
+"""
+from typing import Any, Tuple
+
+import ormsgpack
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    ChatMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+MESSAGES_TYPE = "messages.v1"
+
+# Codes are part of the stored format: append only, never reorder
+MESSAGE_CLASSES = (
+    HumanMessage,
+    AIMessage,
+    SystemMessage,
+    ToolMessage,
+    AIMessageChunk,
+    ChatMessage,
+    RemoveMessage,
+)
+FIELDS = (
+    "additional_kwargs",
+    "response_metadata",
+    "name",
+    "tool_calls",
+    "invalid_tool_calls",
+    "usage_metadata",
+    "tool_call_id",
+    "artifact",
+    "status",
+    "tool_call_chunks",
+    "chunk_position",
+    "role",
+)
+
+_CLASS_CODES = {cls: code for code, cls in enumerate(MESSAGE_CLASSES)}
+_FIELD_CODES = {name: code for code, name in enumerate(FIELDS)}
+# Written positionally or implied by the class
+_FIXED_FIELDS = {"content", "id", "type"}
+_DEFAULTS = {"status": "success"}
+
+
+class _Unsupported(Exception):
+    """The value cannot be represented by the compact schema."""
+
+
+def _pack_message(message: BaseMessage) -> list:
+    code = _CLASS_CODES.get(type(message))
+    if code is None or message.__pydantic_extra__:
+        raise _Unsupported(type(message).__name__)
+    packed = [code, message.content, message.id]
+    for name, value in message.__dict__.items():
+        if name in _FIXED_FIELDS or value is None or value == {} or value == []:
+            continue
+        if _DEFAULTS.get(name) == value:
+            continue
+        field = _FIELD_CODES.get(name)
+        if field is None:
+            raise _Unsupported(name)
+        packed.append(field)
+        packed.append(value)
+    return packed
+
+
+def _unpack_message(packed: list) -> BaseMessage:
+    cls = MESSAGE_CLASSES[packed[0]]
+    fields = {"content": packed[1], "id": packed[2]}
+    for i in range(3, len(packed), 2):
+        fields[FIELDS[packed[i]]] = packed[i + 1]
+    return cls(**fields)
+
+
+class CheckpointSerializer(SerializerProtocol):
+    """JsonPlus, with message lists packed in the compact ``messages.v1`` schema."""
+
+    def __init__(self, fallback: SerializerProtocol | None = None):
+        self.fallback = fallback or JsonPlusSerializer()
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        if isinstance(obj, list) and obj and isinstance(obj[0], BaseMessage):
+            try:
+                return MESSAGES_TYPE, ormsgpack.packb([_pack_message(m) for m in obj])
+            except (_Unsupported, TypeError, AttributeError, ormsgpack.MsgpackEncodeError):
+                pass
+        return self.fallback.dumps_typed(obj)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_ == MESSAGES_TYPE:
+            return [_unpack_message(m) for m in ormsgpack.unpackb(payload)]
+        return self.fallback.loads_typed(data)
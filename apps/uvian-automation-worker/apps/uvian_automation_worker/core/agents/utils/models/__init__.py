@@ -1,14 +1,103 @@
+import hashlib
+import time
+from dataclasses import dataclass, field
 from typing import Any
 from langchain_core.language_models.chat_models import BaseChatModel
 
+from core.agents.utils.tool_binding import tool_binding_cache
+from core.config import LLM_POOL_IDLE_TTL_SECONDS
+from core.logging import log
 from .openai import create as _create_openai
 from .anthropic import create as _create_anthropic
 from .google import create as _create_google
 from .azure_openai import create as _create_azure_openai
 from .minimax import create as _create_minimax
 
+# Per-job parameters applied to a copy of the pooled client (and their defaults)
+JOB_PARAMS = {"temperature": 0.6, "max_tokens": None}
+
+
+@dataclass
+class _PooledModel:
+    model: BaseChatModel
+    last_used: float
+    # Jobs holding the model (create_llm .. release_llm)
+    refs: int = 0
+    # Job-parameter copies, reused so per-model caches (e.g. tool bindings)
+    # hit across jobs
+    variants: dict[tuple, BaseChatModel] = field(default_factory=dict)
+
+
+_pool: dict[tuple, _PooledModel] = {}
+
+
+def _pool_key(config: dict[str, Any]) -> tuple:
+    api_key = config.get("api_key") or ""
+    return (
+        config.get("type", "openai"),
+        config.get("base_url"),
+        hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16],
+        config.get("model", config.get("model_name")),
+    )
+
+
+async def _aclose(entry: _PooledModel) -> None:
+    tool_binding_cache.discard([entry.model, *entry.variants.values()])
+    http_client = getattr(entry.model, "http_async_client", None)
+    if http_client is not None:
+        await http_client.aclose()
+
+
+async def _evict_idle(now: float) -> None:
+    """Close clients no job has held within LLM_POOL_IDLE_TTL_SECONDS.
+
+    Entries still held by a job are never evicted, so closing the HTTP
+    client cannot pull it from under a running job.
+    """
+    expired = [
+        key for key, entry in _pool.items()
+        if entry.refs == 0 and now - entry.last_used > LLM_POOL_IDLE_TTL_SECONDS
+    ]
+    for key in expired:
+        await _aclose(_pool.pop(key))
+    if expired:
+        log.info("llm_pool_evicted", count=len(expired), remaining=len(_pool))
+
+
+def _with_job_params(entry: _PooledModel, config: dict[str, Any]) -> BaseChatModel:
+    """Shallow-copy the pooled model with this job's sampling parameters.
+
+    ``model_copy`` skips validators, so the copy shares the pooled model's
+    HTTP clients and their warm connections. Copies are kept per parameter
+    set, so jobs with the same parameters get the same instance.
+    """
+    model = entry.model
+    fields = type(model).model_fields
+    aliases = {field.alias: name for name, field in fields.items() if field.alias}
+    update = {}
+    for param, default in JOB_PARAMS.items():
+        value = config.get(param, default)
+        if value is None:
+            continue
+        name = param if param in fields else aliases.get(param)
+        if name:
+            update[name] = value
+    if not update:
+        return model
+    key = tuple(sorted(update.items()))
+    variant = entry.variants.get(key)
+    if variant is None:
+        variant = model.model_copy(update=update)
+        entry.variants[key] = variant
+    return variant
+
 
 def create_llm(config: dict[str, Any]) -> BaseChatModel:
+    """Pooled model for ``config`` with its job parameters applied.
+
+    The caller holds the pooled client until it calls ``release_llm`` with
+    the same config.
+    """
     llm_type = config.get("type", "openai")
 
     creators = {
@@ -24,4 +113,32 @@ def create_llm(config: dict[str, Any]) -> BaseChatModel:
     if not creator:
         raise ValueError(f"Unsupported LLM type: {llm_type}. Available: {list(creators.keys())}")
 
-    return creator(config)
\ No newline at end of file
+    now = time.monotonic()
+    key = _pool_key(config)
+    entry = _pool.get(key)
+    if entry is None:
+        base_config = {k: v for k, v in config.items() if k not in JOB_PARAMS}
+        entry = _PooledModel(model=creator(base_config), last_used=now)
+        _pool[key] = entry
+        log.info("llm_pool_created", llm_type=llm_type, model=key[3], pool_size=len(_pool))
+    entry.last_used = now
+    entry.refs += 1
+
+    return _with_job_params(entry, config)
+
+
+async def release_llm(config: dict[str, Any]) -> None:
+    """Hand back a model taken with ``create_llm`` and close idle clients."""
+    now = time.monotonic()
+    entry = _pool.get(_pool_key(config))
+    if entry is not None and entry.refs > 0:
+        entry.refs -= 1
+        entry.last_used = now
+    await _evict_idle(now)
+
+
+async def aclose_llm_pool() -> None:
+    """Close pooled HTTP clients on worker shutdown."""
+    for entry in _pool.values():
+        await _aclose(entry)
+    _pool.clear()
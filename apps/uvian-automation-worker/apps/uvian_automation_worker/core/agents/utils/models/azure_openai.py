@@ -1,7 +1,7 @@
 from langchain_community.chat_models.azure_openai import AzureChatOpenAI
 from typing import Any
 
-from .rate_limiters import create_rate_limiter
+from .rate_limiters import create_rate_limiter, credential_scope
 
 
 def create(config: dict[str, Any]) -> AzureChatOpenAI:
@@ -14,5 +14,5 @@ def create(config: dict[str, Any]) -> AzureChatOpenAI:
         api_version=config.get("api_version", "2024-02-01"),
         deployment_name=config.get("deployment_name"),
         streaming=config.get("streaming", True),
-        rate_limiter=create_rate_limiter(config.get("requests_per_second")),
+        rate_limiter=create_rate_limiter(config.get("requests_per_second"), scope=credential_scope(config)),
     )
\ No newline at end of file
@@ -1,7 +1,7 @@
 from langchain_community.chat_models.vertexai import ChatVertexAI
 from typing import Any
 
-from .rate_limiters import create_rate_limiter
+from .rate_limiters import create_rate_limiter, credential_scope
 
 
 def create(config: dict[str, Any]) -> ChatVertexAI:
@@ -13,5 +13,5 @@ def create(config: dict[str, Any]) -> ChatVertexAI:
         project=config.get("project"),
         location=config.get("location"),
         streaming=config.get("streaming", True),
-        rate_limiter=create_rate_limiter(config.get("requests_per_second")),
+        rate_limiter=create_rate_limiter(config.get("requests_per_second"), scope=credential_scope(config)),
     )
\ No newline at end of file
@@ -0,0 +1,66 @@
+import time
+
+import httpx
+
+from .rate_limiters import AdaptiveRateLimiter, parse_retry_after
+
+from core.config import (
+    LLM_HTTP_MAX_CONNECTIONS,
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    LLM_HTTP2,
+)
+from core.logging import log
+
+
+def _http2_available() -> bool:
+    if not LLM_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        log.warning("llm_http2_unavailable", reason="h2 package not installed")
+        return False
+    return True
+
+
+# Request extension holding when the request was sent (time.monotonic())
+SENT_AT = "rate_limit_sent_at"
+
+
+async def _stamp_sent_at(request: httpx.Request) -> None:
+    request.extensions[SENT_AT] = time.monotonic()
+
+
+def _rate_limit_feedback(rate_limiter: AdaptiveRateLimiter):
+    """Response hook that feeds 429s and successes back into the limiter.
+
+    It sees every attempt, including the SDK's own internal retries.
+    """
+    async def on_response(response: httpx.Response) -> None:
+        if response.status_code == 429:
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            await rate_limiter.arecord_rate_limited(retry_after, response.request.extensions.get(SENT_AT))
+        elif response.is_success:
+            await rate_limiter.arecord_success()
+
+    return on_response
+
+
+def create_http_async_client(rate_limiter: AdaptiveRateLimiter | None = None) -> httpx.AsyncClient:
+    """Build a keep-alive tuned async HTTP client for a pooled LLM client.
+
+    Timeouts are left to the provider SDK, which sets them per request.
+    """
+    event_hooks = None
+    if rate_limiter:
+        event_hooks = {"request": [_stamp_sent_at], "response": [_rate_limit_feedback(rate_limiter)]}
+    return httpx.AsyncClient(
+        event_hooks=event_hooks,
+        limits=httpx.Limits(
+            max_connections=LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        http2=_http2_available(),
+    )
@@ -1,7 +1,7 @@
 from langchain_community.chat_models.minimax import MiniMaxChat
 from typing import Any
 
-from .rate_limiters import create_rate_limiter
+from .rate_limiters import create_rate_limiter, credential_scope
 
 
 def create(config: dict[str, Any]) -> MiniMaxChat:
@@ -12,5 +12,5 @@ def create(config: dict[str, Any]) -> MiniMaxChat:
         api_key=config.get("api_key"),
         base_url=config.get("base_url"),
         streaming=config.get("streaming", True),
-        rate_limiter=create_rate_limiter(config.get("requests_per_second")),
+        rate_limiter=create_rate_limiter(config.get("requests_per_second"), scope=credential_scope(config)),
     )
\ No newline at end of file
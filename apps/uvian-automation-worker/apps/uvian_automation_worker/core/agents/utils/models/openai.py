@@ -1,7 +1,8 @@
 from langchain_openai import ChatOpenAI
 from typing import Any
 
-from .rate_limiters import create_rate_limiter
+from .rate_limiters import create_rate_limiter, credential_scope
+from .http_clients import create_http_async_client
 
 
 def create(config: dict[str, Any]) -> ChatOpenAI:
@@ -12,6 +13,8 @@ def create(config: dict[str, Any]) -> ChatOpenAI:
     if not api_key:
         raise ValueError("api_key is required for OpenAI models")
 
+    rate_limiter = create_rate_limiter(config.get("requests_per_second"), scope=credential_scope(config))
+
     return ChatOpenAI(
         model=config.get("model", config.get("model_name", "gpt-4o")),
         temperature=config.get("temperature", 0.6),
@@ -21,5 +24,6 @@ def create(config: dict[str, Any]) -> ChatOpenAI:
         streaming=config.get("streaming", True),
         stream_usage=config.get("stream_usage", True),
         use_responses_api=use_responses_api,
-        rate_limiter=create_rate_limiter(config.get("requests_per_second")),
+        rate_limiter=rate_limiter,
+        http_async_client=create_http_async_client(rate_limiter),
     )
\ No newline at end of file
@@ -1,9 +1,244 @@
-from langchain_core.rate_limiters import InMemoryRateLimiter
+import asyncio
+import hashlib
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from core.config import LLM_RATE_LIMIT_BACKEND, LLM_RATE_LIMIT_MIN_RPS
+from core.logging import log
 
 DEFAULT_REQUESTS_PER_SECOND = 0.4
 
+# AIMD tuning: halve the rate on a 429, win back 5% of the ceiling per success.
+# 429s for requests sent before the last decrease were sent at the old rate,
+# so they do not decrease it again.
+DECREASE_FACTOR = 0.5
+INCREASE_FRACTION = 0.05
+
+# Token bucket shared by every replica. Uses the Redis clock so replicas with
+# skewed clocks agree. Returns the seconds to wait (0 when a token was taken).
+_ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'rate', 'blocked_until')
+local rate = tonumber(state[3]) or tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local blocked_until = tonumber(state[4]) or 0
+if blocked_until > now then
+  return tostring(blocked_until - now)
+end
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return tostring(wait)
+"""
+
+# Applies an AIMD step to the shared rate. ARGV: new rate, block seconds, ttl.
+_ADJUST_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+redis.call('HSET', KEYS[1], 'rate', ARGV[1])
+local block = tonumber(ARGV[2])
+if block > 0 then
+  redis.call('HSET', KEYS[1], 'blocked_until', tostring(now + block))
+end
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return ARGV[1]
+"""
+
+_BUCKET_TTL_SECONDS = 3600
+
+
+def credential_scope(config: dict[str, Any]) -> str:
+    """Identify the provider account a config bills against."""
+    api_key = config.get("api_key") or ""
+    key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    return f"{config.get('type', 'openai')}|{config.get('base_url') or ''}|{key_hash}"
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header given either as seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter(BaseRateLimiter):
+    """Token bucket whose rate adapts to provider 429s (AIMD).
+
+    A single instance is shared by every job using the same provider
+    credential. With ``backend="redis"`` the bucket lives in Redis so all
+    worker replicas draw from one budget; if Redis is unreachable the local
+    bucket is used instead of failing the LLM call.
+    """
+
+    def __init__(
+        self,
+        scope: str,
+        requests_per_second: float,
+        backend: str = "memory",
+        min_requests_per_second: float = LLM_RATE_LIMIT_MIN_RPS,
+        check_every_n_seconds: float = 0.1,
+    ):
+        self.scope = scope
+        self.max_rate = requests_per_second
+        self.min_rate = min(min_requests_per_second, requests_per_second)
+        self.rate = requests_per_second
+        self.backend = backend
+        self.check_every_n_seconds = check_every_n_seconds
+        self.redis_key = f"llm_ratelimit:{scope}"
+        self.throttle_events = 0
+        self._tokens = 1.0
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+        self._decreased_at = float("-inf")
+        self._lock = threading.Lock()
+        self._acquire_script = None
+        self._adjust_script = None
+
+    def _consume_local(self) -> float:
+        """Take a token if one is available; otherwise return the wait time."""
+        with self._lock:
+            now = time.monotonic()
+            if self._blocked_until > now:
+                return self._blocked_until - now
+            self._tokens = min(1.0, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    async def _redis(self):
+        from core.events import events
+
+        if not events.redis:
+            await events.connect()
+        if self._acquire_script is None:
+            self._acquire_script = events.redis.register_script(_ACQUIRE_SCRIPT)
+            self._adjust_script = events.redis.register_script(_ADJUST_SCRIPT)
+        return events.redis
+
+    async def _consume_redis(self) -> float:
+        await self._redis()
+        wait = await self._acquire_script(
+            keys=[self.redis_key],
+            args=[self.rate, 1, _BUCKET_TTL_SECONDS],
+        )
+        return float(wait)
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        # Sync callers cannot await Redis, so they always use the local bucket
+        while True:
+            wait = self._consume_local()
+            if wait <= 0:
+                return True
+            if not blocking:
+                return False
+            time.sleep(min(wait, self.check_every_n_seconds))
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        while True:
+            if self.backend == "redis":
+                try:
+                    wait = await self._consume_redis()
+                except Exception as e:
+                    log.warning("rate_limiter_redis_unavailable", scope=self.scope, error=str(e))
+                    wait = self._consume_local()
+            else:
+                wait = self._consume_local()
+            if wait <= 0:
+                return True
+            if not blocking:
+                return False
+            await asyncio.sleep(max(wait, self.check_every_n_seconds))
+
+    async def arecord_rate_limited(
+        self,
+        retry_after: float | None = None,
+        sent_at: float | None = None,
+    ) -> None:
+        """Multiplicative decrease, honouring the provider's Retry-After.
+
+        ``sent_at`` is when the rejected request was sent (``time.monotonic()``);
+        a request sent before the last decrease does not decrease the rate
+        again, so a burst of 429s halves it once.
+        """
+        self.throttle_events += 1
+        if sent_at is None or sent_at >= self._decreased_at:
+            self.rate = max(self.min_rate, self.rate * DECREASE_FACTOR)
+            self._decreased_at = time.monotonic()
+        block = retry_after or 0.0
+        with self._lock:
+            self._tokens = 0.0
+            if block:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + block)
+        log.warning(
+            "llm_rate_limited",
+            scope=self.scope,
+            new_rate=round(self.rate, 4),
+            retry_after=retry_after,
+        )
+        await self._publish_rate(block)
+
+    async def arecord_success(self) -> None:
+        """Additive increase back towards the configured ceiling."""
+        if self.rate >= self.max_rate:
+            return
+        self.rate = min(self.max_rate, self.rate + self.max_rate * INCREASE_FRACTION)
+        await self._publish_rate(0.0)
+
+    async def _publish_rate(self, block: float) -> None:
+        if self.backend != "redis":
+            return
+        try:
+            await self._redis()
+            await self._adjust_script(
+                keys=[self.redis_key],
+                args=[self.rate, block, _BUCKET_TTL_SECONDS],
+            )
+        except Exception as e:
+            log.warning("rate_limiter_redis_unavailable", scope=self.scope, error=str(e))
+
+
+_registry: dict[str, AdaptiveRateLimiter] = {}
+
+
+def create_rate_limiter(
+    requests_per_second: float | None = None,
+    scope: str | None = None,
+) -> AdaptiveRateLimiter:
+    """Get the limiter for a provider credential, creating it on first use.
+
+    Every job using the same ``scope`` (see ``credential_scope``) shares one
+    limiter, so WORKER_CONCURRENCY jobs together stay within the configured
+    rate. Without a scope a private limiter is returned.
+    """
+    rate = requests_per_second or DEFAULT_REQUESTS_PER_SECOND
+    if scope is None:
+        return AdaptiveRateLimiter("unscoped", rate, backend="memory")
 
-def create_rate_limiter(requests_per_second: float | None = None) -> InMemoryRateLimiter:
-    return InMemoryRateLimiter(
-        requests_per_second=requests_per_second or DEFAULT_REQUESTS_PER_SECOND,
-    )
\ No newline at end of file
+    limiter = _registry.get(scope)
+    if limiter is None:
+        limiter = AdaptiveRateLimiter(scope, rate, backend=LLM_RATE_LIMIT_BACKEND)
+        _registry[scope] = limiter
+        log.info("rate_limiter_created", scope=scope, requests_per_second=rate, backend=limiter.backend)
+    return limiter
@@ -1,13 +1,15 @@
-from typing import Dict, Any, Optional
-from clients.mcp import MCPRegistry
+from typing import Dict, Any
+from langchain_core.runnables import RunnableConfig
 from core.logging import log
 
-def create_cleanup_node(mcp_registry: Optional[MCPRegistry] = None):
-    async def cleanup_node(state: Dict[str, Any]) -> Dict[str, Any]:
-        """Cleanup node - gracefully closes MCP connections at end of graph.
-        
-        Runs inside LangGraph's task context to avoid cross-task cancel scope error.
+
+def create_cleanup_node():
+    async def cleanup_node(state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+        """Cleanup node - returns the job's MCP session leases at end of graph.
+
+        The pooled sessions stay open for later jobs; their owner tasks close them.
         """
+        mcp_registry = config.get("configurable", {}).get("mcp_registry")
         if mcp_registry:
             try:
                 await mcp_registry.close()
@@ -20,4 +22,4 @@ def create_cleanup_node(mcp_registry: Optional[MCPRegistry] = None):
         
         return {}
     
-    return cleanup_node
\ No newline at end of file
+    return cleanup_node
@@ -1,21 +1,241 @@
+import asyncio
 import time
+from typing import Any, Dict, List, Tuple
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import AnyMessage, SystemMessage, HumanMessage, RemoveMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from core.agents.utils.memory.codec import CheckpointCodec
+from core.agents.utils.memory.serde import CheckpointSerializer
 from core.agents.utils.state import MessagesState
+from core.config import (
+    COMPACTION_CHUNK_TIMEOUT_SECONDS,
+    COMPACTION_CHUNK_TOKENS,
+    COMPACTION_MAP_CONCURRENCY,
+    COMPACTION_MAP_REDUCE_TOKENS,
+    COMPACTION_SUMMARY_FANOUT,
+    COMPACTION_TOOL_OUTPUT_TOKENS,
+)
+from repositories.message_archive import message_archive_repository
 from core.logging import log
 
+_serde = CheckpointSerializer()
+_codec = CheckpointCodec()
 
-def create_compaction_node(model):
-    def compaction_node(state: MessagesState):
+RECENT_TO_KEEP = 6
+
+# Rough token estimate used to budget tool outputs in the summary prompt
+CHARS_PER_TOKEN = 4
+
+COMPACTION_NOTICE = (
+    "Your session has been compacted. You must carefully consider the compaction information "
+    "in the system prompt and then resume your work. Proceed."
+)
+
+SEGMENT_PROMPT = """Summarize the NEW conversation messages CONCISELY.
+
+The summary of everything before them is given for context only; do not
+repeat it.
+
+Focus on:
+- Topics discussed
+- User requests and your responses
+- Key decisions or information shared
+- Current task (what you're actively working on)
+- What is next to do? (pending items or next steps)
+
+Output format:
+"Previously: [2-4 sentence summary]
+Current task: [1-2 sentences]
+What is next to do?: [1-2 sentences]"
+
+Keep under 150 words."""
+
+ROLLUP_PROMPT = """Merge these consecutive conversation summaries (oldest first) into ONE
+concise summary. Keep key facts, decisions, and anything still open; drop
+details that were superseded.
+
+Keep under 200 words."""
+
+CHUNK_PROMPT = """Summarize this PART of a longer conversation CONCISELY. Keep user
+requests, decisions, results, and anything left open.
+
+Keep under 150 words."""
+
+
+async def _archive_messages(
+    thread_id: str,
+    messages: List[AnyMessage],
+    range_start: int,
+    summary: str,
+) -> bool:
+    """Move compacted messages to the archive before they leave live state."""
+    if not thread_id or any(m.id is None for m in messages):
+        # RemoveMessage needs an id; keep them live and slice by offset instead
+        return False
+    type_, data = _serde.dumps_typed(messages)
+    return await message_archive_repository.insert_range(
+        thread_id,
+        range_start,
+        range_start + len(messages),
+        type_,
+        _codec.encode(data),
+        summary,
+    )
+
+
+def _truncate_tokens(text: str, budget: int) -> str:
+    limit = budget * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    return text[:limit] + f" ...[truncated {len(text) - limit} chars]"
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _render_lines(messages: List[AnyMessage]) -> List[str]:
+    lines = []
+    for m in messages:
+        content = str(m.content)
+        if isinstance(m, ToolMessage):
+            content = _truncate_tokens(content, COMPACTION_TOOL_OUTPUT_TOKENS)
+        lines.append(f"{m.type.upper()}: {content}")
+    return lines
+
+
+def _chunk(lines: List[str], max_tokens: int) -> List[str]:
+    """Group consecutive lines into texts of at most ~max_tokens each."""
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for line in lines:
+        tokens = _estimate_tokens(line)
+        if current and size + tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _tiers(compaction_state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Summary tiers, oldest first. Tier 0 summarizes one compaction's messages;
+    tier n+1 merges COMPACTION_SUMMARY_FANOUT consecutive tier-n summaries."""
+    history = compaction_state.get("history") or []
+    if all("tier" in entry for entry in history):
+        return list(history)
+    # Before tiers, each summary covered the whole history up to its offset
+    if compaction_state.get("summary"):
+        return [{
+            "summary": compaction_state["summary"],
+            "tier": 1,
+            "compacted_at": compaction_state.get("compacted_at"),
+        }]
+    return []
+
+
+def _render_summary(tiers: List[Dict[str, Any]]) -> str:
+    return "\n\n".join(entry["summary"] for entry in tiers)
+
+
+async def _summarize(model, system_prompt: str, human: str) -> Tuple[str, int]:
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", system_prompt),
+        ("human", "{text}"),
+    ])
+    response = await model.ainvoke(prompt.format_messages(text=human))
+    usage = response.usage_metadata or {}
+    input_tokens = usage.get("input_tokens", 0) or 0
+    output_tokens = usage.get("output_tokens", 0) or 0
+    return response.content, usage.get("total_tokens", input_tokens + output_tokens) or 0
+
+
+async def _roll_up(model, tiers: List[Dict[str, Any]], now: int) -> Tuple[List[Dict[str, Any]], int]:
+    """Merge runs of COMPACTION_SUMMARY_FANOUT same-tier summaries upward."""
+    tokens = 0
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(tiers) - COMPACTION_SUMMARY_FANOUT + 1):
+            run = tiers[i:i + COMPACTION_SUMMARY_FANOUT]
+            if len({entry["tier"] for entry in run}) != 1:
+                continue
+            text = "\n\n".join(f"Summary {n + 1}:\n{entry['summary']}" for n, entry in enumerate(run))
+            summary, used = await _summarize(model, ROLLUP_PROMPT, text)
+            tokens += used
+            rolled_up = {"summary": summary, "tier": run[0]["tier"] + 1, "compacted_at": now}
+            tiers = tiers[:i] + [rolled_up] + tiers[i + COMPACTION_SUMMARY_FANOUT:]
+            merged = True
+            break
+    return tiers, tokens
+
+
+async def _map_chunks(model, system_prompt: str, chunks: List[str]) -> Tuple[List[str], int]:
+    """Summarize chunks concurrently; the model's rate limiter paces the calls.
+
+    A chunk that fails or exceeds COMPACTION_CHUNK_TIMEOUT_SECONDS is replaced
+    by a short excerpt so one slow call cannot stall the whole compaction.
+    """
+    semaphore = asyncio.Semaphore(COMPACTION_MAP_CONCURRENCY)
+
+    async def summarize(chunk: str) -> Tuple[str, int]:
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(
+                    _summarize(model, system_prompt, chunk),
+                    timeout=COMPACTION_CHUNK_TIMEOUT_SECONDS,
+                )
+            except Exception as e:
+                log.warning("compaction_chunk_failed", error=str(e) or type(e).__name__)
+                return _truncate_tokens(chunk, COMPACTION_TOOL_OUTPUT_TOKENS), 0
+
+    results = await asyncio.gather(*(summarize(chunk) for chunk in chunks))
+    return [summary for summary, _ in results], sum(tokens for _, tokens in results)
+
+
+async def _summarize_segment(model, context: str, messages: List[AnyMessage]) -> Tuple[str, int]:
+    """Summarize new messages in one call, or map-reduce them when they are
+    too large for a single prompt."""
+    lines = _render_lines(messages)
+    text = "\n".join(lines)
+    tokens = 0
+    if _estimate_tokens(text) > COMPACTION_MAP_REDUCE_TOKENS:
+        partials, tokens = await _map_chunks(model, CHUNK_PROMPT, _chunk(lines, COMPACTION_CHUNK_TOKENS))
+        log.info("compaction_map_reduce", messages=len(messages), chunks=len(partials))
+        # Reduce rounds until the partial summaries fit one prompt
+        while len(partials) > 1 and _estimate_tokens("\n\n".join(partials)) > COMPACTION_MAP_REDUCE_TOKENS:
+            groups = _chunk(partials, COMPACTION_CHUNK_TOKENS)
+            if len(groups) == len(partials):
+                break
+            partials, used = await _map_chunks(model, ROLLUP_PROMPT, groups)
+            tokens += used
+        text = "\n\n".join(f"Part {n + 1}:\n{partial}" for n, partial in enumerate(partials))
+    summary, used = await _summarize(
+        model,
+        SEGMENT_PROMPT,
+        f"Summary so far:\n{context}\n\nNew messages to summarize:\n{text}",
+    )
+    return summary, tokens + used
+
+
+def create_compaction_node():
+    async def compaction_node(state: MessagesState, config: RunnableConfig):
+        model = config["configurable"]["model"]
         messages = state["messages"]
 
         thread_id = state.get("thread_id")
         agent_user_id = state.get("agent_user_id")
         llm_calls = state.get("llm_calls", 0)
 
-        RECENT_TO_KEEP = 6
+        existing_compaction = state.get("compaction_state") or {}
+        # Messages before the offset are already summarized (kept live only
+        # when archiving failed)
+        previous_offset = existing_compaction.get("message_offset", 0) or 0
 
-        other_msgs = [m for m in messages if not isinstance(m, SystemMessage)]
+        other_msgs = [m for m in messages[previous_offset:] if not isinstance(m, SystemMessage)]
 
         recent = other_msgs[-RECENT_TO_KEEP:] if len(other_msgs) > RECENT_TO_KEEP else other_msgs
         old = other_msgs[:-RECENT_TO_KEEP] if len(other_msgs) > RECENT_TO_KEEP else []
@@ -23,6 +243,11 @@ def create_compaction_node(model):
         if not old:
             return {}
 
+        # Everything before the recent window leaves live state, including
+        # system messages the summary prompt skips
+        cut = next(i for i, m in enumerate(messages) if m is recent[0])
+        compacted = messages[:cut]
+
         log.info(
             "compacting_conversation",
             thread_id=thread_id,
@@ -32,52 +257,30 @@ def create_compaction_node(model):
             extra={"messages_to_compact": len(old)},
         )
 
-        old_text = "\n".join([f"{m.type.upper()}: {m.content}" for m in old])
-        summary_prompt = ChatPromptTemplate.from_messages([
-            ("system", f"""Summarize this conversation history CONCISELY.
-
-Focus on:
-- Topics discussed
-- User requests and your responses
-- Key decisions or information shared
-- Current task (what you're actively working on)
-- What is next to do? (pending items or next steps)
-
-Output format:
-"Previously: [2-4 sentence summary]
-Current task: [1-2 sentences]
-What is next to do?: [1-2 sentences]"
+        # Fold only the new messages; earlier summaries are context, not input
+        tiers = _tiers(existing_compaction)
+        context = tiers[-1]["summary"] if tiers else "(none)"
+        segment, compaction_tokens = await _summarize_segment(model, context, old)
 
-Keep under 150 words."""),
-            ("human", "Conversation history to summarize:\n{old_text}"),
-        ])
-
-        summary_response = model.invoke(
-            summary_prompt.format_messages(old_text=old_text)
-        )
-
-        usage = summary_response.usage_metadata or {}
-        input_tokens = usage.get("input_tokens", 0) or 0
-        output_tokens = usage.get("output_tokens", 0) or 0
-        compaction_tokens = usage.get("total_tokens", input_tokens + output_tokens) or 0
+        now = int(time.time())
+        segment_tier = {"summary": segment, "tier": 0, "compacted_at": now}
+        tiers, rollup_tokens = await _roll_up(model, tiers + [segment_tier], now)
+        compaction_tokens += rollup_tokens
+        summary = _render_summary(tiers)
 
         current_total = state.get("tokens_used", 0) or 0
 
-        now = int(time.time())
-        new_compaction = {
-            "summary": summary_response.content,
-            "message_offset": len(messages) - len(recent),
-            "compacted_at": now,
-        }
-
-        existing_compaction = state.get("compaction_state")
-        history = existing_compaction.get("history", []) if existing_compaction else []
-        history.append({
-            "summary": summary_response.content,
-            "compacted_at": now,
-        })
-        if len(history) > 5:
-            history = history[-5:]
+        archived_count = existing_compaction.get("archived_count", 0)
+        archive_range = existing_compaction.get("archive_range")
+        if await _archive_messages(thread_id, compacted, archived_count, segment):
+            archive_range = [archived_count, archived_count + len(compacted)]
+            archived_count += len(compacted)
+            removals = [RemoveMessage(id=m.id) for m in compacted]
+            message_offset = 0
+        else:
+            # Archive unavailable: keep the messages and hide them by offset
+            removals = []
+            message_offset = cut
 
         log.debug(
             "conversation_compacted",
@@ -85,19 +288,31 @@ Keep under 150 words."""),
             agent_user_id=agent_user_id,
             llm_calls=llm_calls,
             node="compaction_node",
-            extra={"summary": summary_response.content, "history_count": len(history)},
+            extra={
+                "summary": summary,
+                "history_count": len(tiers),
+                "messages_archived": len(removals),
+                "archived_count": archived_count,
+                "compaction_tokens": compaction_tokens,
+            },
         )
 
         return {
             "compaction_state": {
-                "summary": summary_response.content,
-                "message_offset": len(messages) - len(recent),
+                "summary": summary,
+                "message_offset": message_offset,
                 "compacted_at": now,
-                "history": history,
+                "history": tiers,
+                # Pointer into agent_message_archive: messages [0, archived_count)
+                # of the thread live there, the latest compaction wrote archive_range
+                "archived_count": archived_count,
+                "archive_range": archive_range,
             },
-            "messages": [HumanMessage(content="Your session has been compacted. You must carefully consider the compaction information in the system prompt and then resume your work. Proceed.")],
+            "messages": removals + [HumanMessage(content=COMPACTION_NOTICE)],
+            # The prompt prefix changes anyway; start the tool subset afresh
+            "bound_tools": [],
             "session_context_size": 0,
             "tokens_used": current_total + compaction_tokens,
         }
 
-    return compaction_node
\ No newline at end of file
+    return compaction_node
@@ -1,6 +1,11 @@
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import message_chunk_to_message
 from langchain_core.runnables import RunnableConfig
-import json
+import uuid
+from core.agents.utils.system_prompt import build_system_message, cache_usage, memoized, render_memory, render_summary
+from core.agents.utils.tokens import record_usage
+from core.agents.utils.tool_binding import tool_binding_cache
+from core.agents.utils.tool_index import select_tools
+from core.events import events, DeltaCoalescer
 from core.logging import log
 
 SYSTEM_PROMPT = """You are an autonomous headless agent with access to internal tools and external mcps. 
@@ -35,8 +40,73 @@ Rules:
 - When the event is handled, simply summarise what you did with text.
 """
 
-def create_model_node(model, default_tools, mcp_registry):
-    async def model_node(state: dict):
+
+def _render_skills(value) -> str:
+    available_skills, loaded_skills = value
+    loaded_skill_names = [s.get("name") for s in loaded_skills if isinstance(s, dict) and s.get("name")]
+    skills_section = ""
+
+    unloaded_skills = [s for s in available_skills if isinstance(s, dict) and s.get("name") not in loaded_skill_names]
+    if unloaded_skills:
+        skills_list = [
+            f"- **{s.get('name', 'unknown')}**: {s.get('description', '')}"
+            for s in unloaded_skills
+            if isinstance(s, dict)
+        ]
+        skills_section += "\n\n## Skills you can load\n\n" + "\n".join(skills_list)
+
+    if loaded_skills:
+        loaded_list = [
+            f"### {s.get('name', 'unknown')}\n{s.get('content', '')}"
+            for s in loaded_skills
+            if isinstance(s, dict) and s.get("name")
+        ]
+        skills_section += "\n## Loaded Skills\n\n" + "\n\n".join(loaded_list)
+    return skills_section
+
+
+def _render_mcps(value) -> str:
+    available_mcps, loaded_mcps = value
+    loaded_mcp_names = [m.get("name") for m in loaded_mcps if isinstance(m, dict) and m.get("name")]
+    mcps_section = ""
+
+    unloaded_mcps = [m for m in available_mcps if isinstance(m, dict) and m.get("name") not in loaded_mcp_names]
+    if unloaded_mcps:
+        mcps_list = []
+        for m in unloaded_mcps:
+            tool_names = m.get("tool_names", [])
+            tool_str = ", ".join(tool_names[:5])
+            if len(tool_names) > 5:
+                tool_str += f" (+{len(tool_names) - 5} more)"
+            if not tool_names and m.get("pending"):
+                tool_str = "not listed yet"
+            mcps_list.append(f"- **{m.get('name', 'unknown')}**: {m.get('description', '')} (tools: {tool_str})")
+        mcps_section += "\n\n## MCP Servers you can load\n\n" + "\n".join(mcps_list)
+
+    if loaded_mcps:
+        loaded_mcp_list = []
+        for m in loaded_mcps:
+            if not isinstance(m, dict):
+                continue
+            tools = m.get("tools", [])
+            tool_names = ", ".join([t.get("name", "") for t in tools if isinstance(t, dict)]) if tools else "no tools"
+            loaded_mcp_list.append(
+                f"### {m.get('name', 'unknown')}\n{m.get('description', '')}\nAvailable tools: {tool_names}"
+            )
+        mcps_section += "\n\n## Loaded MCP Servers\n\n" + "\n\n".join(loaded_mcp_list)
+    return mcps_section
+
+
+def create_model_node(default_tools):
+    """Create the model node.
+
+    The model and MCP registry are per-job and are read from
+    ``config["configurable"]`` so the compiled graph can be shared.
+    """
+    async def model_node(state: dict, config: RunnableConfig):
+        configurable = config.get("configurable", {})
+        model = configurable["model"]
+        mcp_registry = configurable.get("mcp_registry")
         thread_id = state.get("thread_id")
         agent_user_id = state.get("agent_user_id")
         llm_calls = state.get("llm_calls", 0)
@@ -52,8 +122,17 @@ def create_model_node(model, default_tools, mcp_registry):
         loaded_mcp_names = [m.get("name") for m in loaded_mcps if isinstance(m, dict) and m.get("name")]
         available_mcp_names = [m.get("name") for m in available_mcps if isinstance(m, dict) and m.get("name")]
 
-        all_mcp_tools = await mcp_registry.get_all_tools()
-        active_tools = list(default_tools) + [tool for tools in all_mcp_tools.values() for tool in tools]
+        all_mcp_tools = await mcp_registry.get_all_tools() if mcp_registry else {}
+        mcp_tools = [tool for tools in all_mcp_tools.values() for tool in tools]
+        selected_mcp_tools = select_tools(
+            mcp_tools,
+            state.get("messages", []),
+            pinned=state.get("pinned_tools") or [],
+            bound=state.get("bound_tools") or [],
+        )
+        # search_tools is only useful when some tools were left out
+        subset = len(selected_mcp_tools) < len(mcp_tools)
+        active_tools = [t for t in default_tools if subset or t.name != "search_tools"] + selected_mcp_tools
         bound_tool_names = [t.name for t in active_tools] if active_tools else []
         
         log.info(
@@ -69,76 +148,39 @@ def create_model_node(model, default_tools, mcp_registry):
                 "available_mcps": available_mcp_names,
                 "loaded_mcps": loaded_mcp_names,
                 "bound_tools": bound_tool_names,
+                "mcp_tools_available": len(mcp_tools),
                 "message_count": len(state.get("messages", [])),
             },
         )
         
-        skills_section = ""
-        
-        unloaded_skills = [s for s in available_skills if isinstance(s, dict) and s.get("name") not in loaded_skill_names]
-        if unloaded_skills:
-            skills_list = [f"- **{s.get('name', 'unknown')}**: {s.get('description', '')}" for s in unloaded_skills if isinstance(s, dict)]
-            skills_section += "\n\n## Skills you can load\n\n" + "\n".join(skills_list)
-        
-        if loaded_skills:
-            loaded_list = [f"### {s.get('name', 'unknown')}\n{s.get('content', '')}" for s in loaded_skills if isinstance(s, dict) and s.get("name")]
-            skills_section += "\n## Loaded Skills\n\n" + "\n\n".join(loaded_list)
-        
-        
-        mcps_section = ""
-        
-        unloaded_mcps = [m for m in available_mcps if isinstance(m, dict) and m.get("name") not in loaded_mcp_names]
-        if unloaded_mcps:
-            mcps_list = []
-            for m in unloaded_mcps:
-                if not isinstance(m, dict):
-                    continue
-                tool_names = m.get("tool_names", [])
-                tool_str = ", ".join(tool_names[:5])
-                if len(tool_names) > 5:
-                    tool_str += f" (+{len(tool_names) - 5} more)"
-                mcps_list.append(f"- **{m.get('name', 'unknown')}**: {m.get('description', '')} (tools: {tool_str})")
-            mcps_section += "\n\n## MCP Servers you can load\n\n" + "\n".join(mcps_list)
-        
-        if loaded_mcps:
-            loaded_mcp_list = []
-            for m in loaded_mcps:
-                if not isinstance(m, dict):
-                    continue
-                tools = m.get("tools", [])
-                tool_names = ", ".join([t.get("name", "") for t in tools if isinstance(t, dict)]) if tools else "no tools"
-                loaded_mcp_list.append(f"### {m.get('name', 'unknown')}\n{m.get('description', '')}\nAvailable tools: {tool_names}")
-            mcps_section += "\n\n## Loaded MCP Servers\n\n" + "\n\n".join(loaded_mcp_list)
-        
-        # Format agent memory into system prompt
-        agent_memory = state.get("agent_memory", {})
-        memory_section = ""
-        if agent_memory:
-            memory_lines = ["## Agent Memory"]
-            for key, value in agent_memory.items():
-                memory_lines.append(f"### {key}")
-                memory_lines.append(json.dumps(value, indent=2))
-            memory_section = "\n\n" + "\n".join(memory_lines)
-
-        # Check for compaction state - prepend summary to system prompt, slice messages
+        skills_section = memoized("skills", [available_skills, loaded_skills], _render_skills)
+        mcps_section = memoized("mcps", [available_mcps, loaded_mcps], _render_mcps)
+        memory_section = memoized("memory", state.get("agent_memory", {}), render_memory)
+
         compaction_state = state.get("compaction_state", {})
         summary = compaction_state.get("summary", "")
         message_offset = compaction_state.get("message_offset", 0)
 
-        if summary and message_offset > 0:
-            memory_section = "\n\n## Previous Conversation\n" + summary + memory_section
-            visible_messages = state["messages"][message_offset:]
-        else:
-            visible_messages = state["messages"]
+        # Compacted messages are normally archived and removed from state; the
+        # offset only hides ones that could not be archived
+        visible_messages = state["messages"][message_offset:]
 
-        formatted_system_prompt = SYSTEM_PROMPT.format(
+        base_prompt = SYSTEM_PROMPT.format(
             agent_name=state.get("agent_name", "AI Assistant"),
             custom_instructions=state.get("custom_instructions", "")
-        ) + mcps_section + skills_section + memory_section
-        
-        model_with_tools = model.bind_tools(active_tools, tool_choice="auto")
+        )
+        # Most stable first so provider prompt caches keep hitting the prefix
+        system_message = build_system_message(model, [
+            base_prompt,
+            mcps_section + skills_section,
+            memory_section,
+            render_summary(summary),
+        ])
+        formatted_system_prompt = system_message.text
+
+        model_with_tools = tool_binding_cache.bind(model, active_tools, tool_choice="auto")
         
-        messages = [SystemMessage(content=formatted_system_prompt)] + visible_messages
+        messages = [system_message] + visible_messages
         
         log.info(
             "llm_invoking",
@@ -158,7 +200,7 @@ def create_model_node(model, default_tools, mcp_registry):
             },
         )
         
-        response = model_with_tools.invoke(messages)
+        response = await _astream_response(model_with_tools, messages, state)
 
         tool_calls = getattr(response, "tool_calls", []) or []
 
@@ -171,7 +213,10 @@ def create_model_node(model, default_tools, mcp_registry):
         output_tokens = usage.get("output_tokens", 0) or 0
         total_tokens = usage.get("total_tokens", input_tokens + output_tokens)
 
-        current_session = state.get("session_context_size", 0) or 0
+        # Each call re-sends the history, so the context is this call's size,
+        # not a running sum
+        prompt_overhead_tokens = record_usage(response, messages)
+        prompt_cache = cache_usage(response)
         current_total = state.get("tokens_used", 0) or 0
 
         if tool_calls:
@@ -190,6 +235,7 @@ def create_model_node(model, default_tools, mcp_registry):
                     "input_tokens": input_tokens,
                     "output_tokens": output_tokens,
                     "total_tokens": total_tokens,
+                    **prompt_cache,
                 },
             )
         else:
@@ -206,14 +252,66 @@ def create_model_node(model, default_tools, mcp_registry):
                     "input_tokens": input_tokens,
                     "output_tokens": output_tokens,
                     "total_tokens": total_tokens,
+                    **prompt_cache,
                 },
             )
 
         return {
             "messages": [response],
             "llm_calls": new_llm_calls,
-            "session_context_size": current_session + total_tokens,
+            "session_context_size": total_tokens,
+            "prompt_overhead_tokens": prompt_overhead_tokens,
             "tokens_used": current_total + total_tokens,
+            "bound_tools": [t.name for t in selected_mcp_tools],
         }
     
     return model_node
+
+
+class EmptyResponseError(RuntimeError):
+    """The model's stream ended without producing a single chunk."""
+
+
+def stream_message_id(state: dict) -> str:
+    """Id of the streamed message for this model call.
+
+    Derived from the run's message id and call count, so a retried call
+    streams under the same id instead of leaving an orphaned partial message.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_OID, f"{state.get('message_id', '')}:{state.get('llm_calls', 0)}"))
+
+
+async def _astream_response(model_with_tools, messages, state: dict):
+    """Stream the LLM response, forwarding text deltas as coalesced frames.
+
+    Chunks are merged into a single message so tool calls and usage metadata
+    come out the same as with a blocking ``invoke``.
+    """
+    channel = state.get("channel_id")
+    publisher = None
+    if channel:
+        publisher = DeltaCoalescer(
+            events,
+            channel=channel,
+            conversation_id=state.get("conversation_id", ""),
+            sender_id=state.get("agent_user_id", ""),
+            message_id=stream_message_id(state),
+        )
+
+    response = None
+    error = None
+    try:
+        async for chunk in model_with_tools.astream(messages):
+            response = chunk if response is None else response + chunk
+            if publisher:
+                await publisher.push(chunk.text)
+        if response is None:
+            raise EmptyResponseError("The model returned an empty stream")
+    except BaseException as e:
+        error = str(e) or type(e).__name__
+        raise
+    finally:
+        if publisher:
+            await publisher.close(error=error)
+
+    return message_chunk_to_message(response)
@@ -2,7 +2,7 @@
 
 This node runs at the start of each loop iteration (after checkpoint restoration)
 and handles:
-- Fetching pending messages from thread inbox
+- Claiming pending events from the thread inbox (one atomic round trip)
 - Transforming events to HumanMessages
 - Loading MCPs based on event types (connecting + loading tools)
 - Loading skills based on event types
@@ -13,21 +13,24 @@ This consolidates logic previously spread across:
 - fetch_inbox_node (message fetching, skill loading)
 - fetch_agent_memory_node (memory fetching)
 """
+import asyncio
 from typing import Dict, Any, List
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
 from repositories.thread_inbox import thread_inbox_repository
 from repositories.agent_memory import agent_memory_repository
 from core.agents.utils.loader import transform_event, get_hooks_for_event
+from core.agents.utils.tokens import check_context, stamp_tokens
+from core.config import INBOX_CLAIM_BATCH_SIZE
 from core.logging import log
 
 
-def create_sync_node(mcp_registry):
+def create_sync_node():
     async def sync_node(state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
         """Synchronize agent state at start of each iteration.
         
         This node runs after checkpoint restoration and:
-        1. Fetches pending messages from thread inbox
+        1. Claims the next batch of inbox events after the checkpointed cursor
         2. Transforms events to HumanMessages
         3. Connects MCPs based on event types (or defaults if no events)
         4. Loads skills based on event types
@@ -49,6 +52,7 @@ def create_sync_node(mcp_registry):
             - available_mcps: Updated available MCPs (removes failed ones)
             - agent_memory: Memory fetched from remote storage
         """
+        mcp_registry = config.get("configurable", {}).get("mcp_registry")
         thread_id = state.get("thread_id")
         agent_user_id = state.get("agent_user_id")
         llm_calls = state.get("llm_calls", 0)
@@ -63,7 +67,13 @@ def create_sync_node(mcp_registry):
             node="sync_node",
         )
         
-        pending_messages = await thread_inbox_repository.fetch_pending_messages(thread_id)
+        inbox_cursor = state.get("inbox_cursor", 0) or 0
+        pending_messages = await thread_inbox_repository.claim_pending_messages(
+            thread_id,
+            after_seq=inbox_cursor,
+            limit=INBOX_CLAIM_BATCH_SIZE,
+            fence=config.get("configurable", {}).get("lease_fence"),
+        )
         
         if not pending_messages:
             log.debug(
@@ -76,17 +86,10 @@ def create_sync_node(mcp_registry):
             )
             memory_result = await _fetch_agent_memory(state)
             all_mcp_configs = config.get("configurable", {}).get("all_mcp_configs", [])
-            available_mcps = [
-                {
-                    "id": cfg.get("id"),
-                    "name": cfg.get("name", ""),
-                    "description": cfg.get("usage_guidance", ""),
-                    "tool_names": []
-                }
-                for cfg in all_mcp_configs if cfg.get("name")
-            ]
+            available_mcps = _available_mcps(all_mcp_configs, mcp_registry)
             return {
                 "available_mcps": available_mcps,
+                "inbox_backlog": False,
                 **memory_result
             }
         
@@ -149,43 +152,35 @@ def create_sync_node(mcp_registry):
         failed_mcp_names = []
         
         if mcp_registry:
-            mcp_ids_to_connect = [cfg.get("id") for cfg in relevant_mcp_configs if cfg.get("id")]
-            
-            for mcp_id in mcp_ids_to_connect:
+            mcp_configs_to_connect = [cfg for cfg in relevant_mcp_configs if cfg.get("id")]
+
+            async def connect_mcp(cfg) -> bool:
+                # Connect and load tools (populating the tool cache in
+                # PersistentMCPClient so get_all_tools() works)
                 try:
-                    await mcp_registry.connect(mcp_id)
-                    mcp_name = next(
-                        (cfg.get("name") for cfg in relevant_mcp_configs if cfg.get("id") == mcp_id),
-                        mcp_id
-                    )
-                    connected_mcp_names.append(mcp_name)
+                    await mcp_registry.connect(cfg["id"])
+                    await mcp_registry.get_tools_for_mcp(cfg["id"])
+                    return True
                 except Exception as e:
-                    log.warning("mcp_connect_failed", mcp_id=mcp_id, error=str(e), node="sync_node")
-                    failed_mcp_names.append(mcp_id)
-            
-            if connected_mcp_names:
-                await mcp_registry.fetch_all_metadata()
-            
-            # Ensure tools are loaded for all connected MCPs (not just new ones)
-            # This populates the tool cache in PersistentMCPClient so get_all_tools() works
-            for mcp_name in connected_mcp_names:
-                mcp_info = next(
-                    (cfg for cfg in relevant_mcp_configs if cfg.get("name") == mcp_name),
-                    None
-                )
-                if mcp_info:
-                    await mcp_registry.get_tools_for_mcp(mcp_info.get("id"))
-        
-        available_mcps = [
-            {
-                "id": cfg.get("id"),
-                "name": cfg.get("name", ""),
-                "description": cfg.get("usage_guidance", ""),
-                "tool_names": []
-            }
-            for cfg in all_mcp_configs
-            if cfg.get("name") and cfg.get("id") not in failed_mcp_names
-        ]
+                    log.warning("mcp_connect_failed", mcp_id=cfg["id"], error=str(e), node="sync_node")
+                    return False
+
+            # All servers at once: warm-up takes the slowest server, not the sum
+            results = await asyncio.gather(*(connect_mcp(cfg) for cfg in mcp_configs_to_connect))
+            connected_mcp_ids = []
+            for cfg, connected in zip(mcp_configs_to_connect, results):
+                if connected:
+                    connected_mcp_names.append(cfg.get("name") or cfg["id"])
+                    connected_mcp_ids.append(cfg["id"])
+                else:
+                    failed_mcp_names.append(cfg["id"])
+
+            # Only the servers just connected; the background catalog
+            # prefetch covers the rest without holding up the turn
+            if connected_mcp_ids:
+                await mcp_registry.fetch_all_metadata(connected_mcp_ids)
+
+        available_mcps = _available_mcps(all_mcp_configs, mcp_registry, exclude=failed_mcp_names)
         
         matched_skills = matched_skills  # Already set above from hooks
         
@@ -223,14 +218,12 @@ def create_sync_node(mcp_registry):
                         })
         
         new_messages: List[HumanMessage] = []
-        processed_ids: List[str] = []
         
         pending_tool_approval_cleared = False
         
         for msg_data in pending_messages:
             event_type = msg_data["event_type"]
             payload = msg_data["payload"]
-            message_id = msg_data["id"]
             
             if event_type == "com.uvian.ticket.ticket_resolved":
                 approval_status = payload.get("approvalStatus")
@@ -249,11 +242,14 @@ def create_sync_node(mcp_registry):
                 new_messages.append(event_message)
             else:
                 new_messages.append(HumanMessage(content=f"Event received: {event_type}"))
-            
-            processed_ids.append(message_id)
+
+        for message in new_messages:
+            stamp_tokens(message)
         
-        if processed_ids:
-            await thread_inbox_repository.mark_processed(processed_ids)
+        # Claimed rows are acknowledged by the next claim once this cursor
+        # has been checkpointed, so a crash here redelivers them instead of
+        # losing them.
+        new_cursor = max(msg["seq"] for msg in pending_messages)
         
         memory_result = await _fetch_agent_memory(state)
         
@@ -266,6 +262,7 @@ def create_sync_node(mcp_registry):
             node="sync_node",
             extra={
                 "messages_added": len(new_messages),
+                "inbox_cursor": new_cursor,
                 "event_types": unique_event_types,
                 "new_skills_loaded": [s.get("name") for s in new_skills],
                 "new_mcps_loaded": [m.get("name") for m in new_mcps],
@@ -279,6 +276,8 @@ def create_sync_node(mcp_registry):
             "loaded_skills": new_skills,
             "loaded_mcps": new_mcps,
             "available_mcps": available_mcps,
+            "inbox_cursor": new_cursor,
+            "inbox_backlog": len(pending_messages) >= INBOX_CLAIM_BATCH_SIZE,
             **memory_result
         }
         
@@ -290,6 +289,41 @@ def create_sync_node(mcp_registry):
     return sync_node
 
 
+def route_after_sync(state: Dict[str, Any], config: RunnableConfig) -> str:
+    """End the run when there is nothing to respond to.
+
+    A wakeup folded into a run that already drained the inbox claims no
+    events; the last message is then the model's own reply and calling the
+    model again would only repeat it. Tool results and claimed events still
+    go to the model (through compaction if needed).
+    """
+    messages = state.get("messages") or []
+    if not messages or isinstance(messages[-1], AIMessage):
+        return "cleanup_node"
+    return check_context(state, config)
+
+
+def _available_mcps(all_mcp_configs: List[Dict[str, Any]], mcp_registry, exclude=()) -> List[Dict[str, Any]]:
+    """Loadable MCPs with tool names from the catalog as known so far.
+
+    Servers still being prefetched are marked ``pending`` rather than waited on.
+    """
+    catalog = mcp_registry.get_catalog() if mcp_registry else {}
+    available = []
+    for cfg in all_mcp_configs:
+        if not cfg.get("name") or cfg.get("id") in exclude:
+            continue
+        entry = catalog.get(cfg.get("id"), {})
+        available.append({
+            "id": cfg.get("id"),
+            "name": cfg.get("name", ""),
+            "description": cfg.get("usage_guidance", ""),
+            "tool_names": entry.get("tool_names", []),
+            "pending": entry.get("pending", True),
+        })
+    return available
+
+
 async def _fetch_agent_memory(state: Dict[str, Any]) -> Dict[str, Any]:
     """Fetch agent memory from remote storage."""
     thread_id = state.get("thread_id")
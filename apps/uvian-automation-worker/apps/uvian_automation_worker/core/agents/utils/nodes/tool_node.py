@@ -39,7 +39,9 @@ Typical Usage:
 
 from __future__ import annotations
 
-from clients.mcp import MCPRegistry
+from clients.mcp import MCP_SERVER_KEY, MCP_SERVER_NAME, MCPRegistry
+from clients.mcp_breaker import CircuitOpenError, ToolDeadlineError, mcp_circuit_breakers
+from clients.mcp_pool import is_session_error
 import asyncio
 import inspect
 import json
@@ -89,6 +91,7 @@ from langgraph.store.base import BaseStore  # noqa: TC002
 from langgraph.types import Command, Send, StreamWriter
 from pydantic import BaseModel, ValidationError
 from typing_extensions import TypeVar, Unpack
+from core.config import MCP_TOOL_TIMEOUT_SECONDS
 from core.logging import log
 
 if TYPE_CHECKING:
@@ -378,6 +381,33 @@ class ToolInvocationError(ToolException):
         super().__init__(self.message)
 
 
+def _isolated_tool_message(
+    call: ToolCall, error: CircuitOpenError | ToolDeadlineError
+) -> ToolMessage:
+    """Error ToolMessage for a call stopped by its MCP server's breaker or deadline."""
+    if isinstance(error, CircuitOpenError):
+        artifact = {
+            "error": "circuit_open",
+            "mcp_server": error.server,
+            "retry_after_seconds": round(error.retry_after, 1),
+        }
+        content = (
+            f"Error: {error}. The call was not attempted; try again in "
+            f"{artifact['retry_after_seconds']}s or continue without this server."
+        )
+    else:
+        artifact = {"error": "deadline_exceeded", "mcp_server": error.server}
+        content = f"Error: {error}. It was cancelled; it may have partially run."
+    log.warning("tool_isolated", tool_name=call["name"], **artifact)
+    return ToolMessage(
+        content=content,
+        name=call["name"],
+        tool_call_id=call["id"],
+        status="error",
+        artifact=artifact,
+    )
+
+
 def _default_handle_tool_errors(e: Exception) -> str:
     """Default error handler for tool errors.
 
@@ -766,7 +796,9 @@ class ToolNode(RunnableCallable):
             awrap_tool_call: Async wrapper function to intercept tool execution.
                 If not provided, falls back to wrap_tool_call for async execution.
             mcp_registry: Optional MCPRegistry for dynamically resolving tools from
-                loaded MCPs at runtime.
+                loaded MCPs at runtime. When omitted, the registry is read from
+                ``config["configurable"]["mcp_registry"]`` on each call so one
+                compiled graph can serve many jobs.
         """
         super().__init__(self._func, self._afunc, name=name, tags=tags, trace=False)
         self._tools_by_name: dict[str, BaseTool] = {}
@@ -776,7 +808,6 @@ class ToolNode(RunnableCallable):
         self._wrap_tool_call = wrap_tool_call
         self._awrap_tool_call = awrap_tool_call
         self._mcp_registry = mcp_registry
-        self._mcp_tool_cache: dict[str, BaseTool] = {}
         for tool in tools:
             if not isinstance(tool, BaseTool):
                 tool_ = create_tool(cast("type[BaseTool]", tool))
@@ -786,54 +817,56 @@ class ToolNode(RunnableCallable):
             # Build injected args mapping once during initialization in a single pass
             self._injected_args[tool_.name] = _get_all_injected_args(tool_)
 
-    async def _resolve_tool_from_mcp_registry(self, tool_name: str) -> BaseTool | None:
-        if not self._mcp_registry:
+    def _registry_for(self, config: RunnableConfig | None) -> Any:
+        """Get the MCP registry of the job this call belongs to."""
+        if self._mcp_registry:
+            return self._mcp_registry
+        return (config or {}).get("configurable", {}).get("mcp_registry")
+
+    async def _resolve_tool_from_mcp_registry(
+        self, tool_name: str, mcp_registry: Any
+    ) -> BaseTool | None:
+        # MCP tools are bound to the job's sessions, so they are never cached on
+        # the node itself: the node is shared by every job using the graph.
+        if not isinstance(mcp_registry, MCPRegistry):
             return None
-        if tool_name in self._mcp_tool_cache:
-            return self._mcp_tool_cache[tool_name]
         try:
-            if not isinstance(self._mcp_registry, MCPRegistry):
-                return None
-            if not self._mcp_registry._client:
+            if not mcp_registry._client:
                 log.warning("mcp_registry_client_not_ready", tool_name=tool_name)
                 return None
-            tool_cache_keys = list(self._mcp_registry._client._tool_cache.keys()) if self._mcp_registry._client._tool_cache else []
+            tool_cache_keys = list(mcp_registry._client._tool_cache.keys()) if mcp_registry._client._tool_cache else []
             log.warning(
                 "resolve_tool_attempt",
                 tool_name=tool_name,
                 tool_cache_keys=tool_cache_keys,
             )
-            for mcp_id in self._mcp_registry._client._tool_cache:
-                tools = await self._mcp_registry.get_tools_for_mcp(mcp_id)
+            for mcp_id in tool_cache_keys:
+                tools = await mcp_registry.get_tools_for_mcp(mcp_id)
                 for tool in tools:
-                    self._mcp_tool_cache[tool.name] = tool
                     if tool.name == tool_name:
                         return tool
         except Exception as e:
             log.error("resolve_tool_error", tool_name=tool_name, error=str(e))
         return None
 
-    def _resolve_tool_from_mcp_registry_sync(self, tool_name: str) -> BaseTool | None:
-        if not self._mcp_registry:
+    def _resolve_tool_from_mcp_registry_sync(
+        self, tool_name: str, mcp_registry: Any
+    ) -> BaseTool | None:
+        if not isinstance(mcp_registry, MCPRegistry):
             return None
-        if tool_name in self._mcp_tool_cache:
-            return self._mcp_tool_cache[tool_name]
         try:
-            if not isinstance(self._mcp_registry, MCPRegistry):
-                return None
-            if not self._mcp_registry._client:
+            if not mcp_registry._client:
                 log.warning("mcp_registry_client_not_ready_sync", tool_name=tool_name)
                 return None
-            tool_cache_keys = list(self._mcp_registry._client._tool_cache.keys()) if self._mcp_registry._client._tool_cache else []
+            tool_cache_keys = list(mcp_registry._client._tool_cache.keys()) if mcp_registry._client._tool_cache else []
             log.warning(
                 "resolve_tool_sync_attempt",
                 tool_name=tool_name,
                 tool_cache_keys=tool_cache_keys,
             )
-            for mcp_id in self._mcp_registry._client._tool_cache:
-                tools = self._mcp_registry._client._tool_cache.get(mcp_id, [])
+            for mcp_id in tool_cache_keys:
+                tools = mcp_registry._client._tool_cache.get(mcp_id, [])
                 for tool in tools:
-                    self._mcp_tool_cache[tool.name] = tool
                     if tool.name == tool_name:
                         return tool
         except Exception as e:
@@ -900,10 +933,14 @@ class ToolNode(RunnableCallable):
             )
             tool_runtimes.append(tool_runtime)
 
+        # One deadline for the whole step, so a hung MCP server cannot hold
+        # up the calls that already finished
+        deadline = asyncio.get_running_loop().time() + MCP_TOOL_TIMEOUT_SECONDS
+
         # Pass original tool calls without injection
         coros = []
         for call, tool_runtime in zip(tool_calls, tool_runtimes, strict=False):
-            coros.append(self._arun_one(call, input_type, tool_runtime))  # type: ignore[arg-type]
+            coros.append(self._arun_one(call, input_type, tool_runtime, deadline))  # type: ignore[arg-type]
         outputs = await asyncio.gather(*coros, return_exceptions=True)
 
         return self._combine_tool_outputs(outputs, input_type)
@@ -1080,17 +1117,15 @@ class ToolNode(RunnableCallable):
         # Validation is deferred to _execute_tool_sync to allow interceptors
         # to short-circuit requests for unregistered tools
         tool = self.tools_by_name.get(call["name"])
-        if tool is None and self._mcp_registry:
-            tool = self._resolve_tool_from_mcp_registry_sync(call["name"])
+        mcp_registry = self._registry_for(tool_runtime.config)
+        if tool is None and mcp_registry:
+            tool = self._resolve_tool_from_mcp_registry_sync(call["name"], mcp_registry)
             log.warning(
                 "mcp_tool_resolved_sync",
                 tool_name=call["name"],
                 resolved=tool is not None,
                 tool_type=str(type(tool)) if tool else None,
             )
-            if tool:
-                self._tools_by_name[tool.name] = tool
-                self._injected_args[tool.name] = _get_all_injected_args(tool)
 
         # Create the tool request with state and runtime
         tool_request = ToolCallRequest(
@@ -1144,6 +1179,7 @@ class ToolNode(RunnableCallable):
         request: ToolCallRequest,
         input_type: Literal["list", "dict", "tool_calls"],
         config: RunnableConfig,
+        deadline: float | None = None,
     ) -> ToolMessage | Command:
         """Execute tool call asynchronously with configured error handling.
 
@@ -1151,6 +1187,7 @@ class ToolNode(RunnableCallable):
             request: Tool execution request.
             input_type: Input format.
             config: Runnable configuration.
+            deadline: Event-loop time by which MCP tool calls must finish.
 
         Returns:
             ToolMessage or Command.
@@ -1185,7 +1222,11 @@ class ToolNode(RunnableCallable):
                     ainvoke_type=str(type(getattr(tool, 'ainvoke', None))),
                     call_args_keys=list(call_args.keys()),
                 )
-                response = await tool.ainvoke(call_args, config)
+                server = (tool.metadata or {}).get(MCP_SERVER_KEY)
+                if server is not None:
+                    response = await self._ainvoke_mcp_tool(tool, server, call_args, config, deadline)
+                else:
+                    response = await tool.ainvoke(call_args, config)
             except ValidationError as exc:
                 # Filter out errors for injected arguments
                 injected = self._injected_args.get(call["name"])
@@ -1206,6 +1247,10 @@ class ToolNode(RunnableCallable):
         # (2 and 3 can happen in a "supervisor w/ tools" multi-agent architecture)
         except GraphBubbleUp:
             raise
+        except (CircuitOpenError, ToolDeadlineError) as e:
+            # Always answered, never raised: the node must not be retried
+            # (re-running every call) because one server is down or slow
+            return _isolated_tool_message(call, e)
         except Exception as e:
             # Determine which exception types are handled
             handled_types: tuple[type[Exception], ...]
@@ -1248,11 +1293,43 @@ class ToolNode(RunnableCallable):
         msg = f"Tool {call['name']} returned unexpected type: {type(response)}"
         raise TypeError(msg)
 
+    async def _ainvoke_mcp_tool(
+        self,
+        tool: BaseTool,
+        server: tuple,
+        call_args: dict[str, Any],
+        config: RunnableConfig,
+        deadline: float | None,
+    ) -> Any:
+        """Invoke an MCP tool under its server's breaker and deadline.
+
+        A session error, or a failure that opens the breaker, drops the job's
+        session to the server, so later calls (including the half-open probe)
+        run on a new session instead of the broken one.
+        """
+        try:
+            return await mcp_circuit_breakers.call(
+                server,
+                tool.metadata.get(MCP_SERVER_NAME, ""),
+                call_args["name"],
+                lambda: tool.ainvoke(call_args, config),
+                deadline or asyncio.get_running_loop().time() + MCP_TOOL_TIMEOUT_SECONDS,
+            )
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            if is_session_error(e) or mcp_circuit_breakers.is_open(server):
+                mcp_registry = self._registry_for(config)
+                if isinstance(mcp_registry, MCPRegistry):
+                    mcp_registry.invalidate(server)
+            raise
+
     async def _arun_one(
         self,
         call: ToolCall,
         input_type: Literal["list", "dict", "tool_calls"],
         tool_runtime: ToolRuntime,
+        deadline: float | None = None,
     ) -> ToolMessage | Command:
         """Execute single tool call asynchronously with awrap_tool_call wrapper if configured.
 
@@ -1260,6 +1337,7 @@ class ToolNode(RunnableCallable):
             call: Tool call dict.
             input_type: Input format.
             tool_runtime: Tool runtime.
+            deadline: Event-loop time by which MCP tool calls must finish.
 
         Returns:
             ToolMessage or Command.
@@ -1267,17 +1345,15 @@ class ToolNode(RunnableCallable):
         # Validation is deferred to _execute_tool_async to allow interceptors
         # to short-circuit requests for unregistered tools
         tool = self.tools_by_name.get(call["name"])
-        if tool is None and self._mcp_registry:
-            tool = await self._resolve_tool_from_mcp_registry(call["name"])
+        mcp_registry = self._registry_for(tool_runtime.config)
+        if tool is None and mcp_registry:
+            tool = await self._resolve_tool_from_mcp_registry(call["name"], mcp_registry)
             log.warning(
                 "mcp_tool_resolved",
                 tool_name=call["name"],
                 resolved=tool is not None,
                 tool_type=str(type(tool)) if tool else None,
             )
-            if tool:
-                self._tools_by_name[tool.name] = tool
-                self._injected_args[tool.name] = _get_all_injected_args(tool)
 
         # Create the tool request with state and runtime
         tool_request = ToolCallRequest(
@@ -1291,12 +1367,12 @@ class ToolNode(RunnableCallable):
 
         if self._awrap_tool_call is None and self._wrap_tool_call is None:
             # No wrapper - execute directly
-            return await self._execute_tool_async(tool_request, input_type, config)
+            return await self._execute_tool_async(tool_request, input_type, config, deadline)
 
         # Define async execute callable that can be called multiple times
         async def execute(req: ToolCallRequest) -> ToolMessage | Command:
             """Execute tool with given request. Can be called multiple times."""
-            return await self._execute_tool_async(req, input_type, config)
+            return await self._execute_tool_async(req, input_type, config, deadline)
 
         def _sync_execute(req: ToolCallRequest) -> ToolMessage | Command:
             """Sync execute fallback for sync wrapper."""
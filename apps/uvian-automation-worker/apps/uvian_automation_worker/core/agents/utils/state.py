@@ -1,11 +1,20 @@
 from langchain.messages import AnyMessage
+from langgraph.graph.message import add_messages
 from typing import TypedDict, List, Dict, Any
 from typing_extensions import TypedDict, Annotated
 import operator
+from core.config import TOOL_PINNED_MAX
+
+
+def pin_tools(current: List[str], new: List[str]) -> List[str]:
+    """Pinned tool names without duplicates, keeping the TOOL_PINNED_MAX most
+    recently pinned (oldest first)."""
+    names = list(dict.fromkeys(reversed((current or []) + (new or []))))
+    return names[:TOOL_PINNED_MAX][::-1]
 
 
 class MessagesState(TypedDict):
-    messages: Annotated[list[AnyMessage], operator.add]
+    messages: Annotated[list[AnyMessage], add_messages]
     llm_calls: int
     agent_name: str
     transcript: str
@@ -14,6 +23,10 @@ class MessagesState(TypedDict):
     channel_id: str
     loaded_skills: Annotated[List[Dict[str, Any]], operator.add]
     loaded_mcps: Annotated[List[Dict[str, Any]], operator.add]
+    pinned_tools: Annotated[List[str], pin_tools]
+    # MCP tools bound so far this run; only grows until compaction resets it,
+    # so the tool prefix of the prompt stays cacheable
+    bound_tools: List[str]
     available_skills: List[Dict[str, str]]
     available_mcps: List[Dict[str, str]]
     conversation_id: str
@@ -24,9 +37,12 @@ class MessagesState(TypedDict):
     agent_user_id: str
     execution_id: str
     inbox_messages_added: int
+    inbox_cursor: int
+    inbox_backlog: bool
     agent_memory: Dict[str, Any]
     compaction_state: Dict[str, Any]
     session_context_size: int
+    prompt_overhead_tokens: int
     tokens_used: int
     pending_tool_approval: Dict[str, Any] | None
 
@@ -0,0 +1,96 @@
+"""
+System prompt assembly for provider prompt caching.
+
+Providers cache the longest previously seen prompt prefix (OpenAI does it
+automatically, Anthropic up to ``cache_control`` breakpoints), so the system
+prompt is assembled from segments ordered from most to least stable:
+
+1. base instructions (static per agent)
+2. skills and MCP sections (change when something is loaded)
+3. agent memory (changes when memory is written)
+4. compaction summary (changes on every compaction)
+
+Section rendering is memoized by a hash of its inputs, and rendering is
+deterministic (sorted keys) so identical inputs always yield identical bytes.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List
+
+from langchain_core.messages import AIMessage, SystemMessage
+
+from core.config import PROMPT_SECTION_CACHE_SIZE
+
+# Chat model modules that accept ``cache_control`` on system content blocks.
+# Other models get a plain string and rely on automatic prefix caching.
+CACHE_CONTROL_MODULES = ("langchain_anthropic",)
+# Anthropic allows at most four cache breakpoints per request
+MAX_CACHE_BREAKPOINTS = 4
+
+_rendered: "OrderedDict[tuple, str]" = OrderedDict()
+
+
+def content_key(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def memoized(section: str, value: Any, render: Callable[[Any], str]) -> str:
+    """Render a section once per distinct input."""
+    key = (section, content_key(value))
+    text = _rendered.get(key)
+    if text is None:
+        text = render(value)
+        _rendered[key] = text
+        while len(_rendered) > PROMPT_SECTION_CACHE_SIZE:
+            _rendered.popitem(last=False)
+    else:
+        _rendered.move_to_end(key)
+    return text
+
+
+def render_memory(agent_memory: Dict[str, Any]) -> str:
+    if not agent_memory:
+        return ""
+    memory_lines = ["## Agent Memory"]
+    for key in sorted(agent_memory):
+        memory_lines.append(f"### {key}")
+        memory_lines.append(json.dumps(agent_memory[key], indent=2, sort_keys=True, default=str))
+    return "\n\n" + "\n".join(memory_lines)
+
+
+def render_summary(summary: str) -> str:
+    return "\n\n## Previous Conversation\n" + summary if summary else ""
+
+
+def supports_cache_control(model: Any) -> bool:
+    return type(model).__module__.startswith(CACHE_CONTROL_MODULES)
+
+
+def build_system_message(model: Any, segments: List[str]) -> SystemMessage:
+    """Join segments (most stable first), marking cache breakpoints when the
+    provider supports them."""
+    segments = [s for s in segments if s]
+    if not supports_cache_control(model):
+        return SystemMessage(content="".join(segments))
+    # The last segments are the most volatile; keep the breakpoints on the
+    # stable prefix if there are more segments than breakpoints
+    marked = set(range(min(len(segments), MAX_CACHE_BREAKPOINTS)))
+    blocks = []
+    for i, text in enumerate(segments):
+        block = {"type": "text", "text": text}
+        if i in marked:
+            block["cache_control"] = {"type": "ephemeral"}
+        blocks.append(block)
+    return SystemMessage(content=blocks)
+
+
+def cache_usage(response: AIMessage) -> Dict[str, int]:
+    """Prompt-cache token counts reported by the provider."""
+    usage = response.usage_metadata or {}
+    details = usage.get("input_token_details") or {}
+    return {
+        "cache_read_tokens": details.get("cache_read", 0) or 0,
+        "cache_creation_tokens": details.get("cache_creation", 0) or 0,
+    }
@@ -1,12 +1,180 @@
+"""
+Context size estimation for routing to compaction.
+
+The projected prompt is the visible messages plus the prompt overhead (system
+prompt and tool schemas) measured by the last model call. Message counts are
+cached in each message's ``response_metadata`` so they are computed once and
+survive checkpoints; the model's own usage is used for its responses.
+
+Counts use a tiktoken encoding once ``prewarm_tokenizer`` has loaded it and a
+characters-per-token estimate until then. The encoding may need a download,
+so it is loaded on a worker thread in the background, never on the event
+loop; images bake it into TIKTOKEN_CACHE_DIR at build time.
+"""
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+
+from core.agents.utils.nodes.compaction_node import RECENT_TO_KEEP
 from core.agents.utils.state import MessagesState
+from core.config import (
+    CONTEXT_COMPACTION_RATIO,
+    CONTEXT_DEFAULT_WINDOW,
+    CONTEXT_RESERVED_OUTPUT_TOKENS,
+    TOKENIZER_ENCODING,
+    TOKENIZER_PREWARM_TIMEOUT_SECONDS,
+)
+from core.logging import log
+
+# Longest matching prefix of the lowercased model name wins
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-3.5": 16_385,
+    "gpt-4": 8_192,
+    "gpt-4-turbo": 128_000,
+    "gpt-4o": 128_000,
+    "gpt-4.1": 1_047_576,
+    "gpt-5": 400_000,
+    "o1": 200_000,
+    "o3": 200_000,
+    "o4": 200_000,
+    "claude": 200_000,
+    "gemini-1.5": 1_048_576,
+    "gemini-2": 1_048_576,
+    "minimax": 204_800,
+}
+
+CHARS_PER_TOKEN = 4
+# Role and framing tokens each message adds to the prompt
+MESSAGE_OVERHEAD_TOKENS = 4
+TOKEN_COUNT_KEY = "token_count"
+FALLBACK_METHOD = "chars"
+
+_encoding = None
+
+
+def prewarm_tokenizer() -> None:
+    """Load the tokenizer encoding; counts use the estimate if this fails."""
+    global _encoding
+    try:
+        import tiktoken
+
+        _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+        log.info("tokenizer_loaded", encoding=TOKENIZER_ENCODING)
+    except Exception as e:
+        log.warning("tokenizer_unavailable", encoding=TOKENIZER_ENCODING, error=str(e))
+
+
+async def aprewarm_tokenizer(timeout: float = TOKENIZER_PREWARM_TIMEOUT_SECONDS) -> None:
+    """Load the encoding off the event loop, giving up after ``timeout``.
+
+    A load still running then keeps going on its thread and is picked up by
+    later counts if it finishes.
+    """
+    try:
+        await asyncio.wait_for(asyncio.to_thread(prewarm_tokenizer), timeout=timeout)
+    except asyncio.TimeoutError:
+        log.warning("tokenizer_prewarm_timeout", encoding=TOKENIZER_ENCODING, timeout=timeout)
+
+
+def _method() -> str:
+    return _encoding.name if _encoding is not None else FALLBACK_METHOD
+
+
+def count_text(text: str) -> int:
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // CHARS_PER_TOKEN + 1
 
-def check_context(state: MessagesState) -> str:
-    MAX_TOKENS = 20500
-    SAFETY_BUFFER = 500
-    TRIGGER_THRESHOLD = MAX_TOKENS - SAFETY_BUFFER
 
-    context_size = state.get("session_context_size", 0)
+def _message_text(message: BaseMessage) -> str:
+    content = message.content
+    text = content if isinstance(content, str) else json.dumps(content, default=str)
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        text += json.dumps(tool_calls, default=str)
+    return text
 
-    if context_size > TRIGGER_THRESHOLD:
+
+def stamp_tokens(message: BaseMessage, tokens: Optional[int] = None, method: Optional[str] = None) -> int:
+    """Record a message's token count in its metadata and return it."""
+    if tokens is None:
+        method = _method()
+        tokens = count_text(_message_text(message)) + MESSAGE_OVERHEAD_TOKENS
+    message.response_metadata[TOKEN_COUNT_KEY] = [method or _method(), tokens]
+    return tokens
+
+
+def message_tokens(message: BaseMessage) -> int:
+    """Cached token count of a message; estimates are redone once the
+    tokenizer is available."""
+    cached = message.response_metadata.get(TOKEN_COUNT_KEY)
+    if cached and (cached[0] != FALLBACK_METHOD or _encoding is None):
+        return cached[1]
+    return stamp_tokens(message)
+
+
+def count_messages(messages: List[BaseMessage]) -> int:
+    return sum(message_tokens(m) for m in messages)
+
+
+def context_window(model: Any, override: Optional[int] = None) -> int:
+    """Context window of a chat model from the registry (or an explicit override)."""
+    if override:
+        return int(override)
+    name = str(getattr(model, "model_name", None) or getattr(model, "model", None) or "").lower()
+    matches = [prefix for prefix in MODEL_CONTEXT_WINDOWS if name.startswith(prefix)]
+    if not matches:
+        return CONTEXT_DEFAULT_WINDOW
+    return MODEL_CONTEXT_WINDOWS[max(matches, key=len)]
+
+
+def reserved_output_tokens(model: Any) -> int:
+    return getattr(model, "max_tokens", None) or CONTEXT_RESERVED_OUTPUT_TOKENS
+
+
+def visible_messages(state: MessagesState) -> List[BaseMessage]:
+    offset = (state.get("compaction_state") or {}).get("message_offset", 0) or 0
+    return state.get("messages", [])[offset:]
+
+
+def check_context(state: MessagesState, config: RunnableConfig) -> str:
+    """Route to compaction when the projected prompt would not fit the model."""
+    configurable = config.get("configurable", {})
+    model = configurable.get("model")
+    window = context_window(model, configurable.get("context_window"))
+    budget = int(window * CONTEXT_COMPACTION_RATIO) - reserved_output_tokens(model)
+
+    messages = visible_messages(state)
+    projected = (state.get("prompt_overhead_tokens", 0) or 0) + count_messages(messages)
+    compactable = sum(1 for m in messages if not isinstance(m, SystemMessage)) > RECENT_TO_KEEP
+
+    if projected > budget and compactable:
+        log.info(
+            "context_compaction_triggered",
+            thread_id=state.get("thread_id"),
+            projected_tokens=projected,
+            budget=budget,
+            context_window=window,
+        )
         return "compaction_node"
-    return "model_node"
\ No newline at end of file
+    return "model_node"
+
+
+def record_usage(response: AIMessage, prompt_messages: List[BaseMessage]) -> int:
+    """Stamp the response with its reported output tokens and return the prompt
+    overhead (system prompt + tool schemas) implied by the reported input."""
+    usage = response.usage_metadata or {}
+    output_tokens = usage.get("output_tokens") or 0
+    if output_tokens:
+        stamp_tokens(response, output_tokens + MESSAGE_OVERHEAD_TOKENS, "usage")
+    else:
+        stamp_tokens(response)
+    input_tokens = usage.get("input_tokens") or 0
+    if not input_tokens:
+        return count_messages([m for m in prompt_messages if isinstance(m, SystemMessage)])
+    return max(0, input_tokens - count_messages([m for m in prompt_messages if not isinstance(m, SystemMessage)]))
@@ -0,0 +1,103 @@
+"""
+Memoized tool binding.
+
+``model.bind_tools`` converts every tool's schema to the provider format on
+each call. Here the converted schema is cached per tool fingerprint (name,
+description and a hash of the argument schema; the fingerprint itself is
+cached on the tool object) and the bound model is cached per model and
+tool-set fingerprint, so steady-state turns reuse both.
+
+Models are keyed by identity: ``create_llm`` returns the same instance for the
+same credential and job parameters, so bindings are shared across jobs too.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from core.config import TOOL_BINDING_CACHE_SIZE, TOOL_SCHEMA_CACHE_SIZE
+
+FINGERPRINT_KEY = "schema_fingerprint"
+
+
+def tool_fingerprint(tool: BaseTool) -> str:
+    metadata = tool.metadata or {}
+    fingerprint = metadata.get(FINGERPRINT_KEY)
+    if fingerprint:
+        return fingerprint
+    schema = tool.args_schema if isinstance(tool.args_schema, dict) else tool.args
+    payload = json.dumps([tool.name, tool.description, schema], sort_keys=True, default=str)
+    fingerprint = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    tool.metadata = {**metadata, FINGERPRINT_KEY: fingerprint}
+    return fingerprint
+
+
+class ToolBindingCache:
+    """LRU caches of converted tool schemas and tool-bound models."""
+
+    def __init__(
+        self,
+        max_bindings: int = TOOL_BINDING_CACHE_SIZE,
+        max_schemas: int = TOOL_SCHEMA_CACHE_SIZE,
+    ):
+        self.max_bindings = max_bindings
+        self.max_schemas = max_schemas
+        self._schemas: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # (id(model), tool-set fingerprint) -> (model, bound); the model is
+        # kept so its id cannot be reused while the entry lives
+        self._bound: "OrderedDict[Tuple[int, str], Tuple[Any, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _put(cache: OrderedDict, key, value, max_size: int) -> None:
+        cache[key] = value
+        while len(cache) > max_size:
+            cache.popitem(last=False)
+
+    def schema(self, tool: BaseTool) -> Dict[str, Any]:
+        """Provider-format (OpenAI function) schema of a tool, converted once."""
+        fingerprint = tool_fingerprint(tool)
+        schema = self._schemas.get(fingerprint)
+        if schema is None:
+            schema = convert_to_openai_tool(tool)
+            self._put(self._schemas, fingerprint, schema, self.max_schemas)
+        else:
+            self._schemas.move_to_end(fingerprint)
+        return schema
+
+    def bind(self, model: Any, tools: List[BaseTool], tool_choice: str = "auto") -> Any:
+        """``model.bind_tools`` memoized per model instance and tool set."""
+        fingerprints = [tool_fingerprint(t) for t in tools] + [tool_choice]
+        key = (id(model), hashlib.sha256("|".join(fingerprints).encode("utf-8")).hexdigest())
+        entry = self._bound.get(key)
+        if entry is not None and entry[0] is model:
+            self._bound.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        # Chat models accept OpenAI-format dicts and pass them through unchanged
+        bound = model.bind_tools([self.schema(t) for t in tools], tool_choice=tool_choice)
+        self._put(self._bound, key, (model, bound), self.max_bindings)
+        return bound
+
+    def discard(self, models: List[Any]) -> None:
+        """Drop the bindings of models that are being closed."""
+        ids = {id(model) for model in models}
+        for key in [key for key in self._bound if key[0] in ids]:
+            del self._bound[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "bindings": len(self._bound),
+            "schemas": len(self._schemas),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Singleton instance
+tool_binding_cache = ToolBindingCache()
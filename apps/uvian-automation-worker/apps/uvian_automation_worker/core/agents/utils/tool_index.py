@@ -0,0 +1,124 @@
+"""
+Relevance-based subset of MCP tools to bind each turn.
+
+Connected MCP servers can expose dozens of tools; binding all of them adds
+thousands of schema tokens to every prompt. Once more than
+TOOL_SUBSET_MIN_TOOLS are connected, only the TOOL_SUBSET_TOP_K tools whose
+names and descriptions best match the recent messages (BM25) are bound, plus
+pinned tools: ones called recently and ones the model found with
+``search_tools``. Tools bound earlier in the run stay bound, so the subset
+only grows (until compaction resets it) and the prompt prefix stays cached.
+"""
+import hashlib
+import math
+import re
+from collections import Counter, OrderedDict
+from typing import Iterable, List, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.tools import BaseTool
+
+from core.agents.utils.tool_binding import tool_fingerprint
+from core.config import (
+    TOOL_INDEX_CACHE_SIZE,
+    TOOL_SUBSET_MIN_TOOLS,
+    TOOL_SUBSET_QUERY_MESSAGES,
+    TOOL_SUBSET_TOP_K,
+)
+
+_WORD = re.compile(r"[a-z0-9]+")
+_CAMEL = re.compile(r"([a-z0-9])([A-Z])")
+
+
+def _stem(word: str) -> str:
+    # Plural folding is enough for tool names ("tickets" -> "ticket")
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(word) for word in _WORD.findall(_CAMEL.sub(r"\1 \2", text).lower())]
+
+
+class ToolIndex:
+    """BM25 index over tool names (weighted twice) and descriptions."""
+
+    def __init__(self, tools: Sequence[BaseTool], k1: float = 1.5, b: float = 0.75):
+        self.tools = list(tools)
+        self.k1 = k1
+        self.b = b
+        docs = [tokenize(f"{t.name} {t.name} {t.description or ''}") for t in self.tools]
+        self._tf = [Counter(doc) for doc in docs]
+        self._lengths = [len(doc) for doc in docs]
+        self._avg_length = sum(self._lengths) / len(docs) if docs else 0.0
+        df = Counter(term for tf in self._tf for term in tf)
+        n = len(docs)
+        self._idf = {term: math.log(1 + (n - count + 0.5) / (count + 0.5)) for term, count in df.items()}
+
+    def search(self, query: str, k: int) -> List[BaseTool]:
+        """Top-k matching tools, best first; tools with no matching term are left out."""
+        terms = [term for term in set(tokenize(query)) if term in self._idf]
+        if not terms:
+            return []
+        scores = []
+        for i, tf in enumerate(self._tf):
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / (self._avg_length or 1))
+            score = sum(
+                self._idf[term] * tf[term] * (self.k1 + 1) / (tf[term] + norm)
+                for term in terms
+                if term in tf
+            )
+            if score > 0:
+                scores.append((score, i))
+        scores.sort(key=lambda item: (-item[0], item[1]))
+        return [self.tools[i] for _, i in scores[:k]]
+
+
+_indexes: "OrderedDict[str, ToolIndex]" = OrderedDict()
+
+
+def tool_index_for(tools: Sequence[BaseTool]) -> ToolIndex:
+    """Index for a tool set, built once per distinct set."""
+    key = hashlib.sha256("|".join(tool_fingerprint(t) for t in tools).encode("utf-8")).hexdigest()
+    index = _indexes.get(key)
+    if index is None:
+        index = ToolIndex(tools)
+        _indexes[key] = index
+        while len(_indexes) > TOOL_INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    else:
+        _indexes.move_to_end(key)
+    return index
+
+
+def _recent_context(messages: Sequence[BaseMessage]) -> tuple:
+    """Query text and called tool names from the last few messages."""
+    parts = []
+    called = set()
+    for message in messages[-TOOL_SUBSET_QUERY_MESSAGES:]:
+        content = message.content
+        parts.append(content if isinstance(content, str) else str(content))
+        if isinstance(message, AIMessage):
+            # Called tools are kept anyway; leave them out of the query
+            called.update(call.get("name") for call in message.tool_calls)
+    return " ".join(parts), called
+
+
+def select_tools(
+    tools: Sequence[BaseTool],
+    messages: Sequence[BaseMessage],
+    pinned: Iterable[str] = (),
+    bound: Iterable[str] = (),
+) -> List[BaseTool]:
+    """Tools to bind this turn, in their original order (stable bindings).
+
+    ``pinned`` is already deduplicated and capped by the state reducer;
+    ``bound`` are the tools bound earlier in the run, which are kept.
+    """
+    if len(tools) <= TOOL_SUBSET_MIN_TOOLS:
+        return list(tools)
+    query, called = _recent_context(messages)
+    keep = called | set(pinned) | set(bound)
+    keep.update(t.name for t in tool_index_for(tools).search(query, TOOL_SUBSET_TOP_K))
+    return [t for t in tools if t.name in keep]
@@ -2,6 +2,8 @@ from langchain.tools import tool, ToolRuntime
 from langgraph.types import Command
 from langchain_core.messages import ToolMessage
 from clients.mcp import MCPRegistry
+from core.agents.utils.tool_index import tool_index_for
+from core.config import TOOL_SEARCH_RESULTS
 
 
 def flatten_skill_content(content: dict, prefix: str = "") -> str:
@@ -154,6 +156,8 @@ def list_mcps(
         
         if tool_names:
             lines.append(f"  Tools: {', '.join(tool_names)}")
+        elif mcp.get("pending"):
+            lines.append("  Tools: not listed yet (load it to see them)")
         
         lines.append("")
     
@@ -257,4 +261,51 @@ async def load_mcp(
     )
 
 
-tools = [load_skill, list_mcps, load_mcp]
+search_tools_schema = {
+    "type": "object",
+    "properties": {
+        "query": {"type": "string"},
+    },
+    "required": ["query"]
+}
+
+
+@tool(args_schema=search_tools_schema)
+async def search_tools(
+        runtime: ToolRuntime | None = None, **kargs) -> Command:
+    """Search the tools of loaded MCP servers and make the matches available to you.
+
+    When many MCP tools are loaded, only the ones most relevant to the conversation are
+    offered each turn. Use this when a loaded MCP should have a tool you cannot see.
+
+    Args:
+        query: What the tool should do (e.g., "send discord message", "list open tickets")
+    """
+    query = kargs["query"]
+    registry = runtime.config["configurable"].get("mcp_registry")
+    all_tools = await registry.get_all_tools() if registry else {}
+    mcp_tools = [t for tools in all_tools.values() for t in tools]
+
+    matches = tool_index_for(mcp_tools).search(query, TOOL_SEARCH_RESULTS) if mcp_tools else []
+    if not matches:
+        return Command(update={
+            "messages": [ToolMessage(
+                f"No loaded MCP tools match '{query}'. Use list_mcps to see MCPs you can load.",
+                tool_call_id=runtime.tool_call_id,
+            )]
+        })
+
+    lines = []
+    for t in matches:
+        summary = (t.description or "").strip().split("\n")[0]
+        lines.append(f"- {t.name}: {summary}")
+    return Command(update={
+        "pinned_tools": [t.name for t in matches],
+        "messages": [ToolMessage(
+            "Tools now available:\n" + "\n".join(lines),
+            tool_call_id=runtime.tool_call_id,
+        )]
+    })
+
+
+tools = [load_skill, list_mcps, load_mcp, search_tools]
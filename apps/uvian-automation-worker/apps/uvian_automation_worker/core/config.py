@@ -14,3 +14,135 @@ QUEUE_NAME = "main-queue"
 UVIAN_AUTOMATION_API_URL = os.getenv("UVIAN_AUTOMATION_API_URL", "http://localhost:3001")
 UVIAN_INTERNAL_API_KEY = os.getenv("UVIAN_INTERNAL_API_KEY")
 HF_TOKEN = os.getenv("HF_TOKEN")
+
+# Supabase (PostgREST) connection pool
+SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", 20))
+SUPABASE_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("SUPABASE_MAX_KEEPALIVE_CONNECTIONS", 10))
+SUPABASE_TIMEOUT_SECONDS = float(os.getenv("SUPABASE_TIMEOUT_SECONDS", 10))
+
+# Token streaming - deltas are coalesced into frames before hitting pub/sub
+STREAM_FLUSH_INTERVAL_SECONDS = float(os.getenv("STREAM_FLUSH_INTERVAL_SECONDS", 0.15))
+STREAM_FLUSH_MAX_CHARS = int(os.getenv("STREAM_FLUSH_MAX_CHARS", 512))
+
+# LLM client pool - model clients are shared across jobs per credential
+LLM_POOL_IDLE_TTL_SECONDS = float(os.getenv("LLM_POOL_IDLE_TTL_SECONDS", 900))
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", 100))
+LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS", 120))
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "false").lower() == "true"
+
+# LLM rate limiting - "memory" (per process) or "redis" (shared by all replicas)
+LLM_RATE_LIMIT_BACKEND = os.getenv("LLM_RATE_LIMIT_BACKEND", "memory")
+LLM_RATE_LIMIT_MIN_RPS = float(os.getenv("LLM_RATE_LIMIT_MIN_RPS", 0.05))
+
+# Compiled agent graphs are cached per LLM config / hook set fingerprint
+AGENT_GRAPH_CACHE_SIZE = int(os.getenv("AGENT_GRAPH_CACHE_SIZE", 128))
+
+# Thread lease - one agent execution per thread across all workers
+THREAD_LEASE_TTL_SECONDS = float(os.getenv("THREAD_LEASE_TTL_SECONDS", 60))
+# Shortest delay before a wakeup handed back to the queue runs again
+THREAD_WAKEUP_RETRY_DELAY_SECONDS = float(os.getenv("THREAD_WAKEUP_RETRY_DELAY_SECONDS", 5))
+
+# Thread inbox - claim batch cap and retention of processed events
+INBOX_CLAIM_BATCH_SIZE = int(os.getenv("INBOX_CLAIM_BATCH_SIZE", 50))
+INBOX_RETENTION_SECONDS = int(os.getenv("INBOX_RETENTION_SECONDS", 86400))
+INBOX_RETENTION_SWEEP_INTERVAL_SECONDS = float(os.getenv("INBOX_RETENTION_SWEEP_INTERVAL_SECONDS", 3600))
+
+# Checkpoints - append-only channels are stored as deltas, with a full
+# snapshot every N writes to bound the chain replayed on restore
+CHECKPOINT_FULL_SNAPSHOT_EVERY = int(os.getenv("CHECKPOINT_FULL_SNAPSHOT_EVERY", 20))
+
+# Direct Postgres connection (checkpoint storage). Use a session-mode or
+# direct connection string; with a transaction-mode pooler set
+# DATABASE_STATEMENT_CACHE_SIZE=0 since prepared statements are not shared.
+DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_POOL_MIN_SIZE = int(os.getenv("DATABASE_POOL_MIN_SIZE", 1))
+DATABASE_POOL_MAX_SIZE = int(os.getenv("DATABASE_POOL_MAX_SIZE", 10))
+DATABASE_STATEMENT_CACHE_SIZE = int(os.getenv("DATABASE_STATEMENT_CACHE_SIZE", 100))
+
+# Checkpoint storage - "postgres" (binary bytea over DATABASE_URL) or "postgrest"
+CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "postgres" if DATABASE_URL else "postgrest")
+CHECKPOINT_COMPRESSION = os.getenv("CHECKPOINT_COMPRESSION", "zstd")
+CHECKPOINT_COMPRESSION_MIN_BYTES = int(os.getenv("CHECKPOINT_COMPRESSION_MIN_BYTES", 512))
+CHECKPOINT_COMPRESSION_LEVEL = int(os.getenv("CHECKPOINT_COMPRESSION_LEVEL", 3))
+
+# Checkpoint durability - "sync" (store before the next step), "async"
+# (ordered write-behind, at most N queued writes) or "turn" (store only at
+# turn boundaries and on completion)
+CHECKPOINT_DURABILITY = os.getenv("CHECKPOINT_DURABILITY", "sync")
+CHECKPOINT_WRITE_QUEUE_SIZE = int(os.getenv("CHECKPOINT_WRITE_QUEUE_SIZE", 16))
+
+# Checkpoint cache - latest checkpoint per thread kept in process (LRU bounded
+# by stored bytes) and optionally materialized in Redis for other replicas
+CHECKPOINT_CACHE_MAX_BYTES = int(os.getenv("CHECKPOINT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+CHECKPOINT_CACHE_REDIS = os.getenv("CHECKPOINT_CACHE_REDIS", "false").lower() == "true"
+CHECKPOINT_CACHE_REDIS_TTL_SECONDS = int(os.getenv("CHECKPOINT_CACHE_REDIS_TTL_SECONDS", 3600))
+
+# Checkpoint values stored at or above this size are (de)serialized on a
+# worker thread instead of the event loop
+CHECKPOINT_SERDE_OFFLOAD_BYTES = int(os.getenv("CHECKPOINT_SERDE_OFFLOAD_BYTES", 64 * 1024))
+CHECKPOINT_SERDE_WORKERS = int(os.getenv("CHECKPOINT_SERDE_WORKERS", 2))
+
+# Compaction - tool outputs are truncated to this many (estimated) tokens in
+# the summary prompt; every N same-tier summaries are merged into one
+COMPACTION_TOOL_OUTPUT_TOKENS = int(os.getenv("COMPACTION_TOOL_OUTPUT_TOKENS", 500))
+COMPACTION_SUMMARY_FANOUT = int(os.getenv("COMPACTION_SUMMARY_FANOUT", 4))
+
+# Compaction map-reduce - backlogs estimated above COMPACTION_MAP_REDUCE_TOKENS
+# are split into chunks summarized concurrently, then reduced
+COMPACTION_MAP_REDUCE_TOKENS = int(os.getenv("COMPACTION_MAP_REDUCE_TOKENS", 8000))
+COMPACTION_CHUNK_TOKENS = int(os.getenv("COMPACTION_CHUNK_TOKENS", 4000))
+COMPACTION_MAP_CONCURRENCY = int(os.getenv("COMPACTION_MAP_CONCURRENCY", 4))
+COMPACTION_CHUNK_TIMEOUT_SECONDS = float(os.getenv("COMPACTION_CHUNK_TIMEOUT_SECONDS", 60))
+
+# Context accounting - compaction starts when the projected prompt exceeds
+# CONTEXT_COMPACTION_RATIO of the model's window (minus reserved output).
+# CONTEXT_DEFAULT_WINDOW applies to models missing from the registry.
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "o200k_base")
+TOKENIZER_PREWARM_TIMEOUT_SECONDS = float(os.getenv("TOKENIZER_PREWARM_TIMEOUT_SECONDS", 30))
+CONTEXT_DEFAULT_WINDOW = int(os.getenv("CONTEXT_DEFAULT_WINDOW", 32768))
+CONTEXT_RESERVED_OUTPUT_TOKENS = int(os.getenv("CONTEXT_RESERVED_OUTPUT_TOKENS", 4096))
+CONTEXT_COMPACTION_RATIO = float(os.getenv("CONTEXT_COMPACTION_RATIO", 0.8))
+
+# System prompt - rendered sections memoized by content hash
+PROMPT_SECTION_CACHE_SIZE = int(os.getenv("PROMPT_SECTION_CACHE_SIZE", 512))
+
+# Tool binding - memoized provider schemas and tool-bound models
+TOOL_BINDING_CACHE_SIZE = int(os.getenv("TOOL_BINDING_CACHE_SIZE", 256))
+TOOL_SCHEMA_CACHE_SIZE = int(os.getenv("TOOL_SCHEMA_CACHE_SIZE", 4096))
+
+# Tool subset - with more than TOOL_SUBSET_MIN_TOOLS MCP tools connected, only
+# the TOOL_SUBSET_TOP_K most relevant (plus pinned) are bound per turn
+TOOL_SUBSET_MIN_TOOLS = int(os.getenv("TOOL_SUBSET_MIN_TOOLS", 24))
+TOOL_SUBSET_TOP_K = int(os.getenv("TOOL_SUBSET_TOP_K", 12))
+TOOL_SUBSET_QUERY_MESSAGES = int(os.getenv("TOOL_SUBSET_QUERY_MESSAGES", 4))
+TOOL_PINNED_MAX = int(os.getenv("TOOL_PINNED_MAX", 16))
+TOOL_SEARCH_RESULTS = int(os.getenv("TOOL_SEARCH_RESULTS", 5))
+TOOL_INDEX_CACHE_SIZE = int(os.getenv("TOOL_INDEX_CACHE_SIZE", 64))
+
+# MCP session pool - sessions shared across jobs per (url, auth identity)
+MCP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("MCP_CONNECT_TIMEOUT_SECONDS", 15))
+MCP_METADATA_TIMEOUT_SECONDS = float(os.getenv("MCP_METADATA_TIMEOUT_SECONDS", 10))
+MCP_CATALOG_PREFETCH_DEADLINE_SECONDS = float(os.getenv("MCP_CATALOG_PREFETCH_DEADLINE_SECONDS", 30))
+MCP_POOL_IDLE_TTL_SECONDS = float(os.getenv("MCP_POOL_IDLE_TTL_SECONDS", 600))
+MCP_POOL_PING_INTERVAL_SECONDS = float(os.getenv("MCP_POOL_PING_INTERVAL_SECONDS", 60))
+MCP_JWT_TTL_SECONDS = int(os.getenv("MCP_JWT_TTL_SECONDS", 3600))
+MCP_AUTH_REFRESH_MARGIN_SECONDS = float(os.getenv("MCP_AUTH_REFRESH_MARGIN_SECONDS", 300))
+
+# MCP tool catalog - tool names, descriptions and schema hashes per
+# (url, auth identity), shared across jobs and optionally through Redis.
+# Entries older than the TTL are served while revalidated in the background.
+MCP_CATALOG_TTL_SECONDS = float(os.getenv("MCP_CATALOG_TTL_SECONDS", 300))
+MCP_CATALOG_CACHE_SIZE = int(os.getenv("MCP_CATALOG_CACHE_SIZE", 512))
+MCP_CATALOG_REDIS = os.getenv("MCP_CATALOG_REDIS", "false").lower() == "true"
+MCP_CATALOG_REDIS_TTL_SECONDS = int(os.getenv("MCP_CATALOG_REDIS_TTL_SECONDS", 86400))
+
+# MCP tool calls - each tool step gets one deadline; calls are capped per
+# server (and per tool, 0 = unlimited) and consecutive failures open the
+# server's circuit breaker for MCP_BREAKER_RESET_SECONDS
+MCP_TOOL_TIMEOUT_SECONDS = float(os.getenv("MCP_TOOL_TIMEOUT_SECONDS", 60))
+MCP_SERVER_CONCURRENCY = int(os.getenv("MCP_SERVER_CONCURRENCY", 8))
+MCP_TOOL_CONCURRENCY = int(os.getenv("MCP_TOOL_CONCURRENCY", 0))
+MCP_BREAKER_FAILURE_THRESHOLD = int(os.getenv("MCP_BREAKER_FAILURE_THRESHOLD", 5))
+MCP_BREAKER_RESET_SECONDS = float(os.getenv("MCP_BREAKER_RESET_SECONDS", 30))
+MCP_BREAKER_STATS_INTERVAL_SECONDS = float(os.getenv("MCP_BREAKER_STATS_INTERVAL_SECONDS", 60))
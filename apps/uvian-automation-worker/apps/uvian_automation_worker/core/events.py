@@ -1,6 +1,15 @@
 import redis.asyncio as redis
-from .config import REDIS_HOST, REDIS_PORT, REDIS_PASSWORD, REDIS_FAMILY
+from .config import (
+    REDIS_HOST,
+    REDIS_PORT,
+    REDIS_PASSWORD,
+    REDIS_FAMILY,
+    STREAM_FLUSH_INTERVAL_SECONDS,
+    STREAM_FLUSH_MAX_CHARS,
+)
+from .logging import log
 import json
+import time
 
 class EventsClient:
     def __init__(self):
@@ -35,7 +44,18 @@ class EventsClient:
             
         await self.redis.publish(channel, json.dumps(payload))
 
-    async def publish_message(self, channel: str, conversation_id: str, sender_id:str, message_id: str, content: str, role: str = "assistant", is_delta: bool = False, is_complete: bool = False):
+    async def publish_message(
+        self,
+        channel: str,
+        conversation_id: str,
+        sender_id: str,
+        message_id: str,
+        content: str,
+        role: str = "assistant",
+        is_delta: bool = False,
+        is_complete: bool = False,
+        error: str = None,
+    ):
         """
         Publishes a message or delta to the specified channel using the new new_message format.
         """
@@ -57,7 +77,94 @@ class EventsClient:
             "isDelta": is_delta,
             "isComplete": is_complete
         }
+        if error:
+            payload["error"] = error
         
         await self.redis.publish(channel, json.dumps(payload))
 
+
+class DeltaCoalescer:
+    """Buffers token deltas and publishes them as bounded frames.
+
+    Provider streams emit one chunk per token, which would mean one Redis
+    publish per token. Deltas are held until either ``max_chars`` have
+    accumulated or ``flush_interval`` seconds have passed since the last
+    frame, keeping pub/sub traffic bounded regardless of model speed.
+    Publish failures are logged and never interrupt the LLM call.
+
+    Every stream ends with ``close()``: a complete frame, or an error frame
+    telling clients to discard the partial message when the call failed.
+    """
+
+    def __init__(
+        self,
+        client: "EventsClient",
+        channel: str,
+        conversation_id: str,
+        sender_id: str,
+        message_id: str,
+        flush_interval: float = STREAM_FLUSH_INTERVAL_SECONDS,
+        max_chars: int = STREAM_FLUSH_MAX_CHARS,
+    ):
+        self.client = client
+        self.channel = channel
+        self.conversation_id = conversation_id
+        self.sender_id = sender_id
+        self.message_id = message_id
+        self.flush_interval = flush_interval
+        self.max_chars = max_chars
+        self._buffer: list[str] = []
+        self._buffered_chars = 0
+        self._last_flush = time.monotonic()
+        self.frames_published = 0
+
+    async def push(self, delta: str) -> None:
+        if not delta:
+            return
+        self._buffer.append(delta)
+        self._buffered_chars += len(delta)
+        if (
+            self._buffered_chars >= self.max_chars
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            await self.flush()
+
+    async def flush(self, is_complete: bool = False) -> None:
+        if not self._buffer and not is_complete:
+            return
+        content = "".join(self._buffer)
+        self._buffer.clear()
+        self._buffered_chars = 0
+        self._last_flush = time.monotonic()
+        await self._publish(content, is_delta=True, is_complete=is_complete)
+
+    async def _publish(self, content: str, **frame) -> None:
+        try:
+            await self.client.publish_message(
+                self.channel,
+                self.conversation_id,
+                self.sender_id,
+                self.message_id,
+                content,
+                **frame,
+            )
+            self.frames_published += 1
+        except Exception as e:
+            log.warning("delta_publish_failed", channel=self.channel, message_id=self.message_id, error=str(e))
+
+    async def close(self, error: str = None) -> None:
+        """Flush any trailing delta and mark the message complete.
+
+        With ``error`` the buffered delta is dropped and an empty, non-delta
+        frame carrying the error resets the partial message instead; a retry
+        streams it again under the same message id.
+        """
+        if error is None:
+            await self.flush(is_complete=True)
+            return
+        self._buffer.clear()
+        self._buffered_chars = 0
+        await self._publish("", is_delta=False, is_complete=False, error=error)
+
+
 events = EventsClient()
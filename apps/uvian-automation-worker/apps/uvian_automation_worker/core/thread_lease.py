@@ -0,0 +1,263 @@
+import asyncio
+import uuid
+from typing import Optional
+
+from .config import THREAD_LEASE_TTL_SECONDS
+from .logging import log
+
+# Take the lease, or record a pending wakeup for the current holder.
+# KEYS: lease, fence counter, pending flag. ARGV: owner, ttl ms, pending ttl s.
+# Returns the new fencing token, or {minus the lease's remaining ms, 1 if
+# this call created the pending flag} when the thread is already running.
+# The flag holds the owner of the wakeup that created it.
+_ACQUIRE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+  local created = 1
+  if not redis.call('SET', KEYS[3], ARGV[1], 'NX', 'EX', ARGV[3]) then
+    redis.call('EXPIRE', KEYS[3], ARGV[3])
+    created = 0
+  end
+  return {-math.max(redis.call('PTTL', KEYS[1]), 0), created}
+end
+local fence = redis.call('INCR', KEYS[2])
+redis.call('SET', KEYS[1], fence .. ':' .. ARGV[1], 'PX', ARGV[2])
+redis.call('DEL', KEYS[3])
+return fence
+"""
+
+# Take the lease only if the wakeups recorded by ``check`` are still pending
+# and nobody holds the thread, i.e. the holder died without running them.
+# KEYS: lease, fence counter, pending flag. ARGV: owner, ttl ms, check.
+# Returns the new fencing token, minus the lease's remaining ms (< 0) while
+# it is held, or 0 when the wakeups were already handled.
+_TAKE_ORPHANED_SCRIPT = """
+if redis.call('GET', KEYS[3]) ~= ARGV[3] then
+  return 0
+end
+if redis.call('EXISTS', KEYS[1]) == 1 then
+  return -math.max(redis.call('PTTL', KEYS[1]), 1)
+end
+local fence = redis.call('INCR', KEYS[2])
+redis.call('SET', KEYS[1], fence .. ':' .. ARGV[1], 'PX', ARGV[2])
+redis.call('DEL', KEYS[3])
+return fence
+"""
+
+# Extend the lease if we still hold it. KEYS: lease. ARGV: holder, ttl ms.
+_RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Release unless wakeups arrived meanwhile. KEYS: lease, pending flag.
+# ARGV: holder, ttl ms. Returns 1 released, 0 pending (lease kept), -1 lost.
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+  return -1
+end
+if redis.call('DEL', KEYS[2]) == 1 then
+  redis.call('PEXPIRE', KEYS[1], ARGV[2])
+  return 0
+end
+redis.call('DEL', KEYS[1])
+return 1
+"""
+
+# Drop the lease and any pending wakeups. KEYS: lease, pending flag.
+# ARGV: holder. Returns 1 if wakeups were pending, else 0.
+_ABANDON_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  redis.call('DEL', KEYS[1])
+  return redis.call('DEL', KEYS[2])
+end
+return 0
+"""
+
+_PENDING_TTL_SECONDS = 86400
+
+
+class LeaseLostError(Exception):
+    """Raised when a thread's lease has passed to another execution."""
+
+
+class ThreadLease:
+    """Distributed per-thread lease with fencing tokens.
+
+    Only one agent execution runs per thread across all workers. A wakeup
+    arriving while the thread is held sets a pending flag instead of starting
+    a second run; the holder sees the flag on ``release()`` and runs again, so
+    the wakeup is folded into the running execution and its own job is done.
+    The wakeup that sets the flag also schedules a check for when the lease
+    would run out: ``take_orphaned()`` only runs the thread if the holder
+    died (the lease expired) with the wakeups still pending.
+
+    Each acquisition gets a monotonically increasing fencing token. Writers
+    call ``ensure_held()`` before persisting so a run whose lease expired (e.g.
+    after a long GC pause) cannot overwrite the new holder's checkpoints.
+
+    If Redis is unreachable the lease degrades to a no-op and the job runs
+    unguarded rather than failing.
+    """
+
+    def __init__(self, client, thread_id: str, ttl_seconds: float = THREAD_LEASE_TTL_SECONDS):
+        self.client = client
+        self.thread_id = thread_id
+        self.ttl_ms = int(ttl_seconds * 1000)
+        self.owner = str(uuid.uuid4())
+        self.token: Optional[int] = None
+        self.degraded = False
+        self.lost = False
+        # Seconds left on the holder's lease when ``acquire()`` returned False
+        self.retry_after = 0.0
+        # Whether that wakeup was the first one recorded for the holder; its
+        # owner id then identifies the pending wakeups for ``take_orphaned()``
+        self.recorded_pending = False
+        self._lease_key = f"thread_lease:{thread_id}"
+        self._fence_key = f"thread_lease:{thread_id}:fence"
+        self._pending_key = f"thread_lease:{thread_id}:pending"
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    @property
+    def holder(self) -> str:
+        return f"{self.token}:{self.owner}"
+
+    @property
+    def held(self) -> bool:
+        return self.token is not None and not self.lost
+
+    async def _eval(self, script: str, keys: list, args: list):
+        if not self.client.redis:
+            await self.client.connect()
+        return await self.client.redis.eval(script, len(keys), *keys, *args)
+
+    async def acquire(self) -> bool:
+        """Try to take the lease.
+
+        Returns False when another execution holds the thread; the wakeup
+        has then been recorded for that execution to pick up.
+        """
+        try:
+            result = await self._eval(
+                _ACQUIRE_SCRIPT,
+                [self._lease_key, self._fence_key, self._pending_key],
+                [self.owner, self.ttl_ms, _PENDING_TTL_SECONDS],
+            )
+        except Exception as e:
+            log.warning("thread_lease_unavailable", thread_id=self.thread_id, error=str(e))
+            self.degraded = True
+            return True
+
+        if isinstance(result, list):
+            remaining_ms, created = result
+            self.retry_after = -remaining_ms / 1000
+            self.recorded_pending = bool(created)
+            return False
+        return self._taken(result)
+
+    async def take_orphaned(self, check: str) -> bool:
+        """Take the lease for wakeups the holder never got to.
+
+        ``check`` is the owner id of the wakeup that recorded them. Returns
+        False when they were already handled (``retry_after`` is 0) or the
+        holder still runs (``retry_after`` is the time left on its lease).
+        """
+        try:
+            result = await self._eval(
+                _TAKE_ORPHANED_SCRIPT,
+                [self._lease_key, self._fence_key, self._pending_key],
+                [self.owner, self.ttl_ms, check],
+            )
+        except Exception as e:
+            # Nothing is lost: the next wakeup of the thread drains the inbox
+            log.warning("thread_lease_unavailable", thread_id=self.thread_id, error=str(e))
+            return False
+        if result <= 0:
+            self.retry_after = -result / 1000
+            return False
+        log.info("thread_lease_taken_over", thread_id=self.thread_id)
+        return self._taken(result)
+
+    def _taken(self, token: int) -> bool:
+        self.token = int(token)
+        self._heartbeat = asyncio.create_task(self._renew_loop())
+        log.info("thread_lease_acquired", thread_id=self.thread_id, fence=self.token)
+        return True
+
+    async def _renew_loop(self) -> None:
+        interval = self.ttl_ms / 3000
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                renewed = await self._eval(_RENEW_SCRIPT, [self._lease_key], [self.holder, self.ttl_ms])
+            except Exception as e:
+                # Keep going; the lease survives until the TTL runs out
+                log.warning("thread_lease_renew_failed", thread_id=self.thread_id, error=str(e))
+                continue
+            if not renewed:
+                self.lost = True
+                log.warning("thread_lease_lost", thread_id=self.thread_id, fence=self.token)
+                return
+
+    async def ensure_held(self) -> None:
+        """Raise LeaseLostError if another execution now owns the thread."""
+        if self.degraded or self.token is None:
+            return
+        if not self.lost:
+            try:
+                renewed = await self._eval(_RENEW_SCRIPT, [self._lease_key], [self.holder, self.ttl_ms])
+            except Exception as e:
+                log.warning("thread_lease_check_failed", thread_id=self.thread_id, error=str(e))
+                return
+            self.lost = not renewed
+        if self.lost:
+            raise LeaseLostError(f"Lease on thread {self.thread_id} (fence {self.token}) was lost")
+
+    async def release(self) -> bool:
+        """Release the lease unless wakeups arrived during the run.
+
+        Returns False when wakeups were folded in; the lease is kept and the
+        caller must run the thread again before releasing.
+        """
+        if self.degraded or self.token is None:
+            return True
+        try:
+            status = await self._eval(
+                _RELEASE_SCRIPT,
+                [self._lease_key, self._pending_key],
+                [self.holder, self.ttl_ms],
+            )
+        except Exception as e:
+            log.warning("thread_lease_release_failed", thread_id=self.thread_id, error=str(e))
+            status = 1
+        if status == 0:
+            return False
+        if status == -1:
+            self.lost = True
+            log.warning("thread_lease_lost", thread_id=self.thread_id, fence=self.token)
+        self._stop_heartbeat()
+        self.token = None
+        return True
+
+    async def abandon(self) -> bool:
+        """Drop the lease unconditionally, e.g. after a failed run.
+
+        Returns True when wakeups were pending; they are not folded into a
+        run, so the caller must hand the thread back to the queue.
+        """
+        self._stop_heartbeat()
+        if self.degraded or self.token is None:
+            return False
+        pending = 0
+        try:
+            pending = await self._eval(_ABANDON_SCRIPT, [self._lease_key, self._pending_key], [self.holder])
+        except Exception as e:
+            log.warning("thread_lease_release_failed", thread_id=self.thread_id, error=str(e))
+        self.token = None
+        return bool(pending)
+
+    def _stop_heartbeat(self) -> None:
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
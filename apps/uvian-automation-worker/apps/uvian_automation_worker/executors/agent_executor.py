@@ -3,8 +3,12 @@
 AgentExecutor - Simplified agent startup executor.
 
 Responsibilities:
+- Hold the thread lease so only one execution runs per thread; wakeups that
+  arrive meanwhile are folded into the running execution and complete as
+  no-ops
 - Fetch agent secrets (LLM config, MCP configs, skills)
 - Register all MCP configs with PersistentMCPClient (but don't connect)
+- Start the background MCP catalog prefetch (tool metadata only)
 - Build initial config for agent (available_skills, available_mcps)
 - Pass control to agent graph where sync_node handles event processing
 
@@ -17,12 +21,20 @@ The sync_node (in agent graph) handles:
 """
 from typing import Optional, Dict
 from executors.base import BaseExecutor, JobData, JobResult
+from langgraph.checkpoint.base import ERROR
+from langgraph.constants import CONFIG_KEY_CHECKPOINTER
 from core.agents.universal_agent.agent import build_agent
+from core.agents.utils.models import create_llm, release_llm
 from clients.mcp import PersistentMCPClient, MCPRegistry
 from clients.auth import get_agent_secrets
 from clients.config import get_agent_skills, get_agent_hooks
+from clients.wakeup_queue import wakeup_queue
+from core.config import THREAD_WAKEUP_RETRY_DELAY_SECONDS
 from core.agents.utils.memory.base_memory import PostgresAsyncCheckpointer
 from core.agents.utils.memory.selective_checkpointer import SelectiveCheckpointer
+from repositories.thread_inbox import thread_inbox_repository
+from core.events import events
+from core.thread_lease import ThreadLease
 from core.logging import log
 import uuid
 
@@ -48,15 +60,52 @@ class AgentExecutor(BaseExecutor):
         if not thread_id or not agent_user_id:
             raise ValueError("threadId and agentId are required for thread-wakeup jobs")
         
-        execution_id = str(uuid.uuid4())
-        log.info(
-            "agent_execution_start",
-            execution_id=execution_id,
-            job_id=job_id,
-            thread_id=thread_id,
-            agent_user_id=agent_user_id,
-        )
-        
+        lease = ThreadLease(events, thread_id)
+        check = inputs.get("leaseCheck")
+        acquired = await (lease.take_orphaned(check) if check else lease.acquire())
+        if not acquired:
+            # Another execution owns the thread; it re-checks the inbox
+            # before finishing, so this wakeup's events are handled there.
+            # Only the first wakeup recorded for the holder schedules a
+            # check for when its lease would run out, which runs the events
+            # only if the holder died first.
+            check = check or (lease.owner if lease.recorded_pending else None)
+            if check and lease.retry_after > 0:
+                await wakeup_queue.enqueue(
+                    job_id, max(lease.retry_after, THREAD_WAKEUP_RETRY_DELAY_SECONDS), check=check
+                )
+            log.info(
+                "thread_wakeup_coalesced",
+                job_id=job_id,
+                thread_id=thread_id,
+                agent_user_id=agent_user_id,
+                holder_running=lease.retry_after > 0,
+            )
+            return {
+                "status": "completed",
+                "result": {
+                    "thread_id": thread_id,
+                    "agent_id": agent_user_id,
+                    "coalesced": True,
+                },
+            }
+
+        try:
+            return await self._run_thread(job_id, thread_id, agent_user_id, lease)
+        finally:
+            if await lease.abandon():
+                # The run failed with wakeups folded into it; they still
+                # need a run of their own
+                log.info("thread_wakeup_pending_after_failure", job_id=job_id, thread_id=thread_id)
+                await wakeup_queue.enqueue(job_id, THREAD_WAKEUP_RETRY_DELAY_SECONDS)
+
+    async def _run_thread(
+        self,
+        job_id: str,
+        thread_id: str,
+        agent_user_id: str,
+        lease: ThreadLease,
+    ) -> JobResult:
         secrets = await get_agent_secrets(agent_user_id)
         print(secrets)
         
@@ -79,6 +128,7 @@ class AgentExecutor(BaseExecutor):
                     "requests_per_second": additional_config.get("requests_per_second"),
                     "streaming": additional_config.get("streaming", True),
                     "stream_usage": additional_config.get("stream_usage", True),
+                    "context_window": additional_config.get("context_window"),
                 }
         
         all_mcp_configs = secrets.get("mcps", [])
@@ -134,11 +184,75 @@ class AgentExecutor(BaseExecutor):
         base_checkpointer = PostgresAsyncCheckpointer()
         checkpointer = SelectiveCheckpointer(
             base_checkpointer,
-            exclude_keys=["agent_memory"]
+            exclude_keys=["agent_memory"],
+            lease=lease,
         )
-            
+
+        try:
+            while True:
+                execution_id = str(uuid.uuid4())
+                log.info(
+                    "agent_execution_start",
+                    execution_id=execution_id,
+                    job_id=job_id,
+                    thread_id=thread_id,
+                    agent_user_id=agent_user_id,
+                    fence=lease.token,
+                )
+                result = await self._run_agent(
+                    thread_id=thread_id,
+                    agent_user_id=agent_user_id,
+                    execution_id=execution_id,
+                    llm_config=llm_config,
+                    all_mcp_configs=all_mcp_configs,
+                    all_skills=all_skills,
+                    available_skills=available_skills,
+                    available_mcps=available_mcps,
+                    available_hooks=available_hooks,
+                    checkpointer=checkpointer,
+                )
+                if result["status"] != "completed":
+                    return result
+                inbox_cursor = result["result"].pop("inbox_cursor", 0)
+                if result["result"].pop("inbox_backlog", False):
+                    # The last claim hit the batch cap; keep draining under the lease
+                    log.info("thread_inbox_backlog", job_id=job_id, thread_id=thread_id)
+                    continue
+                if inbox_cursor:
+                    # The cursor is checkpointed; acknowledge the last batch now
+                    # rather than on the thread's next claim
+                    await thread_inbox_repository.acknowledge(thread_id, inbox_cursor)
+                if await lease.release():
+                    return result
+                # Wakeups arrived while running: drain the inbox again under the
+                # same lease instead of letting them start a parallel run.
+                log.info(
+                    "thread_wakeup_folded",
+                    job_id=job_id,
+                    thread_id=thread_id,
+                    execution_id=execution_id,
+                )
+        finally:
+            await checkpointer.aclose()
+
+    async def _run_agent(
+        self,
+        thread_id: str,
+        agent_user_id: str,
+        execution_id: str,
+        llm_config: dict,
+        all_mcp_configs: list,
+        all_skills: list,
+        available_skills: list,
+        available_mcps: list,
+        available_hooks: list,
+        checkpointer: SelectiveCheckpointer,
+    ) -> JobResult:
         async with PersistentMCPClient() as persistent_client:
             persistent_client.register_all(all_mcp_configs)
+            # Catalog metadata for servers the run may never connect is
+            # gathered off the critical path
+            persistent_client.start_catalog_prefetch()
             mcp_registry = MCPRegistry(client=persistent_client)
             
             channel = f"agent:{agent_user_id}:messages"
@@ -148,6 +262,7 @@ class AgentExecutor(BaseExecutor):
                 "loaded_skills": [],
                 "available_mcps": available_mcps,
                 "loaded_mcps": [],
+                "bound_tools": [],
                 "available_hooks": available_hooks,
                 "custom_instructions": "",
                 "agent_name": "Agent",
@@ -164,7 +279,11 @@ class AgentExecutor(BaseExecutor):
             config = {
                 "configurable": {
                     "thread_id": thread_id,
+                    "model": create_llm(llm_config),
+                    "context_window": llm_config.get("context_window"),
                     "mcp_registry": mcp_registry,
+                    CONFIG_KEY_CHECKPOINTER: checkpointer,
+                    "lease_fence": checkpointer.lease.token if checkpointer.lease else None,
                     "all_mcp_configs": all_mcp_configs,
                     "all_skills": all_skills,
                     "available_hooks": available_hooks,
@@ -173,28 +292,41 @@ class AgentExecutor(BaseExecutor):
             }
 
             try:
-                agent = await build_agent(
-                    llm_config,
-                    mcp_registry,
-                    checkpointer=checkpointer,
-                    hooks=available_hooks,
-                )
-                async for part in agent.astream(
-                    agent_input,
+                agent = await build_agent(llm_config, hooks=available_hooks)
+                resume = await self._has_unfinished_step(checkpointer, config)
+                if resume:
+                    # The previous run died mid-step; continue it so tasks whose
+                    # writes were saved are not executed again. New inbox events
+                    # are picked up by the next sync.
+                    log.info(
+                        "agent_run_resumed",
+                        execution_id=execution_id,
+                        thread_id=thread_id,
+                    )
+                final_state = {}
+                async for mode, part in agent.astream(
+                    None if resume else agent_input,
                     config=config,
                     stream_mode=["values","messages"],
                 ):
-                    pass
+                    if mode == "values":
+                        final_state = part
+                # Held-back checkpoints must be stored before the lease is
+                # released and the job reported complete
+                await checkpointer.aflush()
 
                 return {
                     "status": "completed",
                     "result": {
                         "thread_id": thread_id,
                         "agent_id": agent_user_id,
+                        "inbox_backlog": bool(final_state.get("inbox_backlog")),
+                        "inbox_cursor": final_state.get("inbox_cursor", 0) or 0,
                     },
                 }
             except Exception as e:
                 print(e)
+                await self._flush_after_failure(checkpointer, thread_id)
                 return {
                     "status": "failed",
                     "result": {
@@ -203,4 +335,25 @@ class AgentExecutor(BaseExecutor):
                     },
                 }
             finally:
-                await mcp_registry.close()
\ No newline at end of file
+                await mcp_registry.close()
+                await release_llm(llm_config)
+
+    @staticmethod
+    async def _flush_after_failure(checkpointer: SelectiveCheckpointer, thread_id: str) -> None:
+        """Keep the progress made before a failed run, if the lease allows."""
+        try:
+            await checkpointer.aflush()
+        except Exception as e:
+            log.error("checkpoint_flush_failed", thread_id=thread_id, error=str(e))
+
+    @staticmethod
+    async def _has_unfinished_step(checkpointer: SelectiveCheckpointer, config: dict) -> bool:
+        """Whether the latest checkpoint has completed-task writes to replay.
+
+        A step that already failed (ERROR write) is not resumed: a fresh input
+        discards it, so a deterministic failure cannot wedge the thread.
+        """
+        saved = await checkpointer.aget_tuple(config)
+        if not saved or not saved.pending_writes:
+            return False
+        return all(channel != ERROR for _, channel, _ in saved.pending_writes)
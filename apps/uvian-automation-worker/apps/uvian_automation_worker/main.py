@@ -1,8 +1,29 @@
 import asyncio
 from datetime import datetime, timezone
-from core.config import REDIS_HOST, REDIS_FAMILY, REDIS_PORT, REDIS_PASSWORD, QUEUE_NAME, WORKER_CONCURRENCY
+from core.config import (
+    REDIS_HOST,
+    REDIS_FAMILY,
+    REDIS_PORT,
+    REDIS_PASSWORD,
+    QUEUE_NAME,
+    WORKER_CONCURRENCY,
+    INBOX_RETENTION_SWEEP_INTERVAL_SECONDS,
+    MCP_BREAKER_STATS_INTERVAL_SECONDS,
+)
 from repositories.jobs import job_repository, DatabaseError
+from repositories.thread_inbox import thread_inbox_repository
 from core.events import events
+from clients.supabase import supabase_client
+from clients.postgres import postgres_client
+from clients.mcp_breaker import mcp_circuit_breakers
+from clients.mcp_catalog import mcp_tool_catalog
+from clients.mcp_pool import mcp_session_pool
+from clients.wakeup_queue import wakeup_queue
+from core.agents.utils.models import aclose_llm_pool
+from core.agents.utils.memory.base_memory import flush_checkpointers
+from core.agents.utils.memory.checkpoint_cache import checkpoint_cache
+from core.agents.utils.tokens import aprewarm_tokenizer
+from core.agents.utils.tool_binding import tool_binding_cache
 from bullmq import Worker
 from core.dependency_injection import get_executor_factory, setup_default_executors
 from core.logging import log
@@ -76,7 +97,7 @@ async def process_job(job, token):
     
     # 1. Fetch Job State
     try:
-        job_record = job_repository.get_job(job_id)
+        job_record = await job_repository.get_job(job_id)
     except DatabaseError as e:
         log.error("database_connection_failed", job_id=job_id, error=str(e))
         return {"error": "Database unavailable"}
@@ -109,7 +130,10 @@ async def process_job(job, token):
     if job_type == "thread-wakeup":
         log.info("thread_wakeup_detected", job_id=job_id)
         job_type = "agent"
-        job_repository.update_job(job_id, {
+        if job.data.get("leaseCheck"):
+            # Scheduled by a coalesced wakeup in case the lease holder dies
+            job_record["input"] = {**(input_data or {}), "leaseCheck": job.data["leaseCheck"]}
+        await job_repository.update_job(job_id, {
             "status": "processing",
             "started_at": datetime.now(timezone.utc).isoformat()
         })
@@ -120,7 +144,7 @@ async def process_job(job, token):
     except ValueError as e:
         error_msg = f"No executor found for job type: {job_type}"
         log.error(error_msg, job_id=job_id, error=str(e))
-        job_repository.update_job(job_id, {
+        await job_repository.update_job(job_id, {
             "status": "failed",
             "error_message": error_msg,
             "output": {"error": str(e)},
@@ -134,9 +158,9 @@ async def process_job(job, token):
     # 4. Execute job through typed interface
     try:
         result: JobResult = await executor.execute(job_record)
-        
+
         # 5. Update Status -> Completed
-        job_repository.update_job(job_id, {
+        await job_repository.update_job(job_id, {
             "status": "completed",
             "output": result,
             "completed_at": datetime.now(timezone.utc).isoformat()
@@ -149,7 +173,7 @@ async def process_job(job, token):
 
         # Update job status to failed
         try:
-            job_repository.update_job(job_id, {
+            await job_repository.update_job(job_id, {
                 "status": "failed",
                 "error_message": str(e),
                 "output": {"error": str(e)},
@@ -163,9 +187,29 @@ async def process_job(job, token):
         log.info("continuing_after_failure", job_id=job_id)
         return {"status": "failed", "error": str(e)}
 
+async def sweep_thread_inbox():
+    """Periodically move processed inbox events to the archive table."""
+    while True:
+        await asyncio.sleep(INBOX_RETENTION_SWEEP_INTERVAL_SECONDS)
+        archived = await thread_inbox_repository.archive_processed()
+        if archived:
+            log.info("thread_inbox_archived", count=archived)
+
+
+async def report_mcp_breakers():
+    """Periodically export per-server MCP breaker state."""
+    while True:
+        await asyncio.sleep(MCP_BREAKER_STATS_INTERVAL_SECONDS)
+        stats = mcp_circuit_breakers.stats()
+        if stats:
+            log.info("mcp_breaker_stats", servers=stats)
+
+
 async def main():
     # Connect to Redis for Pub/Sub events
     await events.connect()
+    # Off the startup path: token counts are estimated until it loads
+    tokenizer_prewarm = asyncio.create_task(aprewarm_tokenizer())
 
     # Redis Options for BullMQ
     bull_redis_opts = {
@@ -187,6 +231,9 @@ async def main():
         },
     )
 
+    inbox_sweeper = asyncio.create_task(sweep_thread_inbox())
+    breaker_reporter = asyncio.create_task(report_mcp_breakers())
+
     # Graceful Shutdown
     stop_event = asyncio.Event()
 
@@ -206,8 +253,23 @@ async def main():
         pass
     finally:
         print("Shutting down worker...")
+        inbox_sweeper.cancel()
+        breaker_reporter.cancel()
+        tokenizer_prewarm.cancel()
         await worker.close()
+        await flush_checkpointers()
+        log.info("checkpoint_cache_stats", **checkpoint_cache.stats())
+        log.info("tool_binding_cache_stats", **tool_binding_cache.stats())
+        log.info("mcp_session_pool_stats", **mcp_session_pool.stats())
+        log.info("mcp_tool_catalog_stats", **mcp_tool_catalog.stats())
+        log.info("mcp_breaker_stats", servers=mcp_circuit_breakers.stats())
+        await mcp_tool_catalog.close()
+        await mcp_session_pool.close()
+        await wakeup_queue.close()
         await events.close()
+        await supabase_client.close()
+        await postgres_client.close()
+        await aclose_llm_pool()
 
 if __name__ == "__main__":
     try:
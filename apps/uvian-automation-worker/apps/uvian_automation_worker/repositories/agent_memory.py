@@ -4,8 +4,9 @@ from core.logging import log
 
 
 class AgentMemoryRepository:
-    def __init__(self):
-        self.db = supabase_client.client.schema("core_automation")
+    @property
+    def db(self):
+        return supabase_client.schema("core_automation")
 
     async def get_all_memory(self, agent_id: str) -> Dict[str, Any]:
         """Fetch all memory entries for a given agent_id as a dict keyed by memory key."""
@@ -13,11 +14,10 @@ class AgentMemoryRepository:
             return {}
         
         try:
-            result = (
+            result = await supabase_client.execute(
                 self.db.table("agent_shared_memory")
                 .select("key, value")
                 .eq("agent_id", agent_id)
-                .execute()
             )
             
             memory_dict = {}
@@ -38,12 +38,12 @@ class AgentMemoryRepository:
             return None
         
         try:
-            result = (
+            result = await supabase_client.execute(
                 self.db.table("agent_shared_memory")
                 .select("key, value")
                 .eq("agent_id", agent_id)
                 .eq("key", key)
-                .execute()
+                .limit(1)
             )
             
             if result.data and len(result.data) > 0:
@@ -4,17 +4,38 @@ Checkpoint repository with consistent parameter naming.
 - Handles persistence for LangGraph agent states via Supabase.
 """
 from typing import Optional, Dict, Any, List
+from postgrest.types import ReturnMethod
 from clients.supabase import supabase_client
-from core.utils.naming import to_db_format, from_db_format
+from core.utils.naming import to_db_format
 from core.logging import log
 
+# Columns the checkpointer needs to rebuild a CheckpointTuple
+CHECKPOINT_COLUMNS = "checkpoint_id, parent_id, checkpoint_data, metadata, blob_refs"
+
+# Columns needed to rebuild channel values from their delta chains
+BLOB_COLUMNS = "channel, checkpoint_id, base_checkpoint_id, kind, type, blob"
+
+
+def to_bytea(value: Any) -> Any:
+    """Encode bytes in the hex format PostgREST expects for bytea columns."""
+    if isinstance(value, (bytes, bytearray)):
+        return f"\\x{bytes(value).hex()}"
+    return value
+
+
+# Columns needed to replay pending writes, in replay order
+WRITE_COLUMNS = "task_id, idx, channel, type, blob"
+
 class CheckpointRepository:
     """Repository for agent checkpoint database operations."""
 
     def __init__(self):
-        self.client = supabase_client.client
         self.table_name = 'agent_checkpoints'
 
+    @property
+    def db(self):
+        return supabase_client.schema('core_automation')
+
     async def get_checkpoint(
         self, 
         thread_id: str, 
@@ -29,7 +50,7 @@ class CheckpointRepository:
                            If None, returns the most recent one.
         """
         try:
-            query = self.client.schema('core_automation').table(self.table_name).select('*').eq('thread_id', thread_id)
+            query = self.db.table(self.table_name).select(CHECKPOINT_COLUMNS).eq('thread_id', thread_id)
 
             if checkpoint_id:
                 # Fetch specific version
@@ -38,7 +59,7 @@ class CheckpointRepository:
                 # Fetch latest version
                 query = query.order('created_at', desc=True).limit(1)
 
-            result = query.execute()
+            result = await supabase_client.execute(query)
 
             if result.data:
                 # Return raw data - checkpointer expects snake_case keys
@@ -59,6 +80,7 @@ class CheckpointRepository:
         - checkpoint_data (dict/jsonb)
         - metadata (dict/jsonb)
         - parent_id (text, optional)
+        - blob_refs (dict, optional): channel -> [blob checkpoint_id, chain]
         """
         try:
             # Explicit mapping to ensure clean insertion into the schema
@@ -66,21 +88,121 @@ class CheckpointRepository:
             db_payload = to_db_format(self.table_name, {
                 'thread_id': checkpoint_data.get('thread_id'),
                 'checkpoint_id': checkpoint_data.get('checkpoint_id'),
-                'checkpoint_data': checkpoint_data.get('checkpoint_data'),
-                'metadata': checkpoint_data.get('metadata', {}),
-                'parent_id': checkpoint_data.get('parent_id')
+                'checkpoint_data': to_bytea(checkpoint_data.get('checkpoint_data')),
+                'metadata': to_bytea(checkpoint_data.get('metadata', {})),
+                'parent_id': checkpoint_data.get('parent_id'),
+                'blob_refs': checkpoint_data.get('blob_refs'),
             })
 
-            result = self.client.schema('core_automation').table(self.table_name).insert(db_payload).execute()
+            # The row is already in memory; skip echoing the (large) payload back
+            await supabase_client.execute(
+                self.db.table(self.table_name).insert(db_payload, returning=ReturnMethod.minimal)
+            )
 
-            if result.data:
-                return from_db_format(self.table_name, result.data[0])
-
-            return None
+            return db_payload
         except Exception as e:
             log.error("insert_checkpoint_error", thread_id=checkpoint_data.get('thread_id'), error=str(e))
             return None
 
+    async def insert_blobs(self, blobs: List[Dict[str, Any]]) -> bool:
+        """
+        Insert channel blobs written by a checkpoint.
+
+        Blobs are immutable, so re-inserting one (e.g. on retry) is a no-op.
+        """
+        if not blobs:
+            return True
+        try:
+            await supabase_client.execute(
+                self.db.table('agent_checkpoint_blobs').upsert(
+                    [{**blob, 'blob': to_bytea(blob['blob'])} for blob in blobs],
+                    on_conflict='thread_id,channel,checkpoint_id',
+                    ignore_duplicates=True,
+                    returning=ReturnMethod.minimal,
+                )
+            )
+            return True
+        except Exception as e:
+            log.error("insert_checkpoint_blobs_error", thread_id=blobs[0].get('thread_id'), error=str(e))
+            return False
+
+    async def put_checkpoint(
+        self,
+        checkpoint_data: Dict[str, Any],
+        blobs: List[Dict[str, Any]],
+    ) -> bool:
+        """
+        Write a checkpoint's new blobs, then its row.
+
+        Blobs go first so a visible checkpoint never references missing blobs.
+        """
+        if not await self.insert_blobs(blobs):
+            return False
+        return await self.insert_checkpoint(checkpoint_data) is not None
+
+    async def get_blobs(self, thread_id: str, chains: List[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch every blob of the given delta chains in one query.
+
+        Args:
+            thread_id: The thread the checkpoint belongs to.
+            chains: Chain keys referenced by the checkpoint's blob_refs.
+        """
+        if not chains:
+            return []
+        try:
+            result = await supabase_client.execute(
+                self.db.table('agent_checkpoint_blobs')
+                .select(BLOB_COLUMNS)
+                .eq('thread_id', thread_id)
+                .in_('chain', chains)
+            )
+            return list(result.data or [])
+        except Exception as e:
+            log.error("fetch_checkpoint_blobs_error", thread_id=thread_id, error=str(e))
+            return []
+
+    async def put_writes(self, writes: List[Dict[str, Any]], overwrite: bool = False) -> bool:
+        """
+        Store pending writes of a task, keyed by (thread, checkpoint, task, idx).
+
+        Args:
+            writes: Rows for agent_checkpoint_writes.
+            overwrite: Replace existing rows (LangGraph's special writes);
+                       otherwise a retried task keeps its first writes.
+        """
+        if not writes:
+            return True
+        try:
+            await supabase_client.execute(
+                self.db.table('agent_checkpoint_writes').upsert(
+                    [{**write, 'blob': to_bytea(write['blob'])} for write in writes],
+                    on_conflict='thread_id,checkpoint_id,task_id,idx',
+                    ignore_duplicates=not overwrite,
+                    returning=ReturnMethod.minimal,
+                )
+            )
+            return True
+        except Exception as e:
+            log.error("insert_checkpoint_writes_error", thread_id=writes[0].get('thread_id'), error=str(e))
+            return False
+
+    async def get_writes(self, thread_id: str, checkpoint_id: str) -> List[Dict[str, Any]]:
+        """Fetch the pending writes recorded against a checkpoint."""
+        try:
+            result = await supabase_client.execute(
+                self.db.table('agent_checkpoint_writes')
+                .select(WRITE_COLUMNS)
+                .eq('thread_id', thread_id)
+                .eq('checkpoint_id', checkpoint_id)
+                .order('task_id')
+                .order('idx')
+            )
+            return list(result.data or [])
+        except Exception as e:
+            log.error("fetch_checkpoint_writes_error", thread_id=thread_id, checkpoint_id=checkpoint_id, error=str(e))
+            return []
+
     async def list_checkpoints(
         self, 
         thread_id: str, 
@@ -97,8 +219,8 @@ class CheckpointRepository:
                                   without a sequence ID, but often mapped to created_at).
         """
         try:
-            query = self.client.schema('core_automation').table(self.table_name)\
-                .select('*')\
+            query = self.db.table(self.table_name)\
+                .select(CHECKPOINT_COLUMNS)\
                 .eq('thread_id', thread_id)\
                 .order('created_at', desc=True)\
                 .limit(limit)
@@ -107,13 +229,10 @@ class CheckpointRepository:
             # knowing the created_at of the target checkpoint, or strictly ordered IDs.
             # For simple use cases, standard limit/offset or created_at filtering works here.
             
-            result = query.execute()
-
-            checkpoints = []
-            for data in result.data or []:
-                checkpoints.append(from_db_format(self.table_name, data))
+            result = await supabase_client.execute(query)
 
-            return checkpoints
+            # Return raw data - checkpointer expects snake_case keys
+            return list(result.data or [])
         except Exception as e:
             log.error("list_checkpoints_error", thread_id=thread_id, error=str(e))
             return []
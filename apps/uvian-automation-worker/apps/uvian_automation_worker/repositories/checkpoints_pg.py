@@ -0,0 +1,190 @@
+"""
+Checkpoint repository over a direct Postgres connection.
+- Same interface as CheckpointRepository, but bytea columns travel as raw
+  bytes over asyncpg's binary protocol instead of hex-encoded JSON.
+- Statements are prepared and cached per pooled connection.
+"""
+from typing import Optional, Dict, Any, List
+from clients.postgres import postgres_client, PostgresClient
+from core.logging import log
+
+_GET_LATEST = """
+SELECT checkpoint_id, parent_id, checkpoint_data, metadata, blob_refs
+FROM core_automation.agent_checkpoints
+WHERE thread_id = $1
+ORDER BY created_at DESC
+LIMIT 1
+"""
+
+_GET_BY_ID = """
+SELECT checkpoint_id, parent_id, checkpoint_data, metadata, blob_refs
+FROM core_automation.agent_checkpoints
+WHERE thread_id = $1 AND checkpoint_id = $2
+LIMIT 1
+"""
+
+_LIST = """
+SELECT checkpoint_id, parent_id, checkpoint_data, metadata, blob_refs
+FROM core_automation.agent_checkpoints
+WHERE thread_id = $1
+  AND ($3::text IS NULL OR created_at < (
+    SELECT created_at FROM core_automation.agent_checkpoints
+    WHERE thread_id = $1 AND checkpoint_id = $3
+  ))
+ORDER BY created_at DESC
+LIMIT $2
+"""
+
+_INSERT_CHECKPOINT = """
+INSERT INTO core_automation.agent_checkpoints
+  (thread_id, checkpoint_id, parent_id, checkpoint_data, metadata, blob_refs)
+VALUES ($1, $2, $3, $4, $5, $6)
+"""
+
+_INSERT_BLOB = """
+INSERT INTO core_automation.agent_checkpoint_blobs
+  (thread_id, channel, checkpoint_id, chain, base_checkpoint_id, kind, type, blob)
+VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+ON CONFLICT (thread_id, channel, checkpoint_id) DO NOTHING
+"""
+
+_GET_BLOBS = """
+SELECT channel, checkpoint_id, base_checkpoint_id, kind, type, blob
+FROM core_automation.agent_checkpoint_blobs
+WHERE thread_id = $1 AND chain = ANY($2::text[])
+"""
+
+_INSERT_WRITE = """
+INSERT INTO core_automation.agent_checkpoint_writes
+  (thread_id, checkpoint_id, task_id, idx, channel, type, blob, task_path)
+VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+ON CONFLICT (thread_id, checkpoint_id, task_id, idx) DO NOTHING
+"""
+
+_UPSERT_WRITE = """
+INSERT INTO core_automation.agent_checkpoint_writes
+  (thread_id, checkpoint_id, task_id, idx, channel, type, blob, task_path)
+VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+ON CONFLICT (thread_id, checkpoint_id, task_id, idx) DO UPDATE
+  SET channel = EXCLUDED.channel, type = EXCLUDED.type, blob = EXCLUDED.blob
+"""
+
+_GET_WRITES = """
+SELECT task_id, idx, channel, type, blob
+FROM core_automation.agent_checkpoint_writes
+WHERE thread_id = $1 AND checkpoint_id = $2
+ORDER BY task_id, idx
+"""
+
+_WRITE_FIELDS = ("thread_id", "checkpoint_id", "task_id", "idx", "channel", "type", "blob", "task_path")
+
+_BLOB_FIELDS = ("thread_id", "channel", "checkpoint_id", "chain", "base_checkpoint_id", "kind", "type", "blob")
+
+
+class PostgresCheckpointRepository:
+    """Repository for agent checkpoints backed by asyncpg."""
+
+    def __init__(self, client: PostgresClient = postgres_client):
+        self.client = client
+
+    async def get_checkpoint(
+        self,
+        thread_id: str,
+        checkpoint_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Get a specific checkpoint or the latest one for a thread."""
+        try:
+            pool = await self.client.pool()
+            if checkpoint_id:
+                row = await pool.fetchrow(_GET_BY_ID, thread_id, checkpoint_id)
+            else:
+                row = await pool.fetchrow(_GET_LATEST, thread_id)
+            return dict(row) if row else None
+        except Exception as e:
+            log.error("fetch_checkpoint_error", thread_id=thread_id, checkpoint_id=checkpoint_id, error=str(e))
+            return None
+
+    async def put_checkpoint(
+        self,
+        checkpoint_data: Dict[str, Any],
+        blobs: List[Dict[str, Any]],
+    ) -> bool:
+        """Write a checkpoint row and its new blobs in one transaction."""
+        try:
+            pool = await self.client.pool()
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    if blobs:
+                        await conn.executemany(
+                            _INSERT_BLOB,
+                            [tuple(blob.get(f) for f in _BLOB_FIELDS) for blob in blobs],
+                        )
+                    await conn.execute(
+                        _INSERT_CHECKPOINT,
+                        checkpoint_data.get("thread_id"),
+                        checkpoint_data.get("checkpoint_id"),
+                        checkpoint_data.get("parent_id"),
+                        checkpoint_data.get("checkpoint_data"),
+                        checkpoint_data.get("metadata"),
+                        checkpoint_data.get("blob_refs"),
+                    )
+            return True
+        except Exception as e:
+            log.error("insert_checkpoint_error", thread_id=checkpoint_data.get("thread_id"), error=str(e))
+            return False
+
+    async def get_blobs(self, thread_id: str, chains: List[str]) -> List[Dict[str, Any]]:
+        """Fetch every blob of the given delta chains in one query."""
+        if not chains:
+            return []
+        try:
+            pool = await self.client.pool()
+            rows = await pool.fetch(_GET_BLOBS, thread_id, chains)
+            return [dict(r) for r in rows]
+        except Exception as e:
+            log.error("fetch_checkpoint_blobs_error", thread_id=thread_id, error=str(e))
+            return []
+
+    async def put_writes(self, writes: List[Dict[str, Any]], overwrite: bool = False) -> bool:
+        """Store pending writes of a task; see CheckpointRepository.put_writes."""
+        if not writes:
+            return True
+        try:
+            pool = await self.client.pool()
+            await pool.executemany(
+                _UPSERT_WRITE if overwrite else _INSERT_WRITE,
+                [tuple(w.get(f, "") if f == "task_path" else w[f] for f in _WRITE_FIELDS) for w in writes],
+            )
+            return True
+        except Exception as e:
+            log.error("insert_checkpoint_writes_error", thread_id=writes[0].get("thread_id"), error=str(e))
+            return False
+
+    async def get_writes(self, thread_id: str, checkpoint_id: str) -> List[Dict[str, Any]]:
+        """Fetch the pending writes recorded against a checkpoint."""
+        try:
+            pool = await self.client.pool()
+            rows = await pool.fetch(_GET_WRITES, thread_id, checkpoint_id)
+            return [dict(r) for r in rows]
+        except Exception as e:
+            log.error("fetch_checkpoint_writes_error", thread_id=thread_id, checkpoint_id=checkpoint_id, error=str(e))
+            return []
+
+    async def list_checkpoints(
+        self,
+        thread_id: str,
+        limit: int = 10,
+        before_checkpoint_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """List checkpoints for a thread, newest first."""
+        try:
+            pool = await self.client.pool()
+            rows = await pool.fetch(_LIST, thread_id, limit, before_checkpoint_id)
+            return [dict(r) for r in rows]
+        except Exception as e:
+            log.error("list_checkpoints_error", thread_id=thread_id, error=str(e))
+            return []
+
+
+# Singleton instance
+postgres_checkpoint_repository = PostgresCheckpointRepository()
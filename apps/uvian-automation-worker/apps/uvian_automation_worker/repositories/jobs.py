@@ -1,15 +1,24 @@
+import asyncio
 from typing import Optional, Dict, Any, List
+from postgrest.types import CountMethod, ReturnMethod
 from clients.supabase import supabase_client
 from core.logging import log
 
+# Columns the worker actually reads from core_automation.jobs
+JOB_COLUMNS = "id, type, status, input, created_at, updated_at"
+
 class DatabaseError(Exception):
     """Custom exception for database operations."""
     pass
 
 class JobRepository:
     """Repository for job-related database operations with comprehensive type safety."""
-    
-    def get_job(self, job_id: str):
+
+    @property
+    def db(self):
+        return supabase_client.schema("core_automation")
+
+    async def get_job(self, job_id: str):
         """
         Fetch a job by ID with proper error handling.
 
@@ -19,7 +28,9 @@ class JobRepository:
             - Raises DatabaseError: For connection/query errors
         """
         try:
-            result = supabase_client.client.schema("core_automation").table('jobs').select('*').eq('id', job_id).execute()
+            result = await supabase_client.execute(
+                self.db.table('jobs').select(JOB_COLUMNS).eq('id', job_id)
+            )
             data = result.data
             if data:
                 log.debug("job_found", job_id=job_id)
@@ -32,11 +43,15 @@ class JobRepository:
             log.error("db_connection_error", job_id=job_id, error=str(e))
             raise DatabaseError(f"Failed to fetch job {job_id}: {e}")
     
-    def update_job(self, job_id: str, updates: Dict[str, Any]) -> bool:
+    async def update_job(self, job_id: str, updates: Dict[str, Any]) -> bool:
         """Update a job with comprehensive error handling."""
         try:
-            result = supabase_client.client.schema("core_automation").table('jobs').update(updates).eq('id', job_id).execute()
-            if result.data:
+            result = await supabase_client.execute(
+                self.db.table('jobs')
+                .update(updates, count=CountMethod.exact, returning=ReturnMethod.minimal)
+                .eq('id', job_id)
+            )
+            if result.count:
                 log.debug("job_updated", job_id=job_id, updated_fields=list(updates.keys()))
                 return True
             else:
@@ -48,11 +63,9 @@ class JobRepository:
 
     async def update_job_with_retry(self, job_id: str, updates: Dict[str, Any], max_retries: int = 3) -> bool:
         """Update job with retry logic for transient failures."""
-        import asyncio
-
         for attempt in range(max_retries):
             try:
-                return self.update_job(job_id, updates)
+                return await self.update_job(job_id, updates)
             except Exception as e:
                 if attempt == max_retries - 1:
                     log.error("retry_final_failed", job_id=job_id, error=str(e))
@@ -61,10 +74,10 @@ class JobRepository:
                 await asyncio.sleep(2 ** attempt)
         return False
     
-    def create_job(self, job_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    async def create_job(self, job_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Create a new job."""
         try:
-            result = supabase_client.client.schema("core_automation").table('jobs').insert(job_data).execute()
+            result = await supabase_client.execute(self.db.table('jobs').insert(job_data))
             data = result.data
             log.info("created_job", job_id=job_data.get('id', 'new'))
             return data[0] if data else None
@@ -72,10 +85,12 @@ class JobRepository:
             log.error("create_job_error", job_id="create_job", error=str(e))
             return None
     
-    def get_jobs_by_status(self, status: str) -> List[Dict[str, Any]]:
+    async def get_jobs_by_status(self, status: str) -> List[Dict[str, Any]]:
         """Get all jobs with a specific status."""
         try:
-            result = supabase_client.client.schema("core_automation").table('jobs').select('*').eq('status', status).execute()
+            result = await supabase_client.execute(
+                self.db.table('jobs').select(JOB_COLUMNS).eq('status', status)
+            )
             return result.data or []
         except Exception as e:
             log.error("get_jobs_by_status_error", job_id="get_jobs_by_status", status=status, error=str(e))
@@ -0,0 +1,61 @@
+from postgrest.types import ReturnMethod
+from clients.supabase import supabase_client
+from repositories.checkpoints import to_bytea
+from core.logging import log
+
+class MessageArchiveRepository:
+    """Append-only store of messages pruned from live agent state by compaction."""
+
+    def __init__(self):
+        self.table_name = "agent_message_archive"
+
+    @property
+    def db(self):
+        return supabase_client.schema("core_automation")
+
+    async def insert_range(
+        self,
+        thread_id: str,
+        range_start: int,
+        range_end: int,
+        type_: str,
+        messages: bytes,
+        summary: str = "",
+    ) -> bool:
+        """Archive messages [range_start, range_end) of a thread's history.
+
+        ``range_start`` is the archived count of the thread's stored
+        compaction state, so rows at or past it were written by compactions
+        whose checkpoint was never stored (crash, lost lease, held-back
+        checkpoint) and are replaced. Returns False if the range could not
+        be stored.
+        """
+        try:
+            await supabase_client.execute(
+                self.db.table(self.table_name)
+                .delete(returning=ReturnMethod.minimal)
+                .eq("thread_id", thread_id)
+                .gte("range_start", range_start)
+            )
+            await supabase_client.execute(
+                self.db.table(self.table_name).upsert(
+                    {
+                        "thread_id": thread_id,
+                        "range_start": range_start,
+                        "range_end": range_end,
+                        "type": type_,
+                        "messages": to_bytea(messages),
+                        "summary": summary,
+                    },
+                    on_conflict="thread_id,range_start",
+                    returning=ReturnMethod.minimal,
+                )
+            )
+        except Exception as e:
+            log.error("archive_messages_error", thread_id=thread_id, range_start=range_start, error=str(e))
+            return False
+        return True
+
+
+# Singleton instance
+message_archive_repository = MessageArchiveRepository()
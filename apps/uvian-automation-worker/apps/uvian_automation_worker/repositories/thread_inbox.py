@@ -1,22 +1,98 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from postgrest.types import ReturnMethod
 from clients.supabase import supabase_client
+from core.config import INBOX_CLAIM_BATCH_SIZE, INBOX_RETENTION_SECONDS
 from core.logging import log
 
+# Columns sync_node consumes when turning inbox rows into messages
+INBOX_COLUMNS = "id, event_type, payload, created_at"
+
 
 class ThreadInboxRepository:
-    def __init__(self):
-        self.db = supabase_client.client.schema("core_automation")
+    @property
+    def db(self):
+        return supabase_client.schema("core_automation")
+
+    async def claim_pending_messages(
+        self,
+        thread_id: str,
+        after_seq: int = 0,
+        limit: int = INBOX_CLAIM_BATCH_SIZE,
+        fence: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Atomically claim the next batch of inbox events for a thread.
+
+        One round trip: events at or below ``after_seq`` (the cursor already
+        checkpointed in agent state) are marked processed, and up to ``limit``
+        events after it are claimed and returned ordered by ``seq``. ``fence``
+        is the thread lease token; it lets a new holder reclaim events left
+        in flight by an execution that lost the lease.
+
+        Errors are raised: an empty list would end the run as if the inbox
+        were empty.
+        """
+        try:
+            result = await supabase_client.execute(
+                self.db.rpc(
+                    "claim_thread_inbox",
+                    {
+                        "p_thread_id": thread_id,
+                        "p_after_seq": after_seq,
+                        "p_limit": limit,
+                        "p_fence": fence,
+                    },
+                )
+            )
+        except Exception as e:
+            log.error("claim_pending_messages_error", thread_id=thread_id, error=str(e))
+            raise
+        return result.data or []
+
+    async def acknowledge(self, thread_id: str, through_seq: int) -> int:
+        """Mark claimed events up to ``through_seq`` (a checkpointed cursor) processed.
+
+        Called when a run ends, so its last batch does not wait for the
+        thread's next claim. Best effort: that claim acknowledges them too.
+        """
+        try:
+            result = await supabase_client.execute(
+                self.db.rpc(
+                    "ack_thread_inbox",
+                    {"p_thread_id": thread_id, "p_through_seq": through_seq},
+                )
+            )
+            return result.data or 0
+        except Exception as e:
+            log.error("ack_thread_inbox_error", thread_id=thread_id, error=str(e))
+            return 0
+
+    async def archive_processed(
+        self,
+        retention_seconds: int = INBOX_RETENTION_SECONDS,
+        limit: int = 1000,
+    ) -> int:
+        """Move processed events older than the retention window to the archive."""
+        try:
+            result = await supabase_client.execute(
+                self.db.rpc(
+                    "archive_thread_inbox",
+                    {"p_retention_seconds": retention_seconds, "p_limit": limit},
+                )
+            )
+            return result.data or 0
+        except Exception as e:
+            log.error("archive_thread_inbox_error", error=str(e))
+            return 0
 
     async def fetch_pending_messages(self, thread_id: str) -> List[Dict[str, Any]]:
         """Fetch all pending messages for a given thread_id, ordered by creation time."""
         try:
-            result = (
+            result = await supabase_client.execute(
                 self.db.table("thread_inbox")
-                .select("*")
+                .select(INBOX_COLUMNS)
                 .eq("thread_id", thread_id)
                 .eq("status", "pending")
                 .order("created_at", desc=False)
-                .execute()
             )
             return result.data or []
         except Exception as e:
@@ -29,11 +105,10 @@ class ThreadInboxRepository:
             return True
 
         try:
-            (
+            await supabase_client.execute(
                 self.db.table("thread_inbox")
-                .update({"status": "processed"})
+                .update({"status": "processed"}, returning=ReturnMethod.minimal)
                 .in_("id", message_ids)
-                .execute()
             )
             log.info("messages_marked_processed", count=len(message_ids))
             return True
@@ -0,0 +1,65 @@
+"""
+Microbenchmark: checkpoint serialization of a long agent thread.
+
+Compares JsonPlusSerializer with CheckpointSerializer (compact message
+schema), with and without zstd framing, for encode and decode.
+
+Usage (from apps/uvian-automation-worker):
+    PYTHONPATH=apps/uvian_automation_worker python benchmarks/checkpoint_serde.py [messages] [rounds]
+"""
+import sys
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from core.agents.utils.memory.codec import CheckpointCodec
+from core.agents.utils.memory.serde import CheckpointSerializer
+
+
+def build_thread(n: int) -> list:
+    messages = []
+    for i in range(n // 3):
+        messages.append(HumanMessage(f"Question {i}: " + "context " * 40, id=f"h{i}"))
+        messages.append(AIMessage(
+            "",
+            id=f"a{i}",
+            tool_calls=[{"name": "search", "args": {"query": f"q{i}", "limit": 10}, "id": f"call{i}"}],
+            usage_metadata={"input_tokens": 1200, "output_tokens": 80, "total_tokens": 1280},
+            response_metadata={"model_name": "model", "finish_reason": "tool_calls"},
+        ))
+        messages.append(ToolMessage("result line\n" * 150, tool_call_id=f"call{i}", id=f"t{i}"))
+    return messages
+
+
+def bench(label, serde, codec, messages, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        type_, data = serde.dumps_typed(messages)
+        stored = codec.encode(data) if codec else data
+    encode_ms = (time.perf_counter() - start) * 1000 / rounds
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        restored = serde.loads_typed((type_, codec.decode(stored) if codec else stored))
+    decode_ms = (time.perf_counter() - start) * 1000 / rounds
+
+    assert restored == messages
+    print(f"{label:<28} {len(stored):>10} B {encode_ms:>9.2f} ms {decode_ms:>9.2f} ms")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    messages = build_thread(n)
+    print(f"{len(messages)} messages, {rounds} rounds")
+    print(f"{'serializer':<28} {'stored':>12} {'encode':>12} {'decode':>12}")
+    zstd = CheckpointCodec(compression="zstd", min_bytes=0)
+    bench("jsonplus", JsonPlusSerializer(), None, messages, rounds)
+    bench("jsonplus + zstd", JsonPlusSerializer(), zstd, messages, rounds)
+    bench("compact", CheckpointSerializer(), None, messages, rounds)
+    bench("compact + zstd", CheckpointSerializer(), zstd, messages, rounds)
+
+
+if __name__ == "__main__":
+    main()
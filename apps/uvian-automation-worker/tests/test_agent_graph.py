@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from core.agents.universal_agent import agent
+from core.agents.universal_agent.agent import build_agent, graph_fingerprint
+from core.agents.utils.nodes.sync_node import route_after_sync
+
+
+@pytest.mark.asyncio
+async def test_compiled_graph_is_reused(monkeypatch):
+    monkeypatch.setattr(agent, "_graph_cache", agent.OrderedDict())
+    config = {"type": "openai", "model": "gpt-4o", "api_key": "sk-1"}
+
+    first = await build_agent(config, hooks=[])
+    second = await build_agent({**config, "api_key": "sk-2"}, hooks=[])
+
+    assert first is second
+    assert first.checkpointer is None
+
+
+def test_fingerprint_changes_with_hooks():
+    config = {"type": "openai", "model": "gpt-4o"}
+    hook = {"id": "h1", "name": "approve", "trigger_json": {"patterns": ["send_*"]}}
+
+    assert graph_fingerprint(config, []) != graph_fingerprint(config, [hook])
+
+
+def test_sync_ends_the_run_when_nothing_awaits_a_reply():
+    config = {"configurable": {"model": SimpleNamespace(model_name="gpt-4o", max_tokens=None)}}
+    answered = [HumanMessage("hi", id="1"), AIMessage("hello", id="2")]
+
+    assert route_after_sync({"messages": []}, config) == "cleanup_node"
+    assert route_after_sync({"messages": answered}, config) == "cleanup_node"
+    assert route_after_sync({"messages": answered + [HumanMessage("again", id="3")]}, config) == "model_node"
+    tool_result = ToolMessage("found", tool_call_id="c1", id="4")
+    assert route_after_sync({"messages": answered + [tool_result]}, config) == "model_node"
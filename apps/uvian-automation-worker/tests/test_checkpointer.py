@@ -0,0 +1,362 @@
+import operator
+from typing import Annotated, TypedDict
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.graph import START, StateGraph
+from core.agents.utils.memory import base_memory
+from core.agents.utils.memory.base_memory import CheckpointReadError, PostgresAsyncCheckpointer
+from core.agents.utils.memory.checkpoint_cache import CachedCheckpoint, CheckpointCache
+from core.agents.utils.memory.codec import CheckpointCodec
+from core.agents.utils.memory.serde import MESSAGES_TYPE, CheckpointSerializer
+
+
+class FakeCheckpointRepository:
+    def __init__(self):
+        self.rows = []
+        self.blobs = {}
+        self.writes = {}
+        self.reads = 0
+
+    async def insert_blobs(self, blobs):
+        for blob in blobs:
+            self.blobs.setdefault((blob["thread_id"], blob["channel"], blob["checkpoint_id"]), blob)
+        return True
+
+    async def get_blobs(self, thread_id, chains):
+        return [b for (t, _, _), b in self.blobs.items() if t == thread_id and b["chain"] in chains]
+
+    async def insert_checkpoint(self, row):
+        self.rows.append(row)
+        return row
+
+    async def put_checkpoint(self, row, blobs):
+        await self.insert_blobs(blobs)
+        await self.insert_checkpoint(row)
+        return True
+
+    async def put_writes(self, writes, overwrite=False):
+        for write in writes:
+            key = (write["thread_id"], write["checkpoint_id"], write["task_id"], write["idx"])
+            if overwrite or key not in self.writes:
+                self.writes[key] = write
+        return True
+
+    async def get_writes(self, thread_id, checkpoint_id):
+        return [w for (t, c, _, _), w in sorted(self.writes.items()) if (t, c) == (thread_id, checkpoint_id)]
+
+    async def get_checkpoint(self, thread_id, checkpoint_id=None):
+        self.reads += 1
+        rows = [r for r in self.rows if r["thread_id"] == thread_id]
+        if checkpoint_id:
+            rows = [r for r in rows if r["checkpoint_id"] == checkpoint_id]
+        return rows[-1] if rows else None
+
+
+@pytest.fixture
+def repo(monkeypatch):
+    fake = FakeCheckpointRepository()
+    monkeypatch.setattr(base_memory, "checkpoint_repository", fake)
+    return fake
+
+
+async def _put(saver, config, messages, version, extra=None):
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"messages": messages, **(extra or {})}
+    checkpoint["channel_versions"] = {"messages": version}
+    return await saver.aput(config, checkpoint, {}, {"messages": version})
+
+
+@pytest.mark.asyncio
+async def test_append_only_channel_stores_deltas(repo):
+    saver = PostgresAsyncCheckpointer()
+    config = {"configurable": {"thread_id": "t1"}}
+    messages = [HumanMessage("hi", id="1")]
+
+    config = await _put(saver, config, messages, 1, {"agent_name": "Agent"})
+    messages = messages + [AIMessage("hello", id="2")]
+    config = await _put(saver, config, messages, 2, {"agent_name": "Agent"})
+
+    kinds = sorted((b["channel"], b["kind"]) for b in repo.blobs.values())
+    # agent_name did not change, so only the first checkpoint wrote it
+    assert kinds == [("agent_name", "full"), ("messages", "append"), ("messages", "full")]
+
+    restored = await PostgresAsyncCheckpointer().aget_tuple({"configurable": {"thread_id": "t1"}})
+    assert [m.content for m in restored.checkpoint["channel_values"]["messages"]] == ["hi", "hello"]
+    assert restored.checkpoint["channel_values"]["agent_name"] == "Agent"
+
+
+@pytest.mark.asyncio
+async def test_full_snapshot_bounds_chain(repo):
+    saver = PostgresAsyncCheckpointer(full_snapshot_every=2)
+    config = {"configurable": {"thread_id": "t1"}}
+    messages = []
+    for i in range(5):
+        messages = messages + [HumanMessage(str(i), id=str(i))]
+        config = await _put(saver, config, messages, i + 1)
+
+    kinds = [b["kind"] for b in repo.blobs.values()]
+    assert kinds == ["full", "append", "append", "full", "append"]
+
+    restored = await PostgresAsyncCheckpointer().aget_tuple({"configurable": {"thread_id": "t1"}})
+    assert [m.content for m in restored.checkpoint["channel_values"]["messages"]] == ["0", "1", "2", "3", "4"]
+
+
+@pytest.mark.asyncio
+async def test_missing_blob_fails_the_restore(repo):
+    saver = PostgresAsyncCheckpointer()
+    config = {"configurable": {"thread_id": "t1"}}
+    messages = [HumanMessage("hi", id="1")]
+    config = await _put(saver, config, messages, 1)
+    config = await _put(saver, config, messages + [AIMessage("hello", id="2")], 2)
+
+    # The full snapshot under the append delta is gone
+    del repo.blobs[next(key for key, b in repo.blobs.items() if b["kind"] == "full")]
+
+    with pytest.raises(CheckpointReadError):
+        await PostgresAsyncCheckpointer().aget_tuple({"configurable": {"thread_id": "t1"}})
+
+
+@pytest.mark.asyncio
+async def test_rewritten_list_falls_back_to_full(repo):
+    saver = PostgresAsyncCheckpointer()
+    config = {"configurable": {"thread_id": "t1"}}
+
+    config = await _put(saver, config, [HumanMessage("a", id="a")], 1)
+    config = await _put(saver, config, [HumanMessage("b", id="b")], 2)
+
+    assert [b["kind"] for b in repo.blobs.values()] == ["full", "full"]
+
+
+def test_codec_round_trips_and_reads_legacy_payloads():
+    codec = CheckpointCodec(compression="zstd", min_bytes=16)
+    large = b"x" * 4096
+
+    encoded = codec.encode(large)
+    assert len(encoded) < len(large)
+    assert codec.decode(encoded) == large
+    assert codec.decode(codec.encode(b"tiny")) == b"tiny"
+    # Rows written before framing existed are raw msgpack
+    assert codec.decode(b"\x81\xa1a\x01") == b"\x81\xa1a\x01"
+
+
+@pytest.mark.asyncio
+async def test_completed_sibling_is_not_rerun_after_failure(repo):
+    calls = {"fast": 0, "flaky": 0}
+
+    class State(TypedDict):
+        results: Annotated[list, operator.add]
+
+    async def fast(state):
+        calls["fast"] += 1
+        return {"results": ["fast"]}
+
+    async def flaky(state):
+        calls["flaky"] += 1
+        if calls["flaky"] == 1:
+            raise RuntimeError("worker died")
+        return {"results": ["flaky"]}
+
+    builder = StateGraph(State)
+    builder.add_node("fast", fast)
+    builder.add_node("flaky", flaky)
+    builder.add_edge(START, "fast")
+    builder.add_edge(START, "flaky")
+    graph = builder.compile(checkpointer=PostgresAsyncCheckpointer())
+    config = {"configurable": {"thread_id": "t1"}}
+
+    with pytest.raises(RuntimeError):
+        await graph.ainvoke({"results": []}, config)
+    result = await graph.ainvoke(None, config)
+
+    assert calls == {"fast": 1, "flaky": 2}
+    assert sorted(result["results"]) == ["fast", "flaky"]
+
+
+@pytest.mark.asyncio
+async def test_async_durability_writes_in_order_on_flush(repo):
+    saver = PostgresAsyncCheckpointer(durability="async", write_queue_size=2)
+    config = {"configurable": {"thread_id": "t1"}}
+    messages = []
+    for i in range(4):
+        messages = messages + [HumanMessage(str(i), id=str(i))]
+        config = await _put(saver, config, messages, i + 1)
+
+    await saver.aflush()
+
+    assert [r["parent_id"] for r in repo.rows[1:]] == [r["checkpoint_id"] for r in repo.rows[:-1]]
+    restored = await PostgresAsyncCheckpointer().aget_tuple({"configurable": {"thread_id": "t1"}})
+    assert [m.content for m in restored.checkpoint["channel_values"]["messages"]] == ["0", "1", "2", "3"]
+    await saver.aclose()
+
+
+@pytest.mark.asyncio
+async def test_async_durability_stores_new_inbox_cursor_before_returning(repo):
+    saver = PostgresAsyncCheckpointer(durability="async")
+    config = {"configurable": {"thread_id": "t1"}}
+    config = await _put(saver, config, [HumanMessage("0", id="0")], 1)
+
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"messages": [HumanMessage("0", id="0")], "inbox_cursor": 7}
+    await saver.aput(config, checkpoint, {}, {"inbox_cursor": 1})
+    # Both writes are stored, in order, without an explicit flush
+    assert len(repo.rows) == 2
+    assert repo.rows[1]["parent_id"] == repo.rows[0]["checkpoint_id"]
+
+    async def failing_put(row, blobs):
+        return False
+
+    repo.put_checkpoint = failing_put
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"inbox_cursor": 9}
+    with pytest.raises(base_memory.CheckpointWriteError):
+        await saver.aput(config, checkpoint, {}, {"inbox_cursor": 2})
+    await saver.aclose()
+
+
+@pytest.mark.asyncio
+async def test_turn_durability_stores_only_turn_boundaries(repo):
+    saver = PostgresAsyncCheckpointer(durability="turn")
+    config = {"configurable": {"thread_id": "t1"}}
+    messages = [HumanMessage("q", id="1")]
+
+    config = await _put(saver, config, messages, 1, {"branch:to:model_node": None})
+    messages = messages + [AIMessage("a", id="2")]
+    config = await _put(saver, config, messages, 2, {"branch:to:tool_node": None})
+    assert repo.rows == []
+
+    messages = messages + [AIMessage("done", id="3")]
+    config = await _put(saver, config, messages, 3, {"branch:to:sync_node": None})
+    assert len(repo.rows) == 1
+
+    messages = messages + [AIMessage("pending", id="4")]
+    await _put(saver, config, messages, 4, {"branch:to:model_node": None})
+    await saver.aflush()
+
+    assert repo.rows[1]["parent_id"] == repo.rows[0]["checkpoint_id"]
+    restored = await PostgresAsyncCheckpointer().aget_tuple({"configurable": {"thread_id": "t1"}})
+    assert [m.content for m in restored.checkpoint["channel_values"]["messages"]] == ["q", "a", "done", "pending"]
+
+
+@pytest.mark.asyncio
+async def test_hot_thread_restores_from_cache(repo):
+    cache = CheckpointCache(use_redis=False)
+    config = {"configurable": {"thread_id": "t1", "lease_fence": 1}}
+    writer = PostgresAsyncCheckpointer(cache=cache)
+    await writer.aget_tuple(config)
+    messages = [HumanMessage("hi", id="1")]
+    await _put(writer, config, messages, 1)
+    reads = repo.reads
+
+    # Next acquisition (fence 2): nobody else can have written the thread
+    reader = PostgresAsyncCheckpointer(cache=cache)
+    next_config = {"configurable": {"thread_id": "t1", "lease_fence": 2}}
+    restored = await reader.aget_tuple(next_config)
+    assert repo.reads == reads
+    assert [m.content for m in restored.checkpoint["channel_values"]["messages"]] == ["hi"]
+
+    # Writes continue the delta chain from the cached state
+    await _put(reader, restored.config | next_config, messages + [AIMessage("yo", id="2")], 2)
+    assert [b["kind"] for b in repo.blobs.values()] == ["full", "append"]
+
+    # A fence gap means another execution may have written the thread
+    await PostgresAsyncCheckpointer(cache=cache).aget_tuple({"configurable": {"thread_id": "t1", "lease_fence": 5}})
+    assert repo.reads == reads + 1
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_entry_is_sized_by_the_decoded_payload(repo):
+    cache = CheckpointCache(use_redis=False)
+    codec = CheckpointCodec(compression="zstd", min_bytes=16)
+    config = {"configurable": {"thread_id": "t1", "lease_fence": 1}}
+    writer = PostgresAsyncCheckpointer(cache=cache, codec=codec)
+    await writer.aget_tuple(config)
+    await _put(writer, config, [HumanMessage("x" * 10_000, id="1")], 1)
+
+    stored = sum(len(b["blob"]) for b in repo.blobs.values())
+    assert stored < 1_000
+    # Compression does not shrink what the cache holds in memory
+    assert cache.get("t1", 1).size > 10_000
+
+    restored = PostgresAsyncCheckpointer(cache=None, codec=codec)
+    await restored.aget_tuple({"configurable": {"thread_id": "t1"}})
+    assert restored._sizes["t1"]["messages"] > 10_000
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.mark.asyncio
+async def test_unfenced_write_invalidates_both_cache_tiers(repo, monkeypatch):
+    from core.events import events
+
+    monkeypatch.setattr(events, "redis", FakeRedis())
+    cache = CheckpointCache(use_redis=True)
+    config = {"configurable": {"thread_id": "t1", "lease_fence": 1}}
+    writer = PostgresAsyncCheckpointer(cache=cache)
+    await writer.aget_tuple(config)
+    messages = [HumanMessage("hi", id="1")]
+    await _put(writer, config, messages, 1)
+    await writer.aclose()
+    assert events.redis.data
+
+    # Lease degraded (Redis briefly unreachable): the run writes without a fence
+    degraded = PostgresAsyncCheckpointer(cache=cache)
+    restored = await degraded.aget_tuple({"configurable": {"thread_id": "t1"}})
+    await _put(degraded, restored.config, messages + [AIMessage("yo", id="2")], 2)
+    assert cache.get("t1", 2) is None and not events.redis.data
+
+    # The next fenced run, on this replica or another, reads the database
+    for reader_cache in (cache, CheckpointCache(use_redis=True)):
+        reader = PostgresAsyncCheckpointer(cache=reader_cache)
+        restored = await reader.aget_tuple({"configurable": {"thread_id": "t1", "lease_fence": 2}})
+        assert [m.content for m in restored.checkpoint["channel_values"]["messages"]] == ["hi", "yo"]
+
+
+def test_cache_evicts_least_recently_used_by_bytes():
+    cache = CheckpointCache(max_bytes=100, use_redis=False)
+
+    def entry(thread_id, size):
+        return CachedCheckpoint(thread_id, "c", 1, {}, {}, None, {}, size=size)
+
+    cache.put(entry("a", 60))
+    cache.put(entry("b", 30))
+    assert cache.get("a", 1) is not None
+    cache.put(entry("c", 30))
+
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_compact_message_serde_round_trips_and_falls_back():
+    serde = CheckpointSerializer()
+    messages = [
+        HumanMessage("hi", id="1"),
+        AIMessage("", id="2", tool_calls=[{"name": "search", "args": {"q": "x"}, "id": "c1"}]),
+        ToolMessage("found", tool_call_id="c1", id="3", status="error"),
+    ]
+
+    type_, data = serde.dumps_typed(messages)
+    assert type_ == MESSAGES_TYPE
+    assert serde.loads_typed((type_, data)) == messages
+
+    # Values outside the compact schema go through JsonPlus unchanged
+    odd = [HumanMessage("hi", id="1", custom_field="kept")]
+    type_, data = serde.dumps_typed(odd)
+    assert type_ != MESSAGES_TYPE
+    assert serde.loads_typed((type_, data))[0].custom_field == "kept"
+    assert serde.dumps_typed({"a": 1})[0] == "msgpack"
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+from clients import postgres
+from clients.postgres import PostgresClient
+from repositories.checkpoints_pg import PostgresCheckpointRepository
+
+# A database with the core_automation checkpoint migrations applied
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_callers_share_one_pool(monkeypatch):
+    created = []
+
+    async def create_pool(dsn, **kwargs):
+        await asyncio.sleep(0.01)
+        created.append(object())
+        return created[-1]
+
+    monkeypatch.setattr(postgres.asyncpg, "create_pool", create_pool)
+    client = PostgresClient("postgresql://localhost/test")
+
+    pools = await asyncio.gather(*(client.pool() for _ in range(5)))
+
+    assert len(created) == 1
+    assert all(pool is created[0] for pool in pools)
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+async def test_checkpoint_round_trip():
+    client = PostgresClient(TEST_DATABASE_URL)
+    repo = PostgresCheckpointRepository(client)
+    thread_id = str(uuid.uuid4())
+    blob = {
+        "thread_id": thread_id,
+        "channel": "messages",
+        "checkpoint_id": "c1",
+        "chain": "messages:c1",
+        "base_checkpoint_id": None,
+        "kind": "full",
+        "type": "msgpack",
+        "blob": b"\x00\x01binary\xff",
+    }
+    row = {
+        "thread_id": thread_id,
+        "checkpoint_id": "c1",
+        "parent_id": None,
+        "checkpoint_data": b"\x00checkpoint",
+        "metadata": b"\x00metadata",
+        "blob_refs": {"messages": ["c1", "messages:c1"]},
+    }
+    write = {
+        "thread_id": thread_id,
+        "checkpoint_id": "c1",
+        "task_id": "task",
+        "idx": 0,
+        "channel": "messages",
+        "type": "msgpack",
+        "blob": b"\x00write",
+    }
+    try:
+        assert await repo.put_checkpoint(row, [blob])
+        assert await repo.put_writes([write])
+
+        stored = await repo.get_checkpoint(thread_id)
+        assert stored["checkpoint_id"] == "c1"
+        assert bytes(stored["checkpoint_data"]) == row["checkpoint_data"]
+        assert stored["blob_refs"] == row["blob_refs"]
+        [stored_blob] = await repo.get_blobs(thread_id, ["messages:c1"])
+        assert bytes(stored_blob["blob"]) == blob["blob"]
+        [stored_write] = await repo.get_writes(thread_id, "c1")
+        assert bytes(stored_write["blob"]) == write["blob"]
+        assert [r["checkpoint_id"] for r in await repo.list_checkpoints(thread_id)] == ["c1"]
+    finally:
+        pool = await client.pool()
+        for table in ("agent_checkpoint_writes", "agent_checkpoint_blobs", "agent_checkpoints"):
+            await pool.execute(f"DELETE FROM core_automation.{table} WHERE thread_id = $1", thread_id)
+        await client.close()
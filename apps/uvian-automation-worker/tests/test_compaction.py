@@ -0,0 +1,121 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph.message import add_messages
+from core.agents.utils.nodes import compaction_node as compaction
+from core.agents.utils.nodes.compaction_node import create_compaction_node
+from repositories.message_archive import MessageArchiveRepository
+
+
+class FakeModel:
+    def __init__(self):
+        self.prompts = []
+
+    async def ainvoke(self, messages):
+        self.prompts.append(messages)
+        return AIMessage("Previously: things happened.", usage_metadata={
+            "input_tokens": 10, "output_tokens": 5, "total_tokens": 15,
+        })
+
+
+class FakeArchive:
+    def __init__(self, ok=True):
+        self.ok = ok
+        self.ranges = []
+
+    async def insert_range(self, thread_id, range_start, range_end, type_, messages, summary=""):
+        self.ranges.append((thread_id, range_start, range_end))
+        return self.ok
+
+
+def _state(n):
+    messages = add_messages([], [HumanMessage(f"m{i}", id=str(i)) for i in range(n)])
+    return {"messages": messages, "thread_id": "t1", "compaction_state": {}}
+
+
+@pytest.mark.asyncio
+async def test_compaction_archives_and_prunes_old_messages(monkeypatch):
+    archive = FakeArchive()
+    monkeypatch.setattr(compaction, "message_archive_repository", archive)
+    state = _state(10)
+
+    update = await create_compaction_node()(state, {"configurable": {"model": FakeModel()}})
+
+    assert archive.ranges == [("t1", 0, 4)]
+    live = add_messages(state["messages"], update["messages"])
+    assert [m.content for m in live[:-1]] == ["m4", "m5", "m6", "m7", "m8", "m9"]
+    assert update["compaction_state"]["message_offset"] == 0
+    assert update["compaction_state"]["archived_count"] == 4
+
+
+@pytest.mark.asyncio
+async def test_compaction_falls_back_to_offset_when_archive_fails(monkeypatch):
+    monkeypatch.setattr(compaction, "message_archive_repository", FakeArchive(ok=False))
+    state = _state(10)
+
+    update = await create_compaction_node()(state, {"configurable": {"model": FakeModel()}})
+
+    assert len(add_messages(state["messages"], update["messages"])) == 11
+    assert update["compaction_state"]["message_offset"] == 4
+    assert update["compaction_state"]["archived_count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_compaction_folds_only_new_messages_and_rolls_up(monkeypatch):
+    monkeypatch.setattr(compaction, "message_archive_repository", FakeArchive(ok=False))
+    monkeypatch.setattr(compaction, "COMPACTION_SUMMARY_FANOUT", 2)
+    model = FakeModel()
+    node = create_compaction_node()
+    state = _state(10)
+
+    update = await node(state, {"configurable": {"model": model}})
+    new_messages = [HumanMessage(f"n{i}", id=f"n{i}") for i in range(4)]
+    state["messages"] = add_messages(state["messages"], update["messages"] + new_messages)
+    state["compaction_state"] = update["compaction_state"]
+    update = await node(state, {"configurable": {"model": model}})
+
+    # The second segment prompt only carries messages after the first offset
+    second = model.prompts[1][-1].content
+    assert "m3" not in second and "m5" in second
+    # Two tier-0 summaries were merged into one tier-1 summary
+    assert len(model.prompts) == 3
+    assert [e["tier"] for e in update["compaction_state"]["history"]] == [1]
+
+
+@pytest.mark.asyncio
+async def test_compaction_map_reduces_large_backlog(monkeypatch):
+    monkeypatch.setattr(compaction, "message_archive_repository", FakeArchive())
+    monkeypatch.setattr(compaction, "COMPACTION_MAP_REDUCE_TOKENS", 50)
+    monkeypatch.setattr(compaction, "COMPACTION_CHUNK_TOKENS", 20)
+    model = FakeModel()
+    state = _state(6)
+    state["messages"] = add_messages(
+        [HumanMessage("x" * 60, id=f"big{i}") for i in range(4)], state["messages"]
+    )
+
+    await create_compaction_node()(state, {"configurable": {"model": model}})
+
+    # One call per chunk, then the reduce into the segment summary
+    assert len(model.prompts) == 5
+    assert "Part 4:" in model.prompts[-1][-1].content
+
+
+@pytest.mark.asyncio
+async def test_archive_replaces_ranges_of_uncommitted_compactions():
+    client = MagicMock()
+    client.execute = AsyncMock()
+
+    with patch("repositories.message_archive.supabase_client", client):
+        assert await MessageArchiveRepository().insert_range("t1", 4, 9, "msgpack", b"x") is True
+
+    table = client.schema.return_value.table.return_value
+    # Rows from the stored archived count on were never committed
+    table.delete.return_value.eq.return_value.gte.assert_called_once_with("range_start", 4)
+    row = table.upsert.call_args.args[0]
+    assert (row["range_start"], row["range_end"]) == (4, 9)
+    assert "ignore_duplicates" not in table.upsert.call_args.kwargs
+
+    client.execute = AsyncMock(side_effect=ConnectionError("down"))
+    with patch("repositories.message_archive.supabase_client", client):
+        assert await MessageArchiveRepository().insert_range("t1", 4, 9, "msgpack", b"x") is False
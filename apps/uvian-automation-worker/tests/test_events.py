@@ -0,0 +1,91 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from langchain_core.messages import AIMessageChunk
+from core.agents.utils.nodes import model_node
+from core.agents.utils.nodes.model_node import EmptyResponseError, _astream_response
+from core.events import DeltaCoalescer
+
+
+def _coalescer(**kwargs):
+    client = MagicMock()
+    client.publish_message = AsyncMock()
+    coalescer = DeltaCoalescer(
+        client,
+        channel="agent:a:messages",
+        conversation_id="conv-1",
+        sender_id="agent-1",
+        message_id="msg-1",
+        **kwargs,
+    )
+    return coalescer, client
+
+
+@pytest.mark.asyncio
+async def test_deltas_are_coalesced_by_size():
+    coalescer, client = _coalescer(flush_interval=60, max_chars=10)
+
+    for token in ["hel", "lo ", "wor", "ld!"]:
+        await coalescer.push(token)
+
+    # "hel" + "lo " + "wor" + "ld!" crosses 10 chars on the fourth token
+    assert client.publish_message.await_count == 1
+    assert client.publish_message.await_args.args[4] == "hello world!"
+
+
+@pytest.mark.asyncio
+async def test_close_flushes_tail_and_marks_complete():
+    coalescer, client = _coalescer(flush_interval=60, max_chars=100)
+
+    await coalescer.push("partial")
+    await coalescer.close()
+
+    assert client.publish_message.await_count == 1
+    call = client.publish_message.await_args
+    assert call.args[4] == "partial"
+    assert call.kwargs == {"is_delta": True, "is_complete": True}
+
+
+@pytest.mark.asyncio
+async def test_publish_failure_is_swallowed():
+    coalescer, client = _coalescer(flush_interval=0, max_chars=100)
+    client.publish_message.side_effect = ConnectionError("redis down")
+
+    await coalescer.push("token")
+    await coalescer.close()
+
+    assert coalescer.frames_published == 0
+
+
+class FakeStreamingModel:
+    def __init__(self, *chunks, fail=False):
+        self.chunks = chunks
+        self.fail = fail
+
+    async def astream(self, messages):
+        for chunk in self.chunks:
+            yield AIMessageChunk(content=chunk)
+        if self.fail:
+            raise ConnectionError("stream reset")
+
+
+@pytest.mark.asyncio
+async def test_failed_stream_resets_the_message_and_the_retry_reuses_its_id(monkeypatch):
+    client = MagicMock()
+    client.publish_message = AsyncMock()
+    monkeypatch.setattr(model_node, "events", client)
+    state = {"channel_id": "agent:a:messages", "message_id": "run-1", "llm_calls": 2}
+
+    with pytest.raises(ConnectionError):
+        await _astream_response(FakeStreamingModel("par", "tial", fail=True), [], state)
+    error_frame = client.publish_message.await_args
+    assert error_frame.kwargs == {"is_delta": False, "is_complete": False, "error": "stream reset"}
+
+    response = await _astream_response(FakeStreamingModel("done"), [], state)
+    assert response.content == "done"
+    complete_frame = client.publish_message.await_args
+    assert complete_frame.kwargs == {"is_delta": True, "is_complete": True}
+    assert complete_frame.args[3] == error_frame.args[3]
+
+    with pytest.raises(EmptyResponseError):
+        await _astream_response(FakeStreamingModel(), [], state)
+    assert client.publish_message.await_args.kwargs["error"] == "The model returned an empty stream"
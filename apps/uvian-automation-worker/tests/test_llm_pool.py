@@ -0,0 +1,50 @@
+import pytest
+from core.agents.utils import models
+from core.agents.utils.models import aclose_llm_pool, create_llm, release_llm
+from core.agents.utils.tool_binding import tool_binding_cache
+
+CONFIG = {"type": "openai", "api_key": "sk-test", "model": "gpt-4o"}
+
+
+class FakeBinding:
+    pass
+
+
+@pytest.fixture(autouse=True)
+def pool(monkeypatch):
+    pool = {}
+    monkeypatch.setattr(models, "_pool", pool)
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_same_credential_reuses_the_client_and_parameter_copies():
+    first = create_llm({**CONFIG, "temperature": 0.2})
+    second = create_llm({**CONFIG, "temperature": 0.2})
+    other = create_llm({**CONFIG, "temperature": 0.9})
+
+    assert first is second
+    assert other is not first and other.temperature == 0.9
+    # Copies share the pooled HTTP client
+    assert other.http_async_client is first.http_async_client
+    assert create_llm({**CONFIG, "api_key": "sk-other"}).http_async_client is not first.http_async_client
+    await aclose_llm_pool()
+
+
+@pytest.mark.asyncio
+async def test_idle_clients_are_closed_only_once_released(monkeypatch, pool):
+    monkeypatch.setattr(models, "LLM_POOL_IDLE_TTL_SECONDS", -1)
+    held = create_llm(CONFIG)
+    idle = create_llm({**CONFIG, "model": "gpt-4o-mini"})
+    tool_binding_cache._bound[(id(idle), "tools")] = (idle, FakeBinding())
+
+    await release_llm({**CONFIG, "model": "gpt-4o-mini"})
+
+    assert idle.http_async_client.is_closed
+    assert (id(idle), "tools") not in tool_binding_cache._bound
+    # Still held by a job: kept open however long it has been idle
+    assert not held.http_async_client.is_closed
+    assert len(pool) == 1
+
+    await release_llm(CONFIG)
+    assert held.http_async_client.is_closed and not pool
@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from langchain_core.tools import ToolException
+from clients import mcp_breaker
+from clients.mcp_breaker import CircuitOpenError, MCPCircuitBreakers, ToolDeadlineError
+
+KEY = ("http://mcp", "id")
+
+
+async def fail():
+    raise ConnectionError("refused")
+
+
+async def ok():
+    return "ok"
+
+
+def deadline(seconds=1.0):
+    return asyncio.get_running_loop().time() + seconds
+
+
+@pytest.fixture(autouse=True)
+def invalidated(monkeypatch):
+    keys = []
+    monkeypatch.setattr(mcp_breaker.mcp_session_pool, "invalidate_key", keys.append)
+    return keys
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_fails_fast_and_recovers_through_a_probe(invalidated):
+    breakers = MCPCircuitBreakers(failure_threshold=2, reset_seconds=0.05)
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            await breakers.call(KEY, "mcp", "t", fail, deadline())
+
+    with pytest.raises(CircuitOpenError):
+        await breakers.call(KEY, "mcp", "t", ok, deadline())
+    assert breakers.stats()["mcp"]["state"] == "open"
+    # The probe must not reuse the session that kept failing
+    assert invalidated == [KEY]
+    assert breakers.is_open(KEY) and breakers.retry_after(KEY) > 0
+
+    await asyncio.sleep(0.06)
+    assert breakers.retry_after(KEY) == 0
+    with pytest.raises(ConnectionError):
+        await breakers.call(KEY, "mcp", "t", fail, deadline())
+    assert invalidated == [KEY, KEY]
+
+    await asyncio.sleep(0.06)
+    assert await breakers.call(KEY, "mcp", "t", ok, deadline()) == "ok"
+    stats = breakers.stats()["mcp"]
+    assert (stats["state"], stats["rejected"], stats["trips"]) == ("closed", 1, 2)
+
+
+@pytest.mark.asyncio
+async def test_deadline_and_tool_errors():
+    breakers = MCPCircuitBreakers(failure_threshold=1, reset_seconds=60)
+
+    async def tool_error():
+        raise ToolException("bad input")
+
+    # The server answered: not a failure
+    with pytest.raises(ToolException):
+        await breakers.call(KEY, "mcp", "t", tool_error, deadline())
+    assert breakers.stats()["mcp"]["state"] == "closed"
+
+    with pytest.raises(ToolDeadlineError):
+        await breakers.call(KEY, "mcp", "t", lambda: asyncio.sleep(1), deadline(0.01))
+    assert breakers.stats()["mcp"]["state"] == "open"
+
+
+@pytest.mark.asyncio
+async def test_server_concurrency_is_capped():
+    breakers = MCPCircuitBreakers(server_concurrency=2)
+    running = []
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        running.append(1)
+        peak = max(peak, len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+
+    await asyncio.gather(*(breakers.call(KEY, "mcp", "t", call, deadline()) for _ in range(6)))
+    assert peak == 2
@@ -0,0 +1,200 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+import pytest
+from clients import mcp_pool
+from clients.mcp_catalog import ToolCatalogCache
+from clients.mcp_pool import MCPSessionPool, pool_key
+
+
+class FakeSession:
+    def __init__(self):
+        self.initialized = False
+        self.healthy = True
+        self.broken = False
+
+    async def initialize(self):
+        self.initialized = True
+
+    async def send_ping(self):
+        if not self.healthy:
+            raise ConnectionError("gone")
+
+    async def list_tools(self):
+        if self.broken:
+            raise ConnectionError("stream closed")
+        tool = SimpleNamespace(name="echo", description="Echo input", inputSchema={})
+        return SimpleNamespace(tools=[tool])
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    opened = []
+
+    @asynccontextmanager
+    async def create_session(connection):
+        session = FakeSession()
+        opened.append(session)
+        yield session
+
+    monkeypatch.setattr(mcp_pool, "create_session", create_session)
+    return opened
+
+
+@pytest.mark.asyncio
+async def test_sessions_are_reused_across_leases(sessions):
+    pool = MCPSessionPool()
+    key = ("http://mcp", "id")
+
+    first = await pool.acquire(key, lambda: {})
+    pool.release(first)
+    second = await pool.acquire(key, lambda: {})
+
+    assert second is first
+    assert len(sessions) == 1 and sessions[0].initialized
+    assert pool.stats()["reused"] == 1
+    await pool.close()
+    assert first.closed
+
+
+@pytest.mark.asyncio
+async def test_failed_ping_and_expiry_rebuild_the_session(sessions):
+    pool = MCPSessionPool(ping_interval_seconds=0)
+    key = ("http://mcp", "id")
+
+    first = await pool.acquire(key, lambda: {})
+    pool.release(first)
+    sessions[0].healthy = False
+    second = await pool.acquire(key, lambda: {})
+    assert second is not first
+    await asyncio.sleep(0)
+    assert first.closed
+
+    pool.release(second)
+    second.expires_at = 0
+    third = await pool.acquire(key, lambda: {}, expires_in=3600)
+    assert third is not second
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_leased_session_that_fails_is_rebuilt(monkeypatch, sessions):
+    from clients import mcp as mcp_client
+
+    pool = MCPSessionPool()
+    monkeypatch.setattr(mcp_client, "mcp_session_pool", pool)
+    monkeypatch.setattr(mcp_client, "mcp_tool_catalog", ToolCatalogCache())
+    client = mcp_client.PersistentMCPClient()
+    client.register_all([{"id": "m", "url": "http://mcp", "auth_method": "none"}])
+    await client.connect("m")
+
+    # Still leased and recently used, so no ping would catch it
+    sessions[0].broken = True
+    with pytest.raises(ConnectionError):
+        await client.get_tool_metadata("m")
+
+    other = await pool.acquire(pool_key("http://mcp", "none", None, None), lambda: {})
+    assert other.session is sessions[1]
+    assert [t["name"] for t in await client.get_tool_metadata("m")] == ["echo"]
+    await asyncio.sleep(0)
+    assert len(sessions) == 2 and pool.stats()["sessions"] == 1
+    pool.release(other)
+    await client.close()
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_sessions_are_evicted(sessions):
+    pool = MCPSessionPool(idle_ttl_seconds=0)
+    lease = await pool.acquire(("http://a", "id"), lambda: {})
+    pool.release(lease)
+
+    other = await pool.acquire(("http://b", "id"), lambda: {})
+
+    await asyncio.sleep(0)
+    assert lease.closed and not other.closed
+    assert pool.stats()["evicted"] == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_client_connects_servers_concurrently(monkeypatch):
+    from clients import mcp as mcp_client
+
+    @asynccontextmanager
+    async def slow_session(connection):
+        await asyncio.sleep(0.1)
+        yield FakeSession()
+
+    pool = MCPSessionPool()
+    monkeypatch.setattr(mcp_pool, "create_session", slow_session)
+    monkeypatch.setattr(mcp_client, "mcp_session_pool", pool)
+    client = mcp_client.PersistentMCPClient()
+    client.register_all([{"id": f"m{i}", "url": f"http://mcp{i}", "auth_method": "none"} for i in range(4)])
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await asyncio.gather(client.connect_all(), client.connect("m0"))
+
+    assert loop.time() - started < 0.3
+    assert pool.stats()["opened"] == 4
+    # The duplicate connect shared the first lease
+    assert [entry.refs for entry in pool._entries.values()] == [1, 1, 1, 1]
+    await client.close()
+    assert pool.stats()["leased"] == 0
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_metadata_is_scoped_to_requested_servers(monkeypatch, sessions):
+    from clients import mcp as mcp_client
+
+    pool = MCPSessionPool()
+    monkeypatch.setattr(mcp_client, "mcp_session_pool", pool)
+    monkeypatch.setattr(mcp_client, "mcp_tool_catalog", ToolCatalogCache())
+    client = mcp_client.PersistentMCPClient()
+    client.register_all([{"id": f"m{i}", "url": f"http://mcp{i}", "auth_method": "none"} for i in range(3)])
+
+    await client.connect_and_load(["m0"])
+
+    assert len(sessions) == 1
+    assert client.catalog_partial
+    assert [entry["pending"] for entry in client.get_rich_catalog()] == [False, True, True]
+
+    client.start_catalog_prefetch(deadline=1)
+    await client._prefetch
+
+    assert not client.catalog_partial
+    assert client.get_rich_catalog()[2]["tool_names"] == ["echo"]
+    # Prefetched servers were only leased for the listing
+    assert [entry.refs for entry in pool._entries.values()] == [1, 0, 0]
+    await client.close()
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_catalog_is_served_across_jobs_and_revalidated(monkeypatch, sessions):
+    from clients import mcp as mcp_client
+
+    pool = MCPSessionPool()
+    catalog = ToolCatalogCache(ttl_seconds=0)
+    monkeypatch.setattr(mcp_client, "mcp_session_pool", pool)
+    monkeypatch.setattr(mcp_client, "mcp_tool_catalog", catalog)
+    key = pool_key("http://mcp", "none", None, None)
+    catalog.put(key, [{"name": "old", "description": "", "inputSchema": {}}])
+
+    client = mcp_client.PersistentMCPClient()
+    client.register_all([{"id": "m", "url": "http://mcp", "auth_method": "none"}])
+
+    # Known from an earlier job without connecting
+    assert client.get_rich_catalog()[0]["tool_names"] == ["old"]
+    assert not client.catalog_partial and not sessions
+
+    client.start_catalog_prefetch(deadline=1)
+    await client._prefetch
+    await asyncio.gather(*catalog._revalidating.values())
+
+    assert catalog.stats()["changes"] == 1
+    assert [t["name"] for t in catalog.peek(key).tools] == ["echo"]
+    await client.close()
+    await pool.close()
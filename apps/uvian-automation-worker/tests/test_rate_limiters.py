@@ -0,0 +1,71 @@
+import time
+
+import pytest
+from core.agents.utils.models import rate_limiters
+from core.agents.utils.models.rate_limiters import (
+    AdaptiveRateLimiter,
+    create_rate_limiter,
+    credential_scope,
+    parse_retry_after,
+)
+
+
+def test_limiter_is_shared_per_credential(monkeypatch):
+    monkeypatch.setattr(rate_limiters, "_registry", {})
+    config = {"type": "openai", "base_url": "https://router", "api_key": "sk-1"}
+
+    first = create_rate_limiter(2.0, scope=credential_scope(config))
+    second = create_rate_limiter(2.0, scope=credential_scope({**config, "model": "other"}))
+    other_key = create_rate_limiter(2.0, scope=credential_scope({**config, "api_key": "sk-2"}))
+
+    assert first is second
+    assert first is not other_key
+
+
+def test_credential_scope_does_not_leak_api_key():
+    scope = credential_scope({"type": "openai", "api_key": "sk-secret"})
+
+    assert "sk-secret" not in scope
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_halves_rate_and_success_recovers():
+    limiter = AdaptiveRateLimiter("test", requests_per_second=1.0, min_requests_per_second=0.1)
+
+    await limiter.arecord_rate_limited()
+    assert limiter.rate == 0.5
+
+    for _ in range(20):
+        await limiter.arecord_success()
+    assert limiter.rate == 1.0
+
+
+@pytest.mark.asyncio
+async def test_burst_of_429s_decreases_the_rate_once():
+    limiter = AdaptiveRateLimiter("test", requests_per_second=1.0, min_requests_per_second=0.01)
+    sent_at = time.monotonic()
+
+    # Three requests in flight at the old rate all come back 429
+    for _ in range(3):
+        await limiter.arecord_rate_limited(sent_at=sent_at)
+    assert limiter.rate == 0.5
+
+    # A request sent after the decrease still being rejected lowers it again
+    await limiter.arecord_rate_limited(sent_at=time.monotonic())
+    assert limiter.rate == 0.25
+    assert limiter.throttle_events == 4
+
+
+@pytest.mark.asyncio
+async def test_retry_after_blocks_acquire():
+    limiter = AdaptiveRateLimiter("test", requests_per_second=100.0)
+
+    await limiter.arecord_rate_limited(retry_after=30)
+
+    assert await limiter.aacquire(blocking=False) is False
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("garbage") is None
@@ -0,0 +1,43 @@
+from langchain_core.messages import AIMessage
+from core.agents.utils import system_prompt
+from core.agents.utils.system_prompt import build_system_message, cache_usage, memoized, render_memory
+
+
+class FakeAnthropicModel:
+    pass
+
+
+FakeAnthropicModel.__module__ = "langchain_anthropic.chat_models"
+
+
+def test_memoized_renders_once_per_content():
+    calls = []
+
+    def render(value):
+        calls.append(value)
+        return render_memory(value)
+
+    first = memoized("memory-test", {"b": 1, "a": 2}, render)
+    second = memoized("memory-test", {"a": 2, "b": 1}, render)
+
+    assert first == second
+    assert len(calls) == 1
+    assert first.index("### a") < first.index("### b")
+
+
+def test_build_system_message_orders_and_marks_segments():
+    plain = build_system_message(object(), ["base", "", "memory", "summary"])
+    assert plain.content == "basememorysummary"
+
+    marked = build_system_message(FakeAnthropicModel(), ["base", "tools", "memory", "summary", "extra"])
+    assert [b["text"] for b in marked.content] == ["base", "tools", "memory", "summary", "extra"]
+    assert sum("cache_control" in b for b in marked.content) == system_prompt.MAX_CACHE_BREAKPOINTS
+    assert "cache_control" not in marked.content[-1]
+
+
+def test_cache_usage_reads_input_token_details():
+    response = AIMessage("ok", usage_metadata={
+        "input_tokens": 100, "output_tokens": 5, "total_tokens": 105,
+        "input_token_details": {"cache_read": 80},
+    })
+    assert cache_usage(response) == {"cache_read_tokens": 80, "cache_creation_tokens": 0}
@@ -1,6 +1,12 @@
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
-from repositories.thread_inbox import ThreadInboxRepository
+from repositories.thread_inbox import ThreadInboxRepository, INBOX_COLUMNS
+
+
+def _mock_supabase(result):
+    mock_client = MagicMock()
+    mock_client.execute = AsyncMock(return_value=result)
+    return mock_client
 
 
 @pytest.mark.asyncio
@@ -12,18 +18,16 @@ async def test_fetch_pending_messages():
         {"id": "msg-1", "event_type": "message.created", "payload": {"content": "Hello"}},
         {"id": "msg-2", "event_type": "message.created", "payload": {"content": "World"}},
     ]
+    mock_client = _mock_supabase(mock_result)
 
-    mock_chain = MagicMock()
-    mock_chain.order.return_value.execute.return_value = mock_result
-    mock_chain.eq.return_value = mock_chain
-    mock_chain.from_.return_value.select.return_value = mock_chain
-    mock_chain.schema.return_value.from_ = mock_chain.from_
-
-    with patch.object(repo, 'client', mock_chain):
+    with patch("repositories.thread_inbox.supabase_client", mock_client):
         messages = await repo.fetch_pending_messages("thread-123")
 
         assert len(messages) == 2
         assert messages[0]["id"] == "msg-1"
+        mock_client.schema.assert_called_with("core_automation")
+        mock_client.schema.return_value.table.return_value.select.assert_called_once_with(INBOX_COLUMNS)
+        mock_client.execute.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -33,13 +37,20 @@ async def test_fetch_pending_messages_empty():
     mock_result = MagicMock()
     mock_result.data = []
 
-    mock_chain = MagicMock()
-    mock_chain.order.return_value.execute.return_value = mock_result
-    mock_chain.eq.return_value = mock_chain
-    mock_chain.from_.return_value.select.return_value = mock_chain
-    mock_chain.schema.return_value.from_ = mock_chain.from_
+    with patch("repositories.thread_inbox.supabase_client", _mock_supabase(mock_result)):
+        messages = await repo.fetch_pending_messages("thread-123")
+
+        assert messages == []
+
+
+@pytest.mark.asyncio
+async def test_fetch_pending_messages_error_returns_empty():
+    repo = ThreadInboxRepository()
 
-    with patch.object(repo, 'client', mock_chain):
+    mock_client = MagicMock()
+    mock_client.execute = AsyncMock(side_effect=TimeoutError())
+
+    with patch("repositories.thread_inbox.supabase_client", mock_client):
         messages = await repo.fetch_pending_messages("thread-123")
 
         assert messages == []
@@ -49,16 +60,14 @@ async def test_fetch_pending_messages_empty():
 async def test_mark_processed():
     repo = ThreadInboxRepository()
 
-    mock_chain = MagicMock()
-    mock_chain.execute.return_value = MagicMock()
-    mock_chain.in_.return_value = mock_chain
-    mock_chain.from_.return_value.update.return_value = mock_chain
-    mock_chain.schema.return_value.from_ = mock_chain.from_
+    mock_client = _mock_supabase(MagicMock())
 
-    with patch.object(repo, 'client', mock_chain):
+    with patch("repositories.thread_inbox.supabase_client", mock_client):
         result = await repo.mark_processed(["msg-1", "msg-2"])
 
         assert result is True
+        update = mock_client.schema.return_value.table.return_value.update
+        update.return_value.in_.assert_called_once_with("id", ["msg-1", "msg-2"])
 
 
 @pytest.mark.asyncio
@@ -68,3 +77,49 @@ async def test_mark_processed_empty_ids():
     result = await repo.mark_processed([])
 
     assert result is True
+
+
+@pytest.mark.asyncio
+async def test_claim_pending_messages_single_rpc():
+    repo = ThreadInboxRepository()
+
+    mock_result = MagicMock()
+    mock_result.data = [{"id": "msg-3", "seq": 3, "event_type": "message.created", "payload": {}}]
+    mock_client = _mock_supabase(mock_result)
+
+    with patch("repositories.thread_inbox.supabase_client", mock_client):
+        messages = await repo.claim_pending_messages("thread-123", after_seq=2, limit=10, fence=4)
+
+        assert [m["seq"] for m in messages] == [3]
+        mock_client.schema.return_value.rpc.assert_called_once_with(
+            "claim_thread_inbox",
+            {"p_thread_id": "thread-123", "p_after_seq": 2, "p_limit": 10, "p_fence": 4},
+        )
+        mock_client.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_claim_pending_messages_error_is_raised():
+    repo = ThreadInboxRepository()
+
+    mock_client = MagicMock()
+    mock_client.execute = AsyncMock(side_effect=TimeoutError())
+
+    with patch("repositories.thread_inbox.supabase_client", mock_client):
+        with pytest.raises(TimeoutError):
+            await repo.claim_pending_messages("thread-123")
+
+
+@pytest.mark.asyncio
+async def test_acknowledge_marks_claimed_rows_through_cursor():
+    repo = ThreadInboxRepository()
+
+    mock_result = MagicMock()
+    mock_result.data = 3
+    mock_client = _mock_supabase(mock_result)
+
+    with patch("repositories.thread_inbox.supabase_client", mock_client):
+        assert await repo.acknowledge("thread-123", 42) == 3
+        mock_client.schema.return_value.rpc.assert_called_once_with(
+            "ack_thread_inbox", {"p_thread_id": "thread-123", "p_through_seq": 42}
+        )
@@ -0,0 +1,130 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from core.thread_lease import ThreadLease, LeaseLostError
+from executors import agent_executor
+from executors.agent_executor import AgentExecutor
+
+WAKEUP = {"id": "job-1", "type": "thread-wakeup", "input": {"threadId": "thread-1", "agentId": "agent-1"}}
+
+
+def _lease(*eval_results):
+    client = MagicMock()
+    client.redis.eval = AsyncMock(side_effect=list(eval_results))
+    return ThreadLease(client, "thread-1", ttl_seconds=30), client
+
+
+@pytest.mark.asyncio
+async def test_wakeup_is_coalesced_while_thread_is_held():
+    lease, _ = _lease([-20000, 1], [-15000, 0])
+
+    assert await lease.acquire() is False
+    assert lease.token is None
+    assert lease.retry_after == 20
+    assert lease.recorded_pending
+
+    assert await lease.acquire() is False
+    assert not lease.recorded_pending
+
+
+@pytest.mark.asyncio
+async def test_release_keeps_lease_when_wakeups_are_pending():
+    lease, _ = _lease(7, 0, 1)
+
+    assert await lease.acquire() is True
+    assert lease.token == 7
+    assert await lease.release() is False
+    assert await lease.release() is True
+    assert lease.token is None
+
+
+@pytest.mark.asyncio
+async def test_fenced_write_fails_after_takeover():
+    lease, _ = _lease(3, 0, 0)
+
+    await lease.acquire()
+    with pytest.raises(LeaseLostError):
+        await lease.ensure_held()
+    await lease.abandon()
+
+
+@pytest.mark.asyncio
+async def test_redis_outage_degrades_to_unguarded_run():
+    lease, _ = _lease(ConnectionError("redis down"))
+
+    assert await lease.acquire() is True
+    await lease.ensure_held()
+    assert await lease.release() is True
+
+
+@pytest.fixture
+def requeued(monkeypatch):
+    jobs = []
+
+    async def enqueue(job_id, delay_seconds, check=None):
+        jobs.append((job_id, delay_seconds, check))
+
+    monkeypatch.setattr(agent_executor.wakeup_queue, "enqueue", enqueue)
+    return jobs
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    runs = []
+
+    async def run(self, job_id, thread_id, agent_user_id, lease):
+        runs.append(lease.token)
+        return {"status": "completed", "result": {}}
+
+    monkeypatch.setattr(AgentExecutor, "_run_thread", run)
+    return runs
+
+
+@pytest.mark.asyncio
+async def test_coalesced_wakeups_complete_without_running(monkeypatch, requeued, runs):
+    _, client = _lease([-20000, 1], [-19000, 0])
+    monkeypatch.setattr(agent_executor, "events", client)
+
+    first = await AgentExecutor().execute(WAKEUP)
+    second = await AgentExecutor().execute({**WAKEUP, "id": "job-2"})
+
+    assert first["status"] == second["status"] == "completed"
+    assert first["result"]["coalesced"] and not runs
+    # Only the first wakeup schedules the dead-holder check, keyed by its owner id
+    owner = client.redis.eval.call_args_list[0].args[5]
+    assert requeued == [("job-1", 20.0, owner)]
+
+
+@pytest.mark.asyncio
+async def test_lease_check_runs_only_wakeups_a_dead_holder_left(monkeypatch, requeued, runs):
+    _, client = _lease(-30000, 0, 9, 0)
+    monkeypatch.setattr(agent_executor, "events", client)
+    check = {**WAKEUP, "input": {**WAKEUP["input"], "leaseCheck": "owner-1"}}
+
+    # Holder still running: check again when its renewed lease would run out
+    await AgentExecutor().execute(check)
+    assert requeued == [("job-1", 30.0, "owner-1")] and not runs
+    # Holder released and ran the wakeups itself
+    await AgentExecutor().execute(check)
+    assert len(requeued) == 1 and not runs
+    # Lease expired with the wakeups still pending
+    await AgentExecutor().execute(check)
+    assert runs == [9]
+    assert client.redis.eval.call_args_list[2].args[7] == "owner-1"
+
+
+@pytest.mark.asyncio
+async def test_failed_run_requeues_wakeups_that_were_pending(monkeypatch, requeued):
+    _, client = _lease(7, 1)
+    monkeypatch.setattr(agent_executor, "events", client)
+
+    async def failed_run(self, job_id, thread_id, agent_user_id, lease):
+        return {"status": "failed", "result": {"error": "boom"}}
+
+    monkeypatch.setattr(AgentExecutor, "_run_thread", failed_run)
+
+    result = await AgentExecutor().execute(WAKEUP)
+
+    assert result["status"] == "failed"
+    assert requeued == [("job-1", agent_executor.THREAD_WAKEUP_RETRY_DELAY_SECONDS, None)]
+    keys = client.redis.eval.call_args.args[2:4]
+    assert keys == ("thread_lease:thread-1", "thread_lease:thread-1:pending")
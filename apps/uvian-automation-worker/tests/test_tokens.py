@@ -0,0 +1,56 @@
+import threading
+from types import SimpleNamespace
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from core.agents.utils import tokens
+from core.agents.utils.tokens import check_context, context_window, message_tokens, record_usage
+
+
+def _config(model_name, **configurable):
+    return {"configurable": {"model": SimpleNamespace(model_name=model_name, max_tokens=None), **configurable}}
+
+
+def test_context_window_uses_longest_registry_prefix():
+    assert context_window(SimpleNamespace(model_name="gpt-4o-mini")) == 128_000
+    assert context_window(SimpleNamespace(model_name="claude-sonnet-4")) == 200_000
+    assert context_window(SimpleNamespace(model_name="unknown"), override=50_000) == 50_000
+
+
+def test_message_tokens_are_cached_in_metadata():
+    message = HumanMessage("hello " * 40)
+    count = message_tokens(message)
+    message.content = ""
+    assert message_tokens(message) == count
+    assert message.response_metadata["token_count"][1] == count
+
+
+def test_check_context_uses_projected_prompt_size(monkeypatch):
+    monkeypatch.setattr(tokens, "CONTEXT_RESERVED_OUTPUT_TOKENS", 0)
+    messages = [HumanMessage("x" * 400, id=str(i)) for i in range(10)]
+    state = {"messages": messages, "prompt_overhead_tokens": 0}
+
+    assert check_context(state, _config("custom", context_window=2000)) == "model_node"
+    assert check_context(state, _config("custom", context_window=1000)) == "compaction_node"
+    # Nothing older than the recent window to compact
+    state["messages"] = messages[:6]
+    assert check_context(state, _config("custom", context_window=100)) == "model_node"
+
+
+def test_record_usage_derives_prompt_overhead():
+    prompt = [SystemMessage("system"), HumanMessage("hi")]
+    response = AIMessage("ok", usage_metadata={"input_tokens": 500, "output_tokens": 7, "total_tokens": 507})
+
+    overhead = record_usage(response, prompt)
+
+    assert overhead == 500 - message_tokens(prompt[1])
+    assert message_tokens(response) == 7 + tokens.MESSAGE_OVERHEAD_TOKENS
+
+
+@pytest.mark.asyncio
+async def test_prewarm_gives_up_after_its_deadline(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(tokens, "prewarm_tokenizer", lambda: release.wait(5))
+
+    # A slow download must not hold up startup
+    await tokens.aprewarm_tokenizer(timeout=0.01)
+    release.set()
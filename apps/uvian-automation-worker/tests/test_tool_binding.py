@@ -0,0 +1,46 @@
+from langchain_core.tools import StructuredTool
+from core.agents.utils.tool_binding import ToolBindingCache, tool_fingerprint
+
+
+class FakeModel:
+    def __init__(self):
+        self.bind_calls = []
+
+    def bind_tools(self, tools, tool_choice=None):
+        self.bind_calls.append(tools)
+        return ("bound", len(self.bind_calls))
+
+
+def _tool(name, schema=None):
+    return StructuredTool.from_function(
+        coroutine=None,
+        func=lambda **kwargs: None,
+        name=name,
+        description=f"{name} tool",
+        args_schema=schema or {"type": "object", "properties": {"q": {"type": "string"}}},
+    )
+
+
+def test_bind_is_memoized_per_model_and_tool_set():
+    cache = ToolBindingCache()
+    model = FakeModel()
+    tools = [_tool("search"), _tool("fetch")]
+
+    first = cache.bind(model, tools)
+    # Fresh tool objects with identical schemas reuse the binding
+    assert cache.bind(model, [_tool("search"), _tool("fetch")]) is first
+    assert len(model.bind_calls) == 1
+    assert model.bind_calls[0][0]["function"]["name"] == "search"
+
+    cache.bind(model, tools[:1])
+    cache.bind(FakeModel(), tools)
+    assert cache.stats()["misses"] == 3
+    assert cache.stats()["schemas"] == 2
+
+
+def test_fingerprint_is_cached_on_tool_and_tracks_schema():
+    tool = _tool("search")
+    fingerprint = tool_fingerprint(tool)
+
+    assert tool.metadata["schema_fingerprint"] == fingerprint
+    assert tool_fingerprint(_tool("search", {"type": "object", "properties": {}})) != fingerprint
@@ -0,0 +1,67 @@
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import StructuredTool
+from core.agents.utils import tool_index
+from core.agents.utils import state
+from core.agents.utils.tool_index import ToolIndex, select_tools
+
+
+def _tool(name, description):
+    return StructuredTool.from_function(
+        func=lambda **kwargs: None,
+        name=name,
+        description=description,
+        args_schema={"type": "object", "properties": {}},
+    )
+
+
+TOOLS = [
+    _tool("sendDiscordMessage", "Send a message to a Discord channel"),
+    _tool("list_tickets", "List open support tickets"),
+    _tool("create_ticket", "Create a support ticket"),
+    _tool("get_weather", "Current weather for a city"),
+]
+
+
+def test_bm25_ranks_name_and_description_matches():
+    index = ToolIndex(TOOLS)
+
+    assert [t.name for t in index.search("discord message", 2)] == ["sendDiscordMessage"]
+    assert {t.name for t in index.search("open tickets", 2)} == {"list_tickets", "create_ticket"}
+    assert index.search("unrelated", 3) == []
+
+
+def test_select_tools_binds_relevant_called_and_pinned(monkeypatch):
+    monkeypatch.setattr(tool_index, "TOOL_SUBSET_MIN_TOOLS", 2)
+    monkeypatch.setattr(tool_index, "TOOL_SUBSET_TOP_K", 1)
+    messages = [
+        AIMessage("", tool_calls=[{"name": "get_weather", "args": {}, "id": "1"}]),
+        HumanMessage("please post this in discord"),
+    ]
+
+    selected = select_tools(TOOLS, messages, pinned=["create_ticket"])
+
+    assert [t.name for t in selected] == ["sendDiscordMessage", "create_ticket", "get_weather"]
+
+
+def test_select_tools_keeps_small_tool_sets():
+    assert select_tools(TOOLS, []) == TOOLS
+
+
+def test_selection_only_grows_within_a_run(monkeypatch):
+    monkeypatch.setattr(tool_index, "TOOL_SUBSET_MIN_TOOLS", 2)
+    monkeypatch.setattr(tool_index, "TOOL_SUBSET_TOP_K", 1)
+
+    first = select_tools(TOOLS, [HumanMessage("please post this in discord")])
+    bound = [t.name for t in first]
+    second = select_tools(TOOLS, [HumanMessage("what's the weather")], bound=bound)
+
+    assert bound == ["sendDiscordMessage"]
+    assert [t.name for t in second] == ["sendDiscordMessage", "get_weather"]
+
+
+def test_pinned_tools_are_deduplicated_and_capped(monkeypatch):
+    monkeypatch.setattr(state, "TOOL_PINNED_MAX", 3)
+
+    pinned = state.pin_tools(["a", "b", "c"], ["b", "d"])
+
+    assert pinned == ["c", "b", "d"]
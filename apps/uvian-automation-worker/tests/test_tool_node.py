@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.tools import StructuredTool
+from langgraph.graph import END, START, MessagesState, StateGraph
+from langgraph.types import RetryPolicy
+from clients.mcp import MCP_SERVER_KEY, MCP_SERVER_NAME
+from clients.mcp_breaker import MCPCircuitBreakers
+from core.agents.utils.nodes import tool_node as tool_node_module
+from core.agents.utils.nodes.tool_node import ToolNode
+
+KEY = ("http://mcp", "id")
+
+
+def _graph(tool):
+    builder = StateGraph(MessagesState)
+    builder.add_node(
+        "tool_node",
+        ToolNode([tool], handle_tool_errors=True),
+        retry=RetryPolicy(initial_interval=0.01, max_attempts=3),
+    )
+    builder.add_edge(START, "tool_node")
+    builder.add_edge("tool_node", END)
+    return builder.compile()
+
+
+def _call(call_id):
+    return {"messages": [AIMessage("", tool_calls=[{"name": "slow", "args": {}, "id": call_id}])]}
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_and_missed_deadline_answer_without_retrying(monkeypatch):
+    monkeypatch.setattr(tool_node_module, "mcp_circuit_breakers", MCPCircuitBreakers(failure_threshold=1))
+    monkeypatch.setattr(tool_node_module, "MCP_TOOL_TIMEOUT_SECONDS", 0.05)
+    calls = []
+
+    async def slow() -> str:
+        calls.append(1)
+        await asyncio.sleep(1)
+        return "late"
+
+    tool = StructuredTool.from_function(coroutine=slow, name="slow", description="Hangs")
+    tool.metadata = {MCP_SERVER_KEY: KEY, MCP_SERVER_NAME: "mcp"}
+    graph = _graph(tool)
+
+    result = await graph.ainvoke(_call("c1"))
+    message = result["messages"][-1]
+    assert (message.status, message.artifact["error"]) == ("error", "deadline_exceeded")
+    assert len(calls) == 1
+
+    result = await graph.ainvoke(_call("c2"))
+    message = result["messages"][-1]
+    assert (message.status, message.artifact["error"]) == ("error", "circuit_open")
+    assert message.artifact["mcp_server"] == "mcp"
+    assert len(calls) == 1
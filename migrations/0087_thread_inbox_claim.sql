@@ -0,0 +1,190 @@
+-- Atomic claim-and-fetch for thread_inbox
+-- Replaces the select-then-update pair used by the worker's sync_node with a
+-- single claim call, adds a per-thread sequence for cursor reads, and moves
+-- processed rows out of the hot table.
+
+-- ---------------------------------------------------------------------------
+-- 1. Per-thread sequence
+-- ---------------------------------------------------------------------------
+
+CREATE TABLE core_automation.thread_inbox_sequences (
+  thread_id VARCHAR(255) PRIMARY KEY,
+  last_seq BIGINT NOT NULL DEFAULT 0
+);
+
+ALTER TABLE core_automation.thread_inbox_sequences ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role full access to thread_inbox_sequences"
+  ON core_automation.thread_inbox_sequences FOR ALL
+  USING (true) WITH CHECK (true);
+
+GRANT ALL ON core_automation.thread_inbox_sequences TO service_role;
+
+ALTER TABLE core_automation.thread_inbox
+  ADD COLUMN seq BIGINT,
+  ADD COLUMN claimed_at TIMESTAMPTZ,
+  ADD COLUMN claimed_fence BIGINT;
+
+-- Backfill existing rows in arrival order
+UPDATE core_automation.thread_inbox t
+SET seq = numbered.seq
+FROM (
+  SELECT id, row_number() OVER (PARTITION BY thread_id ORDER BY created_at, id) AS seq
+  FROM core_automation.thread_inbox
+) numbered
+WHERE t.id = numbered.id;
+
+INSERT INTO core_automation.thread_inbox_sequences (thread_id, last_seq)
+SELECT thread_id, max(seq) FROM core_automation.thread_inbox GROUP BY thread_id;
+
+-- The sequence row stays locked until the inserting transaction commits, so
+-- per-thread seq values become visible in order and a cursor never skips one.
+CREATE OR REPLACE FUNCTION core_automation.assign_thread_inbox_seq()
+RETURNS TRIGGER AS $$
+BEGIN
+  INSERT INTO core_automation.thread_inbox_sequences (thread_id, last_seq)
+  VALUES (NEW.thread_id, 1)
+  ON CONFLICT (thread_id)
+  DO UPDATE SET last_seq = core_automation.thread_inbox_sequences.last_seq + 1
+  RETURNING last_seq INTO NEW.seq;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER thread_inbox_assign_seq
+  BEFORE INSERT ON core_automation.thread_inbox
+  FOR EACH ROW
+  EXECUTE FUNCTION core_automation.assign_thread_inbox_seq();
+
+ALTER TABLE core_automation.thread_inbox
+  ALTER COLUMN seq SET NOT NULL,
+  DROP CONSTRAINT IF EXISTS thread_inbox_status_check,
+  ADD CONSTRAINT thread_inbox_status_check
+    CHECK (status IN ('pending', 'processing', 'processed'));
+
+CREATE UNIQUE INDEX idx_thread_inbox_thread_seq
+  ON core_automation.thread_inbox(thread_id, seq);
+
+CREATE INDEX idx_thread_inbox_processed
+  ON core_automation.thread_inbox(created_at)
+  WHERE status = 'processed';
+
+-- ---------------------------------------------------------------------------
+-- 2. Claim
+-- ---------------------------------------------------------------------------
+
+-- One round trip per sync:
+--   * rows at or below p_after_seq (the cursor the caller has checkpointed)
+--     are acknowledged as processed;
+--   * the next p_limit rows above the cursor are claimed and returned.
+-- Rows left in 'processing' by an execution whose lease was taken over
+-- (lower fence) are claimed again; the cursor guarantees they never reached
+-- a checkpoint, so this is not a double delivery.
+CREATE OR REPLACE FUNCTION core_automation.claim_thread_inbox(
+    p_thread_id TEXT,
+    p_after_seq BIGINT DEFAULT 0,
+    p_limit INTEGER DEFAULT 50,
+    p_fence BIGINT DEFAULT NULL
+) RETURNS TABLE (
+    id UUID,
+    seq BIGINT,
+    event_type VARCHAR,
+    payload JSONB,
+    created_at TIMESTAMPTZ
+) AS $$
+BEGIN
+  UPDATE core_automation.thread_inbox t
+  SET status = 'processed'
+  WHERE t.thread_id = p_thread_id
+    AND t.status = 'processing'
+    AND t.seq <= p_after_seq;
+
+  RETURN QUERY
+  WITH batch AS (
+    SELECT t.id
+    FROM core_automation.thread_inbox t
+    WHERE t.thread_id = p_thread_id
+      AND t.seq > p_after_seq
+      AND (
+        t.status = 'pending'
+        OR (
+          t.status = 'processing'
+          AND p_fence IS NOT NULL
+          AND (t.claimed_fence IS NULL OR t.claimed_fence < p_fence)
+        )
+      )
+    ORDER BY t.seq
+    LIMIT p_limit
+    FOR UPDATE SKIP LOCKED
+  )
+  UPDATE core_automation.thread_inbox t
+  SET status = 'processing',
+      claimed_at = now(),
+      claimed_fence = p_fence
+  FROM batch
+  WHERE t.id = batch.id
+  RETURNING t.id, t.seq, t.event_type, t.payload, t.created_at;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- ---------------------------------------------------------------------------
+-- 3. Retention
+-- ---------------------------------------------------------------------------
+
+CREATE TABLE core_automation.thread_inbox_archive (
+  id uuid PRIMARY KEY,
+  thread_id VARCHAR(255) NOT NULL,
+  agent_id uuid,
+  seq BIGINT NOT NULL,
+  event_type VARCHAR(255) NOT NULL,
+  payload JSONB NOT NULL,
+  created_at TIMESTAMPTZ,
+  archived_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX idx_thread_inbox_archive_thread
+  ON core_automation.thread_inbox_archive(thread_id, seq);
+
+ALTER TABLE core_automation.thread_inbox_archive ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role full access to thread_inbox_archive"
+  ON core_automation.thread_inbox_archive FOR ALL
+  USING (true) WITH CHECK (true);
+
+GRANT ALL ON core_automation.thread_inbox_archive TO service_role;
+
+-- Move up to p_limit processed rows older than p_retention_seconds into the
+-- archive. Safe to run from several workers at once.
+CREATE OR REPLACE FUNCTION core_automation.archive_thread_inbox(
+    p_retention_seconds INTEGER DEFAULT 86400,
+    p_limit INTEGER DEFAULT 1000
+) RETURNS INTEGER AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+  WITH batch AS (
+    SELECT t.id
+    FROM core_automation.thread_inbox t
+    WHERE t.status = 'processed'
+      AND t.created_at < now() - make_interval(secs => p_retention_seconds)
+    ORDER BY t.created_at
+    LIMIT p_limit
+    FOR UPDATE SKIP LOCKED
+  ),
+  moved AS (
+    DELETE FROM core_automation.thread_inbox t
+    USING batch
+    WHERE t.id = batch.id
+    RETURNING t.id, t.thread_id, t.agent_id, t.seq, t.event_type, t.payload, t.created_at
+  )
+  INSERT INTO core_automation.thread_inbox_archive
+    (id, thread_id, agent_id, seq, event_type, payload, created_at)
+  SELECT id, thread_id, agent_id, seq, event_type, payload, created_at FROM moved;
+
+  GET DIAGNOSTICS v_count = ROW_COUNT;
+  RETURN v_count;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+GRANT EXECUTE ON FUNCTION core_automation.claim_thread_inbox(TEXT, BIGINT, INTEGER, BIGINT) TO service_role;
+GRANT EXECUTE ON FUNCTION core_automation.archive_thread_inbox(INTEGER, INTEGER) TO service_role;
@@ -0,0 +1,38 @@
+-- Incremental agent checkpoints
+-- Channel values move out of agent_checkpoints.checkpoint_data into
+-- per-channel blobs. A checkpoint only writes blobs for channels whose
+-- version changed; append-only channels (e.g. messages) store just the
+-- appended tail on top of a periodic full snapshot.
+-- Rows with blob_refs IS NULL are legacy checkpoints holding full state.
+
+ALTER TABLE core_automation.agent_checkpoints
+  ADD COLUMN blob_refs JSONB;
+
+CREATE INDEX IF NOT EXISTS idx_agent_checkpoints_thread_created
+  ON core_automation.agent_checkpoints(thread_id, created_at DESC);
+
+CREATE TABLE core_automation.agent_checkpoint_blobs (
+  thread_id VARCHAR(36) NOT NULL,
+  channel TEXT NOT NULL,
+  -- checkpoint that wrote this blob
+  checkpoint_id TEXT NOT NULL,
+  -- "<channel>:<checkpoint_id of the full snapshot>" shared by a delta chain
+  chain TEXT NOT NULL,
+  -- previous link of the chain; NULL for full snapshots
+  base_checkpoint_id TEXT,
+  kind VARCHAR(10) NOT NULL CHECK (kind IN ('full', 'append')),
+  type TEXT NOT NULL,
+  blob BYTEA NOT NULL,
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  PRIMARY KEY (thread_id, channel, checkpoint_id)
+);
+
+CREATE INDEX idx_agent_checkpoint_blobs_chain
+  ON core_automation.agent_checkpoint_blobs(thread_id, chain);
+
+ALTER TABLE core_automation.agent_checkpoint_blobs ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role full access" ON core_automation.agent_checkpoint_blobs
+  FOR ALL USING (true) WITH CHECK (true);
+
+GRANT ALL ON core_automation.agent_checkpoint_blobs TO service_role;
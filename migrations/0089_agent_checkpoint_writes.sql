@@ -0,0 +1,27 @@
+-- Pending checkpoint writes
+-- Writes produced by tasks of a super-step that has not been checkpointed
+-- yet. When a run fails or the worker dies mid-step, the next run restores
+-- them so tasks that already finished (LLM calls, MCP tool calls) are not
+-- executed again.
+-- idx is the write's position within its task; LangGraph's special writes
+-- (error, interrupt, ...) use fixed negative indexes and are overwritten.
+
+CREATE TABLE core_automation.agent_checkpoint_writes (
+  thread_id VARCHAR(36) NOT NULL,
+  checkpoint_id TEXT NOT NULL,
+  task_id TEXT NOT NULL,
+  idx INTEGER NOT NULL,
+  channel TEXT NOT NULL,
+  type TEXT NOT NULL,
+  blob BYTEA NOT NULL,
+  task_path TEXT NOT NULL DEFAULT '',
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  PRIMARY KEY (thread_id, checkpoint_id, task_id, idx)
+);
+
+ALTER TABLE core_automation.agent_checkpoint_writes ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role full access" ON core_automation.agent_checkpoint_writes
+  FOR ALL USING (true) WITH CHECK (true);
+
+GRANT ALL ON core_automation.agent_checkpoint_writes TO service_role;
@@ -0,0 +1,28 @@
+-- Archive of compacted agent messages
+-- When compaction_node summarizes old messages it moves them here and
+-- removes them from the live messages channel, so checkpoints only carry
+-- the recent window. Rows are keyed by the message range they cover in the
+-- thread's full history (range_end exclusive). Rows at or past the archived
+-- count of the thread's stored compaction state come from compactions whose
+-- checkpoint was never stored; the next compaction replaces them.
+-- messages holds the serialized list in the checkpoint blob format.
+
+CREATE TABLE core_automation.agent_message_archive (
+  thread_id VARCHAR(36) NOT NULL,
+  range_start INTEGER NOT NULL,
+  range_end INTEGER NOT NULL,
+  type TEXT NOT NULL,
+  messages BYTEA NOT NULL,
+  -- summary produced by the compaction that archived this range
+  summary TEXT,
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  PRIMARY KEY (thread_id, range_start),
+  CHECK (range_end > range_start)
+);
+
+ALTER TABLE core_automation.agent_message_archive ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role full access" ON core_automation.agent_message_archive
+  FOR ALL USING (true) WITH CHECK (true);
+
+GRANT ALL ON core_automation.agent_message_archive TO service_role;
@@ -0,0 +1,25 @@
+-- Acknowledge a thread's claimed inbox rows at the end of a run
+-- claim_thread_inbox acknowledges the previous batch on the thread's next
+-- claim, so a thread that goes quiet kept its final batch 'processing' and
+-- the retention sweep never archived it. The worker now acknowledges rows up
+-- to the cursor it has checkpointed before releasing the thread lease.
+
+CREATE OR REPLACE FUNCTION core_automation.ack_thread_inbox(
+    p_thread_id TEXT,
+    p_through_seq BIGINT
+) RETURNS INTEGER AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+  UPDATE core_automation.thread_inbox t
+  SET status = 'processed'
+  WHERE t.thread_id = p_thread_id
+    AND t.status = 'processing'
+    AND t.seq <= p_through_seq;
+
+  GET DIAGNOSTICS v_count = ROW_COUNT;
+  RETURN v_count;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+GRANT EXECUTE ON FUNCTION core_automation.ack_thread_inbox(TEXT, BIGINT) TO service_role;